@@ -0,0 +1,167 @@
+# api/jobs.py
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.logger import logger
+from utils.metrics import metrics
+from config.settings import settings
+
+class JobQueueFull(Exception):
+    pass
+
+class Job:
+    """State of one background job, updated from the worker thread."""
+    def __init__(self, kind: str, description: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        # queued -> running -> succeeded | failed, or queued -> cancelled at shutdown
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Waiting for a free worker..."
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._last_update = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobManager:
+    """
+    Runs long jobs (ingestion) on a bounded thread pool so HTTP handlers return at once.
+
+    At most `max_pending` jobs may be queued or running; `submit` raises JobQueueFull
+    beyond that. Progress reported by a job is stored at most every `progress_interval`
+    seconds (pipeline callbacks fire several times per second), and only the last
+    `history` finished jobs are kept.
+    """
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 progress_interval: Optional[float] = None, history: Optional[int] = None):
+        self.max_pending = max_pending or settings.INGEST_JOB_MAX_PENDING
+        self.progress_interval = settings.INGEST_JOB_PROGRESS_INTERVAL_SECONDS if progress_interval is None else progress_interval
+        self.history = history or settings.INGEST_JOB_HISTORY
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or settings.INGEST_JOB_WORKERS, thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # jobs not started yet, with their cleanup, for shutdown() to cancel
+        self._queued: Dict[str, Tuple[Future, Optional[Callable[[], None]]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, description: str, fn: Callable[[Callable[..., None]], Dict[str, Any]],
+               on_done: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Queues `fn(progress_callback)`; its return value becomes the job result.
+        `progress_callback(value, desc="")` takes values from 0.0 to 1.0. `on_done` runs
+        after the job finishes either way (e.g. to delete an uploaded file).
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs are already queued or running, try again later.")
+            job = Job(kind, description)
+            self._jobs[job.id] = job
+            self._trim_history()
+        metrics.counter("api_jobs_total", "Background jobs by kind and state").inc(kind=kind, status="queued")
+        with self._lock:
+            # under the lock: _run unregisters the job only once it is registered
+            self._queued[job.id] = (self._executor.submit(self._run, job, fn, on_done), on_done)
+        logger.info(f"Queued {kind} job {job.id}: {description}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.list():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def shutdown(self, wait: bool = False):
+        """Stops the workers. Jobs still queued are cancelled and their `on_done` runs."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            queued = [(self._jobs.get(job_id), future, on_done) for job_id, (future, on_done) in self._queued.items()]
+            self._queued.clear()
+        for job, future, on_done in queued:
+            if job is None or not future.cancelled():
+                continue
+            job.status = "cancelled"
+            job.message = "Cancelled: the server shut down before the job started."
+            job.finished_at = time.time()
+            metrics.counter("api_jobs_total", "Background jobs by kind and state").inc(kind=job.kind, status=job.status)
+            self._cleanup(job, on_done)
+        if queued:
+            logger.info(f"Job manager shut down, {sum(1 for _, future, _ in queued if future.cancelled())} queued jobs cancelled.")
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _progress_callback(self, job: Job) -> Callable[..., None]:
+        def report(value: float, desc: str = ""):
+            now = time.monotonic()
+            if now - job._last_update < self.progress_interval and value < 1.0:
+                return
+            job._last_update = now
+            job.progress = max(job.progress, min(float(value), 1.0))
+            if desc:
+                job.message = desc
+        return report
+
+    def _cleanup(self, job: Job, on_done: Optional[Callable[[], None]]):
+        if on_done is None:
+            return
+        try:
+            on_done()
+        except Exception as e:
+            logger.warning(f"Cleanup after {job.kind} job {job.id} failed: {e}")
+
+    def _run(self, job: Job, fn: Callable[[Callable[..., None]], Dict[str, Any]], on_done: Optional[Callable[[], None]]):
+        with self._lock:
+            self._queued.pop(job.id, None)
+        job.status = "running"
+        job.started_at = time.time()
+        job.message = "Started."
+        try:
+            job.result = fn(self._progress_callback(job))
+            job.progress = 1.0
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            metrics.counter("api_jobs_total", "Background jobs by kind and state").inc(kind=job.kind, status=job.status)
+            metrics.histogram("api_job_seconds", "Background job run time").observe(job.finished_at - job.started_at, kind=job.kind)
+            self._cleanup(job, on_done)
+        logger.info(f"{job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s.")
@@ -0,0 +1,196 @@
+# api/server.py
+import os
+import shutil
+import tempfile
+
+import anyio
+
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from pydantic import BaseModel, Field, ValidationError
+from utils.logger import logger
+from utils.metrics import metrics, timed
+from config.settings import settings
+from api.jobs import JobManager, JobQueueFull
+from core.services import Services, WarmingUp
+from core.retrieval.search_filters import SearchFilters
+
+QueryType = Literal["text", "image", "audio"]
+
+class SearchQuery(BaseModel):
+    # text, or (image / audio) the path of a file already under RAW_DATA_DIR
+    query: str
+    query_type: QueryType = "text"
+
+class SearchRequest(SearchQuery):
+    top_k: int = Field(5, ge=1, le=100)
+    rescore: Optional[bool] = None
+    oversampling: Optional[float] = Field(None, gt=0)
+    # False: IDs, scores and payload metadata only, the contents are not read from the DocStore
+    hydrate: bool = True
+    filters: Optional[SearchFilters] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchQuery] = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=100)
+    rescore: Optional[bool] = None
+    oversampling: Optional[float] = Field(None, gt=0)
+    hydrate: bool = True
+    filters: Optional[SearchFilters] = None
+
+def _check_server_path(query: SearchQuery):
+    """File queries sent as JSON may only point at ingested data, never elsewhere on the server."""
+    if query.query_type == "text":
+        return
+    path = os.path.realpath(query.query)
+    raw_dir = os.path.realpath(settings.RAW_DATA_DIR)
+    if os.path.commonpath([path, raw_dir]) != raw_dir or not os.path.isfile(path):
+        raise HTTPException(status_code=400, detail=f"{query.query_type} queries must be files under the raw data folder; upload new files to /search/upload.")
+
+def _save_upload(upload: UploadFile, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    suffix = os.path.splitext(upload.filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(upload.file, f, length=1024 * 1024)
+    return path
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def create_api(services: Services, job_manager: Optional[JobManager] = None) -> FastAPI:
+    """
+    HTTP API on top of the same IngestionService / Retriever (and so the same models and
+    Qdrant client) as the Gradio UI, which main.py mounts on it at UI_PATH.
+
+    Search runs in worker threads, at most SEARCH_CONCURRENCY_LIMIT at a time, so
+    concurrent requests reach the query micro-batchers together. Ingestion runs as
+    background jobs (see JobManager) and is polled through /jobs/{job_id}. While the
+    services warm up, /health answers at once, /ready returns 503, and searches wait
+    briefly and then get a 503 with Retry-After; ingestion jobs wait in the queue.
+    """
+    jobs = job_manager or JobManager()
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        yield
+        jobs.shutdown(wait=False)
+
+    api = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
+    search_limiter = anyio.CapacityLimiter(settings.SEARCH_CONCURRENCY_LIMIT)
+    api.state.jobs = jobs
+
+    async def run_search(fn, *args) -> Any:
+        return await anyio.to_thread.run_sync(fn, *args, limiter=search_limiter)
+
+    async def require(*components: str):
+        try:
+            await anyio.to_thread.run_sync(lambda: services.require(*components))
+        except WarmingUp as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    @api.get("/", include_in_schema=False)
+    async def root():
+        return RedirectResponse(url=settings.UI_PATH)
+
+    @api.get("/health")
+    async def health() -> Dict[str, Any]:
+        # liveness: answers as soon as the process serves HTTP
+        return {"status": "ok", "readiness": services.readiness(), "jobs": jobs.counts()}
+
+    @api.get("/ready")
+    async def ready() -> JSONResponse:
+        readiness = services.readiness()
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+    @api.get("/metrics", response_class=PlainTextResponse)
+    async def prometheus_metrics() -> str:
+        return metrics.render_prometheus()
+
+    @api.post("/search")
+    async def search(request: SearchRequest) -> Dict[str, Any]:
+        _check_server_path(request)
+        await require(request.query_type)
+        with timed("api_request_seconds", "HTTP API request wall time", endpoint="search"):
+            results = await run_search(lambda: services.retriever.retrieve(
+                request.query, request.query_type, request.top_k, rescore=request.rescore, oversampling=request.oversampling,
+                hydrate=request.hydrate, filters=request.filters
+            ))
+        return {"query_type": request.query_type, "results": results}
+
+    @api.post("/search/batch")
+    async def search_batch(request: BatchSearchRequest) -> Dict[str, Any]:
+        if len(request.queries) > settings.API_MAX_BATCH_QUERIES:
+            raise HTTPException(status_code=413, detail=f"At most {settings.API_MAX_BATCH_QUERIES} queries per batch.")
+        for query in request.queries:
+            _check_server_path(query)
+        await require(*{query.query_type for query in request.queries})
+        with timed("api_request_seconds", "HTTP API request wall time", endpoint="search_batch"):
+            results = await run_search(lambda: services.retriever.retrieve_batch(
+                [(query.query, query.query_type) for query in request.queries], request.top_k,
+                rescore=request.rescore, oversampling=request.oversampling, hydrate=request.hydrate,
+                filters=request.filters
+            ))
+        return {"results": results}
+
+    @api.post("/search/upload")
+    async def search_upload(file: UploadFile = File(...), query_type: Literal["image", "audio"] = Form(...),
+                            top_k: int = Form(5, ge=1, le=100), hydrate: bool = Form(True),
+                            filters: Optional[str] = Form(None)) -> Dict[str, Any]:
+        """
+        Image or audio query uploaded with the request; the file is deleted afterwards.
+        `filters` is a SearchFilters JSON object, as in /search.
+        """
+        try:
+            search_filters = SearchFilters.model_validate_json(filters) if filters else None
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        await require(query_type)
+        with timed("api_request_seconds", "HTTP API request wall time", endpoint="search_upload"):
+            path = await anyio.to_thread.run_sync(_save_upload, file, settings.API_UPLOAD_DIR)
+            try:
+                results = await run_search(lambda: services.retriever.retrieve(
+                    path, query_type, top_k, hydrate=hydrate, filters=search_filters
+                ))
+            finally:
+                _remove(path)
+        return {"query_type": query_type, "results": results}
+
+    @api.post("/ingest", status_code=202)
+    async def ingest(file: UploadFile = File(...)) -> Dict[str, Any]:
+        """Queues the ingestion of a ZIP archive (same format as the UI upload) and returns its job."""
+        if not (file.filename or "").lower().endswith(".zip"):
+            raise HTTPException(status_code=400, detail="Please upload a zip file.")
+        zip_path = await anyio.to_thread.run_sync(_save_upload, file, settings.API_UPLOAD_DIR)
+
+        def run_ingestion(progress):
+            if not services.is_ready("storage"):
+                progress(0.0, desc="Waiting for the database to start...")
+            services.wait_ready("storage")
+            return services.ingestion_service.ingest_zip_with_progress(zip_path, progress)
+
+        try:
+            job = jobs.submit("ingest", file.filename, run_ingestion, on_done=lambda: _remove(zip_path))
+        except JobQueueFull as e:
+            _remove(zip_path)
+            raise HTTPException(status_code=429, detail=str(e))
+        return job.to_dict()
+
+    @api.get("/jobs")
+    async def list_jobs() -> Dict[str, Any]:
+        return {"jobs": [job.to_dict() for job in jobs.list()]}
+
+    @api.get("/jobs/{job_id}")
+    async def get_job(job_id: str) -> Dict[str, Any]:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return job.to_dict()
+
+    logger.info("HTTP API initialized.")
+    return api
@@ -1,32 +1,24 @@
 # app/main.py
 import gradio as gr
 import os
+import time
 import zipfile
 
-from pathlib import Path
 from utils.logger import logger
 from config.settings import settings
-from qdrant_client import QdrantClient
-from core.retrieval.retriever import Retriever
-from ingestions.ingestion import IngestionService
+from core.services import services, WarmingUp
+from core.retrieval.search_filters import SearchFilters
+from utils.metrics import metrics, timed, profile_request
 
-# --- Initialize global services ---
-logger.info("--- Initializing Global Services (Upload-Only Mode) ---")
-try:
-    # Create ONE QdrantClient only for sharing
-    qdrant_db_path = os.path.join(settings.DATA_DIR, "qdrant_data")
-    shared_qdrant_client = QdrantClient(path=qdrant_db_path)
-    logger.info("Shared Qdrant client initialized.")
-
-    ingestion_service = IngestionService(client=shared_qdrant_client)
-    retriever_instance = Retriever(client=shared_qdrant_client)
-    
-    logger.info("All services initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize global services: {e}")
-    raise RuntimeError(f"Could not initialize services. Please check logs. Error: {e}")
+# --- Global services ---
+# Qdrant, IngestionService, Retriever and the models are built by a background warm-up
+# (see core/services.py) started by main.py, so the UI comes up before they are ready.
 
 def upload_handler(zip_path: str, progress=gr.Progress()):
+    with timed("app_handler_seconds", "Gradio handler wall time", handler="upload"), profile_request("upload"):
+        return _upload_handler(zip_path, progress)
+
+def _upload_handler(zip_path: str, progress):
     progress(0, desc="🚀 Starting upload process...")
     
     if not zip_path:
@@ -35,54 +27,60 @@ def upload_handler(zip_path: str, progress=gr.Progress()):
     if not zip_path.endswith(".zip"):
         return "Error: Please upload a zip file"
     
-    progress(0.05, desc="📦 Extracting ZIP file...")
+    progress(0.05, desc="📦 Opening ZIP file...")
     
+    # ingestion loads the models it needs itself, only storage has to be up
+    if not services.is_ready("storage"):
+        progress(0.1, desc="⏳ Waiting for the database to start...")
     try:
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(settings.RAW_DATA_DIR)
-    except zipfile.BadZipFile:
-        return "Invalid ZIP file."
+        services.wait_ready("storage")
     except Exception as e:
-        return f"Error during extraction: {str(e)}"
-    
-    progress(0.15, desc="🔍 Scanning for files...")
-    
-    logger.info(f"Handling upload of {len(settings.RAW_DATA_DIR)} items (files/folders)...")
-
-    # --- Retrieve all file path from input ---
-    path = Path(settings.RAW_DATA_DIR)
-    all_temp_file_paths = list(path.rglob("*"))
-    all_temp_file_paths = [str(p) for p in all_temp_file_paths if os.path.isfile(p)]
+        return str(e)
     
-    progress(0.25, desc="📊 Analyzing files...")
-    
-    if not all_temp_file_paths:
-        return "No valid files found in the uploaded items."
-
-    logger.info(f"Found a total of {len(all_temp_file_paths)} files to process.")
-    progress(0.35, desc=f"✅ Found {len(all_temp_file_paths)} files to process...")
-
-    files_to_ingest = all_temp_file_paths.copy()
-
-    if not files_to_ingest:
-        return "No valid files were moved for ingestion."
-
-    # Start ingesting data
+    # Start ingesting data: members are streamed from the archive straight into the pipeline
     try:
         progress(0.4, desc="🔄 Starting file ingestion...")
         # Gọi hàm ingestion với progress callback
-        ingestion_service.ingest_files_with_progress(files_to_ingest, progress)
-        
-        success_message = f"Successfully uploaded and ingested {len(files_to_ingest)} file(s)."
-        logger.success(success_message)
-        return success_message
+        stats = services.ingestion_service.ingest_zip_with_progress(zip_path, progress)
+    except zipfile.BadZipFile:
+        return "Invalid ZIP file."
     except Exception as e:
         error_message = f"An error occurred during the ingestion process: {e}"
         logger.error(error_message)
         return error_message
+    
+    total_files = stats["files_parsed"] + stats["files_skipped"] + stats["files_failed"]
+    if not total_files:
+        return "No valid files found in the uploaded items."
+    
+    success_message = (f"Successfully uploaded {total_files} file(s): "
+                       f"{stats['files_parsed']} ingested, {stats['files_skipped']} unchanged and skipped.")
+    if stats["files_unsupported"]:
+        success_message += f" {stats['files_unsupported']} file(s) of unsupported type ignored."
+    logger.success(success_message)
+    return success_message
 
 # ---- HÀM XỬ LÝ CHO TAB SEARCH ----
-def search_handler(text_query: str, image_query_path: str, audio_query_path: str, top_k: int):
+def search_handler(text_query: str, image_query_path: str, audio_query_path: str, top_k: int,
+                   source_filter: str, min_duration_s: float, max_duration_s: float, ingested_within_hours: float):
+    # handler time minus retrieval time (query_embedding_seconds + qdrant_search_seconds) is the UI overhead
+    with timed("app_handler_seconds", "Gradio handler wall time", handler="search"), profile_request("search"):
+        return _search_handler(text_query, image_query_path, audio_query_path, top_k,
+                               source_filter, min_duration_s, max_duration_s, ingested_within_hours)
+
+def _build_filters(source_filter: str, min_duration_s: float, max_duration_s: float,
+                   ingested_within_hours: float) -> SearchFilters:
+    """Filters of the search form; empty fields (and 0 for the numbers) don't filter."""
+    source_ids = [source_id.strip() for source_id in (source_filter or "").split(",") if source_id.strip()]
+    return SearchFilters(
+        source_ids=source_ids or None,
+        min_duration_ms=int(min_duration_s * 1000) if min_duration_s else None,
+        max_duration_ms=int(max_duration_s * 1000) if max_duration_s else None,
+        ingested_after=int(time.time() - ingested_within_hours * 3600) if ingested_within_hours else None
+    )
+
+def _search_handler(text_query: str, image_query_path: str, audio_query_path: str, top_k: int,
+                    source_filter: str, min_duration_s: float, max_duration_s: float, ingested_within_hours: float):
     def create_empty_updates(max_results=10):
         updates = []
         for _ in range(max_results):
@@ -98,12 +96,15 @@ def search_handler(text_query: str, image_query_path: str, audio_query_path: str
 
     # Kiểm tra database trước khi xử lý query
     try:
-        if retriever_instance.is_database_empty():
+        services.require("storage")
+        if services.retriever.is_database_empty():
             empty_db_message = gr.Textbox(
                 value="Database is empty. Please go to the 'Upload Data' tab to add files first.", 
                 visible=True
             )
             return [empty_db_message] + create_empty_updates()
+    except WarmingUp as e:
+        return [gr.Textbox(value=f"⏳ {e}", visible=True)] + create_empty_updates()
     except Exception as e:
         error_message = gr.Textbox(
             value=f"Error checking database: {str(e)}", 
@@ -124,9 +125,19 @@ def search_handler(text_query: str, image_query_path: str, audio_query_path: str
     if not query_type:
         return [gr.Textbox(value="Error: Please provide a query.", visible=True)] + create_empty_updates()
 
+    try:
+        filters = _build_filters(source_filter, min_duration_s, max_duration_s, ingested_within_hours)
+    except ValueError as e:
+        return [gr.Textbox(value=f"Error: invalid filters: {e}", visible=True)] + create_empty_updates()
+
+    try:
+        services.require(query_type)
+    except WarmingUp as e:
+        return [gr.Textbox(value=f"⏳ {e}", visible=True)] + create_empty_updates()
+
     try:
         logger.info(f"Handling '{query_type}' query: {query_content}")
-        results = retriever_instance.retrieve(query_content, query_type, int(top_k))
+        results = services.retriever.retrieve(query_content, query_type, int(top_k), filters=filters)
         
         if not results:
             return [gr.Textbox(value="No results found.", visible=True)] + create_empty_updates()
@@ -151,8 +162,11 @@ def search_handler(text_query: str, image_query_path: str, audio_query_path: str
                     else: 
                         text_val, text_visible = "`Image content not found at path.`", True
                 elif chunk_type == 'audio':
-                    if content and os.path.exists(content): 
-                        audio_val, audio_visible = content, True
+                    from core.data_processing.audio_processor import materialize_audio_chunk
+                    # segment files are written lazily, on first playback
+                    audio_path = materialize_audio_chunk(metadata)
+                    if audio_path: 
+                        audio_val, audio_visible = audio_path, True
                     else: 
                         text_val, text_visible = "`Audio content not found at path.`", True
 
@@ -181,6 +195,23 @@ def search_handler(text_query: str, image_query_path: str, audio_query_path: str
         logger.error(error_message)
         return [gr.Textbox(value=error_message, visible=True)] + create_empty_updates()
 
+# ---- HÀM XỬ LÝ CHO TAB STATS ----
+def stats_handler():
+    stats = {"readiness": services.readiness()}
+    if services.is_ready("storage") and services.retriever is not None:
+        from core.embeddings.model_registry import model_registry
+
+        embedding_cache = services.ingestion_service.embedding_cache
+        stats.update({
+            "collections": services.retriever.get_collection_stats(),
+            "loaded_models": [name for name in model_registry.names() if model_registry.is_loaded(name)],
+            "query_cache": services.retriever.query_cache.stats(),
+            "micro_batchers": services.retriever.get_micro_batcher_stats(),
+            "embedding_cache": {"hits": embedding_cache.hits, "misses": embedding_cache.misses} if embedding_cache else None,
+        })
+    stats["metrics"] = metrics.snapshot()
+    return stats, metrics.render_prometheus()
+
 # --- 3. Xây dựng giao diện với Gradio Blocks ---
 def create_and_run_app():
     with gr.Blocks(theme=gr.themes.Soft(), title="Multimedia RAG Assistant") as demo:
@@ -196,6 +227,12 @@ def create_and_run_app():
                         image_query_input = gr.Image(label="Image Query", type="filepath")
                         audio_query_input = gr.Audio(label="Audio Query", type="filepath")
                         top_k_slider = gr.Slider(minimum=1, maximum=10, value=3, step=1, label="Top K Results")
+                        with gr.Accordion("Filters", open=False):
+                            source_filter_input = gr.Textbox(label="Source files", placeholder="comma-separated, e.g. texts/notes.txt")
+                            with gr.Row():
+                                min_duration_input = gr.Number(label="Min audio duration (s)", value=0, minimum=0)
+                                max_duration_input = gr.Number(label="Max audio duration (s)", value=0, minimum=0)
+                            ingested_within_input = gr.Number(label="Ingested within the last (hours)", value=0, minimum=0)
                         search_button = gr.Button("Search", variant="primary")
                     
                     with gr.Column(scale=2):
@@ -216,8 +253,11 @@ def create_and_run_app():
                         all_outputs = [info_box] + result_components
                         search_button.click(
                             fn=search_handler,
-                            inputs=[text_query_input, image_query_input, audio_query_input, top_k_slider],
-                            outputs=all_outputs
+                            inputs=[text_query_input, image_query_input, audio_query_input, top_k_slider,
+                                    source_filter_input, min_duration_input, max_duration_input, ingested_within_input],
+                            outputs=all_outputs,
+                            # let concurrent searches run together so the micro-batchers can merge them
+                            concurrency_limit=settings.SEARCH_CONCURRENCY_LIMIT
                         )
 
             # --- TAB 2: UPLOAD ---
@@ -241,6 +281,16 @@ def create_and_run_app():
                         show_progress="full"  # Hiển thị progress bar
                     )
 
+            # --- TAB 3: STATS ---
+            with gr.TabItem("Stats", id=2):
+                gr.Markdown("### Collections, caches and per-stage timings")
+                refresh_stats_button = gr.Button("Refresh")
+                stats_json = gr.JSON(label="Stats")
+                with gr.Accordion("Prometheus metrics", open=False):
+                    prometheus_text = gr.Code(label="metrics.prom", interactive=False)
+                
+                refresh_stats_button.click(fn=stats_handler, outputs=[stats_json, prometheus_text], queue=False)
+
         # Xử lý sự kiện để xóa các input khác trong tab Search
         def clear_search_inputs(input_type):
             if input_type == 'text': return gr.Image(value=None), gr.Audio(value=None)
@@ -0,0 +1,122 @@
+# benchmarks/corpus.py
+import os
+import random
+import wave
+import zipfile
+
+import numpy as np
+
+from typing import Dict, List
+from PIL import Image, ImageDraw
+from utils.logger import logger
+
+_SYLLABLES = ["ka", "to", "mi", "ra", "ne", "lu", "so", "vi", "da", "pe", "ho", "gu", "zen", "tra", "qua", "min", "bor", "lek"]
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+def make_text(vocabulary: List[str], n_words: int, rng: random.Random) -> str:
+    """Paragraphs of random sentences, so the splitter sees realistic separators."""
+    paragraphs, sentence, paragraph = [], [], []
+    for _ in range(n_words):
+        sentence.append(rng.choice(vocabulary))
+        if len(sentence) >= rng.randint(6, 18):
+            paragraph.append(" ".join(sentence).capitalize() + ".")
+            sentence = []
+            if len(paragraph) >= rng.randint(3, 8):
+                paragraphs.append(" ".join(paragraph))
+                paragraph = []
+    if sentence:
+        paragraph.append(" ".join(sentence).capitalize() + ".")
+    if paragraph:
+        paragraphs.append(" ".join(paragraph))
+    return "\n\n".join(paragraphs)
+
+def make_image(width: int, height: int, rng: random.Random) -> Image.Image:
+    """Gradient background with random shapes (compresses like a photo, unlike pure noise)."""
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+    colors = np.array([[rng.random() for _ in range(3)] for _ in range(2)], dtype=np.float32)
+    pixels = (colors[0] * x + colors[1] * y) * 255 / 2
+    image = Image.fromarray(pixels.clip(0, 255).astype(np.uint8), "RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(3, 12)):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = min(width, x0 + rng.randint(10, width // 2)), min(height, y0 + rng.randint(10, height // 2))
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle([x0, y0, x1, y1], fill=fill)
+        else:
+            draw.ellipse([x0, y0, x1, y1], fill=fill)
+    return image
+
+def make_audio(seconds: float, sample_rate: int, rng: random.Random) -> np.ndarray:
+    """Tone bursts separated by pauses longer than the AudioProcessor's min_silence_len."""
+    n_samples = int(seconds * sample_rate)
+    samples = np.zeros(n_samples, dtype=np.float32)
+    position = int(rng.uniform(0.2, 1.0) * sample_rate)
+    while position < n_samples:
+        length = min(n_samples - position, int(rng.uniform(0.5, 4.0) * sample_rate))
+        t = np.arange(length, dtype=np.float32) / sample_rate
+        frequency = rng.uniform(110, 2000)
+        samples[position:position + length] = 0.4 * np.sin(2 * np.pi * frequency * t) * np.hanning(length)
+        position += length + int(rng.uniform(1.2, 2.5) * sample_rate)
+    samples += np.random.default_rng(rng.randrange(2 ** 32)).normal(0, 0.001, n_samples).astype(np.float32)
+    return samples
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((samples.clip(-1, 1) * 32767).astype(np.int16).tobytes())
+
+def generate_corpus(root: str, n_texts: int, n_images: int, n_audios: int, text_words: int = 2000,
+                    image_size: int = 640, audio_seconds: float = 20.0, audio_sample_rate: int = 16000,
+                    seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Writes a synthetic corpus in the upload layout (`texts/`, `images/`, `audios/` under `root`)
+    and returns the file paths per modality. Same arguments always give the same files.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(2000, rng)
+    files = {"texts": [], "images": [], "audios": []}
+    for folder in files:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    for i in range(n_texts):
+        path = os.path.join(root, "texts", f"doc_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_text(vocabulary, text_words, rng))
+        files["texts"].append(path)
+
+    for i in range(n_images):
+        path = os.path.join(root, "images", f"img_{i:05d}.jpg")
+        make_image(image_size, image_size * 3 // 4, rng).save(path, quality=90)
+        files["images"].append(path)
+
+    for i in range(n_audios):
+        path = os.path.join(root, "audios", f"clip_{i:05d}.wav")
+        write_wav(path, make_audio(audio_seconds, audio_sample_rate, rng), audio_sample_rate)
+        files["audios"].append(path)
+
+    logger.info(f"Synthetic corpus written to {root}: {n_texts} texts, {n_images} images, {n_audios} audio clips.")
+    return files
+
+def zip_corpus(root: str, zip_path: str) -> str:
+    """Packs the corpus like a user upload (folders at the archive root)."""
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zip_file:
+        for folder in ("images", "audios", "texts"):
+            zip_file.writestr(f"{folder}/", "")
+            for name in sorted(os.listdir(os.path.join(root, folder))):
+                zip_file.write(os.path.join(root, folder, name), f"{folder}/{name}")
+    return zip_path
+
+def sample_text_queries(n_queries: int, seed: int = 0) -> List[str]:
+    """Short queries drawn from the corpus vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(2000, random.Random(seed))
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 8))) for _ in range(n_queries)]
@@ -0,0 +1,212 @@
+# benchmarks/hnsw_sweep.py
+"""
+Recall-vs-latency sweep over HNSW / quantization parameters of an existing collection.
+
+Query vectors are sampled from the collection itself, ground truth is an exact
+(brute-force) search, by Qdrant or by the built-in numpy engine (--ground-truth numpy),
+and every parameter combination reports recall@k and p50/p95 search latency.
+Index-time parameters (m, ef_construct) are swept by copying the collection into
+temporary collections built with each combination.
+
+    python -m benchmarks.hnsw_sweep --collection text_collection --hnsw-ef 16 32 64 128
+    python -m benchmarks.hnsw_sweep --url http://localhost:6333 --collection image_collection \\
+        --m 8 16 32 --ef-construct 64 128 --oversampling 1 2 4 --output sweep.json
+
+Note: local (path / :memory:) Qdrant always searches exactly, so the sweep is only
+meaningful against a Qdrant server.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from typing import List, Dict, Any, Optional
+from utils.logger import logger
+from config.settings import settings
+from qdrant_client import QdrantClient
+from core.retrieval.qdrant_backend import create_qdrant_client
+from qdrant_client.http.models import (
+    CollectionStatus, HnswConfigDiff, PointStruct, SearchParams, QuantizationSearchParams
+)
+
+def sample_query_vectors(client: QdrantClient, collection_name: str, n_queries: int, seed: int) -> List[List[float]]:
+    """Random sample of stored vectors, used as queries."""
+    vectors = []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name, limit=1024, offset=offset, with_payload=False, with_vectors=True)
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    if not vectors:
+        raise ValueError(f"Collection '{collection_name}' is empty.")
+    random.Random(seed).shuffle(vectors)
+    return vectors[:n_queries]
+
+def search_ids(client: QdrantClient, collection_name: str, queries: List[List[float]], k: int,
+               params: Optional[SearchParams]) -> (List[List[Any]], np.ndarray):
+    """Result IDs of every query and the per-query latencies in ms."""
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        points = client.search(collection_name, query_vector=query, limit=k, search_params=params,
+                               with_payload=False, with_vectors=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([point.id for point in points])
+    return results, np.asarray(latencies)
+
+def numpy_ground_truth(client: QdrantClient, collection_name: str, queries: List[List[float]], k: int) -> (List[List[Any]], np.ndarray):
+    """
+    Exact top-k IDs from the built-in numpy engine, loaded with every vector of the
+    collection: ground truth computed outside of Qdrant. Returns the IDs and per-query latencies in ms.
+    """
+    from core.retrieval.numpy_engine import NumpyVectorEngine
+
+    collection = None
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name, limit=1024, offset=offset, with_payload=False, with_vectors=True)
+        if points:
+            if collection is None:
+                collection = NumpyVectorEngine(":memory:").collection(collection_name, len(points[0].vector))
+            collection.upsert([str(point.id) for point in points], [point.vector for point in points],
+                              [{"id": point.id} for point in points])
+        if offset is None:
+            break
+
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = collection.search([query], k)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([payload["id"] for _, _, payload in hits])
+    return results, np.asarray(latencies)
+
+def recall_at_k(results: List[List[Any]], ground_truth: List[List[Any]], k: int) -> float:
+    hits = [len(set(found[:k]) & set(truth[:k])) / max(1, min(k, len(truth))) for found, truth in zip(results, ground_truth)]
+    return float(np.mean(hits)) if hits else 0.0
+
+def copy_collection(client: QdrantClient, source: str, target: str, m: Optional[int], ef_construct: Optional[int],
+                    batch_size: int = 256, parallel: int = 4):
+    """Copies the vectors of `source` into a new collection with the given HNSW build parameters."""
+    source_config = client.get_collection(source).config
+    if client.collection_exists(target):
+        client.delete_collection(target)
+    client.create_collection(
+        collection_name=target,
+        vectors_config=source_config.params.vectors,
+        quantization_config=source_config.quantization_config,
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct)
+    )
+
+    def scroll_points():
+        offset = None
+        while True:
+            points, offset = client.scroll(source, limit=1024, offset=offset, with_payload=False, with_vectors=True)
+            for point in points:
+                yield PointStruct(id=point.id, vector=point.vector, payload={})
+            if offset is None:
+                return
+
+    client.upload_points(target, points=scroll_points(), batch_size=batch_size, parallel=parallel, wait=True)
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout_seconds: float):
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if client.get_collection(collection_name).status == CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    logger.warning(f"Collection '{collection_name}' still optimizing after {timeout_seconds}s; measuring anyway.")
+
+def sweep_search_params(client: QdrantClient, collection_name: str, queries: List[List[float]],
+                        ground_truth: List[List[Any]], args) -> List[Dict[str, Any]]:
+    rows = []
+    for hnsw_ef, oversampling, rescore in itertools.product(args.hnsw_ef or [None], args.oversampling or [None], args.rescore or [None]):
+        quantization = None
+        if oversampling is not None or rescore is not None:
+            quantization = QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+        params = SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+        results, latencies = search_ids(client, collection_name, queries, args.k, params)
+        rows.append({
+            "hnsw_ef": hnsw_ef,
+            "oversampling": oversampling,
+            "rescore": rescore,
+            f"recall@{args.k}": round(recall_at_k(results, ground_truth, args.k), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        })
+        logger.info(f"{collection_name}: {rows[-1]}")
+    return rows
+
+def run_sweep(args) -> List[Dict[str, Any]]:
+    client = create_qdrant_client(url=args.url or "", path=args.path)
+
+    queries = sample_query_vectors(client, args.collection, args.queries, args.seed)
+    if args.ground_truth == "numpy":
+        ground_truth, exact_latencies = numpy_ground_truth(client, args.collection, queries, args.k)
+    else:
+        ground_truth, exact_latencies = search_ids(client, args.collection, queries, args.k, SearchParams(exact=True))
+    logger.info(f"Exact search baseline over {len(queries)} queries: p50={np.percentile(exact_latencies, 50):.3f} ms, "
+                f"p95={np.percentile(exact_latencies, 95):.3f} ms")
+
+    rows = []
+    build_grid = list(itertools.product(args.m or [None], args.ef_construct or [None]))
+    for m, ef_construct in build_grid:
+        target = args.collection
+        if m is not None or ef_construct is not None:
+            target = f"{args.collection}__sweep_m{m}_efc{ef_construct}"
+            logger.info(f"Building '{target}' (m={m}, ef_construct={ef_construct})...")
+            copy_collection(client, args.collection, target, m, ef_construct, args.upload_batch_size, args.upload_parallel)
+            wait_until_indexed(client, target, args.index_timeout)
+        try:
+            for row in sweep_search_params(client, target, queries, ground_truth, args):
+                rows.append({"m": m, "ef_construct": ef_construct, **row})
+        finally:
+            if target != args.collection and not args.keep:
+                client.delete_collection(target)
+
+    client.close()
+    return rows
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recall@k vs latency sweep over HNSW / quantization parameters.")
+    parser.add_argument("--collection", required=True)
+    parser.add_argument("--path", default=settings.QDRANT_PATH, help="local Qdrant storage path")
+    parser.add_argument("--url", default=settings.QDRANT_URL, help="Qdrant server URL (takes precedence over --path)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ground-truth", choices=["qdrant", "numpy"], default="qdrant",
+                        help="exact search used as ground truth: Qdrant (exact=True) or the built-in numpy engine")
+    parser.add_argument("--queries", type=int, default=200, help="number of sampled query vectors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hnsw-ef", type=int, nargs="*", help="search-time ef values")
+    parser.add_argument("--oversampling", type=float, nargs="*", help="quantization oversampling values")
+    parser.add_argument("--rescore", type=lambda v: v.lower() in ("1", "true", "yes"), nargs="*", help="quantization rescore values")
+    parser.add_argument("--m", type=int, nargs="*", help="index-time m values (copies the collection)")
+    parser.add_argument("--ef-construct", type=int, nargs="*", help="index-time ef_construct values (copies the collection)")
+    parser.add_argument("--upload-batch-size", type=int, default=256, help="points per request when copying collections")
+    parser.add_argument("--upload-parallel", type=int, default=4, help="parallel upload processes when copying collections")
+    parser.add_argument("--index-timeout", type=float, default=600, help="seconds to wait for copied collections to be indexed")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary collections")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    rows = run_sweep(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        logger.info(f"Sweep results written to {args.output}")
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/numpy_engine_stress.py
+"""
+Concurrency check of the built-in numpy vector engine: batched, filtered searches run
+while another thread keeps re-upserting existing points (as an ingestion job does next
+to the search API). Every hit must carry a live payload and no search may raise; the
+script exits with status 1 otherwise.
+
+    python -m benchmarks.numpy_engine_stress
+    python -m benchmarks.numpy_engine_stress --points 200000 --searches 500 --path /tmp/engine
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from typing import Any, Dict
+from utils.logger import logger
+from core.retrieval.numpy_engine import NumpyVectorEngine
+
+def run_stress(args) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    collection = NumpyVectorEngine(args.path).collection("stress", args.dim)
+    ids = [f"point-{i}" for i in range(args.points)]
+    for start in range(0, args.points, 10_000):
+        batch_ids = ids[start:start + 10_000]
+        collection.upsert(batch_ids, rng.standard_normal((len(batch_ids), args.dim), dtype=np.float32),
+                          [{"metadata": {"source_id": f"source-{i % 100}"}} for i in range(start, start + len(batch_ids))])
+
+    stop = threading.Event()
+    upserts = 0
+
+    def upsert_loop():
+        nonlocal upserts
+        writer_rng = np.random.default_rng(args.seed + 1)
+        while not stop.is_set():
+            rows = writer_rng.choice(args.points, args.upsert_batch, replace=False)
+            collection.upsert([ids[row] for row in rows], writer_rng.standard_normal((len(rows), args.dim), dtype=np.float32),
+                              [{"metadata": {"source_id": f"source-{row % 100}"}} for row in rows])
+            upserts += 1
+
+    writer = threading.Thread(target=upsert_loop, name="stress-upserts", daemon=True)
+    writer.start()
+    missing_payloads, errors = 0, 0
+    started = time.perf_counter()
+    try:
+        for _ in range(args.searches):
+            queries = rng.standard_normal((args.batch, args.dim), dtype=np.float32)
+            try:
+                hits = collection.search(queries, args.k, lambda payload: payload["metadata"]["source_id"] != "source-0")
+            except Exception as e:
+                errors += 1
+                logger.error(f"Search failed during concurrent upserts: {e!r}")
+                continue
+            missing_payloads += sum(1 for query_hits in hits for hit in query_hits if hit[-1] is None)
+    finally:
+        stop.set()
+        writer.join()
+        collection.close()
+
+    return {
+        "points": args.points,
+        "searches": args.searches,
+        "concurrent_upsert_batches": upserts,
+        "seconds": round(time.perf_counter() - started, 2),
+        "hits_without_payload": missing_payloads,
+        "failed_searches": errors,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Searches the numpy vector engine while points are being replaced.")
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--searches", type=int, default=200, help="batched searches to run")
+    parser.add_argument("--batch", type=int, default=8, help="queries per search")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--upsert-batch", type=int, default=500, help="existing points re-upserted per write")
+    parser.add_argument("--path", default=":memory:", help="engine storage path (default: in memory)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    report = run_stress(parse_args(argv))
+    print(json.dumps(report, indent=2))
+    if report["hits_without_payload"] or report["failed_searches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# benchmarks/run_benchmark.py
+"""
+End-to-end benchmark: generates a synthetic corpus, ingests it with IngestionService
+and queries it with Retriever, then reports per-stage throughput, query latency
+percentiles and peak RSS as JSON (one file per run, so runs can be compared across commits).
+
+    python -m benchmarks.run_benchmark --stand-in-models --texts 200 --images 200 --audios 20
+    python -m benchmarks.run_benchmark --texts 50 --images 50 --audios 5 --output bench.json
+
+Everything (corpus, vector store, manifest, caches) lives in a temporary work
+directory unless --work-dir is given.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+from benchmarks.corpus import generate_corpus, zip_corpus, sample_text_queries
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=project_root, stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def latency_summary(latencies_ms: List[float], wall_seconds: float) -> Dict[str, Any]:
+    if not latencies_ms:
+        return {"queries": 0}
+    latencies = np.asarray(latencies_ms)
+    return {
+        "queries": len(latencies),
+        "qps": round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "max_ms": round(float(latencies.max()), 3),
+    }
+
+def _rate(count: int, seconds: float) -> Optional[float]:
+    return round(count / seconds, 2) if seconds else None
+
+def use_work_dir(work_dir: str):
+    """Points every data path of the app at `work_dir` (before any service is created)."""
+    settings.DATA_DIR = work_dir
+    settings.RAW_DATA_DIR = os.path.join(work_dir, "raw")
+    settings.PROCESSED_DATA_DIR = os.path.join(work_dir, "processed")
+    settings.CHUNKS_DIR = os.path.join(work_dir, "processed", "chunks")
+    settings.METADATA_DIR = os.path.join(work_dir, "processed", "metadata")
+    settings.EMBEDDINGS_DIR = os.path.join(work_dir, "processed", "embeddings")
+    settings.QDRANT_PATH = os.path.join(work_dir, "qdrant_data")
+    settings.NUMPY_ENGINE_PATH = os.path.join(work_dir, "vector_engine")
+    settings.DOCSTORE_PATH = os.path.join(work_dir, "processed", "docstore.sqlite")
+
+def run_ingestion(ingestion_service, corpus_dir: str, files: Dict[str, List[str]], mode: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if mode == "zip":
+        zip_path = zip_corpus(corpus_dir, os.path.join(os.path.dirname(corpus_dir), "corpus.zip"))
+        stats = ingestion_service.ingest_zip_with_progress(zip_path)
+    else:
+        all_files = files["texts"] + files["images"] + files["audios"]
+        stats = ingestion_service.ingest_files_with_progress(all_files)
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "wall_seconds": round(wall_seconds, 3),
+        "files_parsed": stats["files_parsed"],
+        "files_skipped": stats["files_skipped"],
+        "files_unsupported": stats["files_unsupported"],
+        "files_failed": stats["files_failed"],
+        "chunks": stats["chunks"],
+        "embedded": stats["embedded"],
+        "embed_failed": stats["embed_failed"],
+        "upserted": stats["upserted"],
+        # rates over each stage's busy time (parse time is summed over the parse workers)
+        "chunks_per_second": _rate(stats["chunks"], stats["parse_seconds"]),
+        "embeddings_per_second": _rate(stats["embedded"], stats["embed_seconds"]),
+        "upserts_per_second": _rate(stats["upserted"], stats["upsert_seconds"]),
+        "end_to_end_chunks_per_second": _rate(stats["upserted"], wall_seconds),
+        "stage_seconds": {
+            "parse": round(stats["parse_seconds"], 3),
+            "embed": round(stats["embed_seconds"], 3),
+            "upsert": round(stats["upsert_seconds"], 3),
+        },
+    }
+
+def run_queries(retriever, queries: List[Tuple[str, str]], top_k: int, concurrency: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {query_type: [] for _, query_type in queries}
+    empty_results = 0
+
+    def timed_query(query: Tuple[str, str]) -> Tuple[str, float, int]:
+        started = time.perf_counter()
+        results = retriever.retrieve(query[0], query[1], top_k=top_k)
+        return query[1], (time.perf_counter() - started) * 1000, len(results)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for query_type, latency_ms, n_results in executor.map(timed_query, queries):
+            latencies[query_type].append(latency_ms)
+            empty_results += n_results == 0
+    wall_seconds = time.perf_counter() - started
+
+    summary = {"concurrency": concurrency, "top_k": top_k, "empty_results": empty_results}
+    summary["all"] = latency_summary([latency for values in latencies.values() for latency in values], wall_seconds)
+    for query_type, values in latencies.items():
+        # QPS is only meaningful for the mixed workload as a whole
+        summary[query_type] = latency_summary(values, 0)
+    return summary
+
+def build_queries(files: Dict[str, List[str]], n_queries: int, seed: int) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    queries = [(text, "text") for text in sample_text_queries(n_queries, seed)]
+    if files["images"]:
+        queries += [(rng.choice(files["images"]), "image") for _ in range(n_queries)]
+    if files["audios"]:
+        queries += [(rng.choice(files["audios"]), "audio") for _ in range(n_queries)]
+    rng.shuffle(queries)
+    return queries
+
+def run_benchmark(args) -> Dict[str, Any]:
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="mmqt-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    use_work_dir(work_dir)
+    # benchmark the pipeline itself, not cache hits from a previous run
+    settings.EMBEDDING_CACHE_ENABLED = args.embedding_cache
+    settings.QUERY_CACHE_ENABLED = args.query_cache
+
+    if args.stand_in_models:
+        from benchmarks.stand_in_models import register_stand_in_models
+        register_stand_in_models()
+
+    # imported here so the settings above are in place before the services read them
+    from core.retrieval.qdrant_backend import create_qdrant_client
+    from core.retrieval.numpy_engine import NumpyVectorEngine
+    from ingestions.ingestion import IngestionService
+    from core.retrieval.retriever import Retriever
+
+    report: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "config": {
+            "stand_in_models": args.stand_in_models,
+            "texts": args.texts, "images": args.images, "audios": args.audios,
+            "text_words": args.text_words, "image_size": args.image_size, "audio_seconds": args.audio_seconds,
+            "queries_per_modality": args.queries, "query_concurrency": args.concurrency, "top_k": args.top_k,
+            "ingest_mode": args.mode, "embedding_cache": args.embedding_cache, "query_cache": args.query_cache,
+            "vector_db": args.vector_db, "storage": args.qdrant_url or (":memory:" if args.in_memory else "local"),
+            "seed": args.seed,
+        },
+    }
+
+    try:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        started = time.perf_counter()
+        files = generate_corpus(corpus_dir, args.texts, args.images, args.audios, text_words=args.text_words,
+                                image_size=args.image_size, audio_seconds=args.audio_seconds, seed=args.seed)
+        report["corpus_seconds"] = round(time.perf_counter() - started, 3)
+
+        if args.vector_db == "numpy":
+            client = NumpyVectorEngine(":memory:" if args.in_memory else settings.NUMPY_ENGINE_PATH)
+        else:
+            client = create_qdrant_client(url=args.qdrant_url or "", path=":memory:" if args.in_memory else None)
+        ingestion_service = IngestionService(client=client)
+        retriever = Retriever(client=client)
+
+        # load the models up front so loading time is not charged to the first batch / query
+        from core.embeddings.model_registry import model_registry
+        started = time.perf_counter()
+        for name in ("text", "image", "audio"):
+            model_registry.get(name)
+        report["model_load_seconds"] = round(time.perf_counter() - started, 3)
+
+        report["ingestion"] = run_ingestion(ingestion_service, corpus_dir, files, args.mode)
+        report["peak_rss_mb_after_ingestion"] = peak_rss_mb()
+
+        queries = build_queries(files, args.queries, args.seed)
+        report["queries"] = run_queries(retriever, queries, args.top_k, args.concurrency)
+        if retriever.micro_batchers:
+            report["queries"]["micro_batchers"] = retriever.get_micro_batcher_stats()
+        report["peak_rss_mb"] = peak_rss_mb()
+        client.close()
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end ingestion / retrieval benchmark on a synthetic corpus.")
+    parser.add_argument("--texts", type=int, default=100)
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--audios", type=int, default=10)
+    parser.add_argument("--text-words", type=int, default=2000, help="words per text document")
+    parser.add_argument("--image-size", type=int, default=640, help="image width in pixels (height is 3/4 of it)")
+    parser.add_argument("--audio-seconds", type=float, default=20.0, help="length of each audio clip")
+    parser.add_argument("--queries", type=int, default=50, help="queries per modality")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent query threads")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mode", choices=["zip", "files"], default="zip", help="ingest an uploaded ZIP (like the UI) or files on disk")
+    parser.add_argument("--stand-in-models", action="store_true", help="use tiny random models (offline, CPU-only)")
+    parser.add_argument("--embedding-cache", action="store_true", help="keep the ingestion embedding cache enabled")
+    parser.add_argument("--query-cache", action="store_true", help="keep the query embedding cache enabled")
+    parser.add_argument("--vector-db", choices=["qdrant", "numpy"], default="qdrant", help="vector store backend")
+    parser.add_argument("--in-memory", action="store_true", help="keep the vector store in memory instead of on disk")
+    parser.add_argument("--qdrant-url", default=None, help="benchmark against a Qdrant server instead (e.g. a local qdrant binary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="directory for corpus and storage (kept after the run)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary work directory")
+    parser.add_argument("--output", default=None, help="write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmark(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Benchmark report written to {args.output}")
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
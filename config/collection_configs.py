@@ -0,0 +1,49 @@
+# config/collection_configs.py
+from typing import Any, Dict
+from config.settings import settings
+
+# Defaults for every collection
+DEFAULT_COLLECTION_CONFIG: Dict[str, Any] = {
+    # Quantization: None (full float32 only), "scalar" (int8, 4x smaller) or "binary" (1 bit, 32x smaller)
+    "quantization": None,
+    "quantization_quantile": 0.99,     # scalar only: clip outliers before mapping to int8
+    "quantization_always_ram": True,   # keep the quantized copy in RAM
+    "vectors_on_disk": False,          # keep original float32 vectors on disk (memmap)
+
+    # Storage / HNSW index (None = Qdrant default)
+    "payload_on_disk": False,          # keep payloads on disk, load them only for returned points
+    "hnsw_m": None,                    # edges per node (Qdrant default 16)
+    "hnsw_ef_construct": None,         # build-time candidate list size (Qdrant default 100)
+    "indexing_threshold": None,        # KB of vectors in a segment before an HNSW index is built (default 20000)
+
+    # Search-time quantization parameters (only used when the collection is quantized)
+    "rescore": True,                   # re-rank candidates with the original vectors
+    "oversampling": None,              # fetch oversampling * k candidates before rescoring
+
+    # Search-time HNSW parameters
+    "hnsw_ef": None,                   # search candidate list size (None = Qdrant default, ef_construct)
+    "exact": False,                    # brute-force search, bypassing the index
+
+    # Payload indexes created at collection setup (field -> Qdrant schema type), so filtered
+    # searches (core/retrieval/search_filters.py) and deletes by source don't scan payloads
+    "payload_indexes": {
+        "metadata.source_id": "keyword",
+        "metadata.type": "keyword",
+        "metadata.duration_ms": "integer",
+        "metadata.ingested_at": "integer",
+    },
+}
+
+# Per-collection values, merged over the defaults
+COLLECTION_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "text_collection": {},
+    "image_collection": {},
+    "audio_collection": {},
+}
+
+def get_collection_config(collection_name: str) -> Dict[str, Any]:
+    """Defaults < COLLECTION_CONFIGS < settings.COLLECTION_CONFIG_OVERRIDES."""
+    config = dict(DEFAULT_COLLECTION_CONFIG)
+    config.update(COLLECTION_CONFIGS.get(collection_name, {}))
+    config.update(settings.COLLECTION_CONFIG_OVERRIDES.get(collection_name, {}))
+    return config
@@ -5,6 +5,20 @@ TEXT_EMBEDDING_MODEL: str = "sentence-transformers/multi-qa-mpnet-base-dot-v1"
 IMAGE_EMBEDDING_MODEL: str = "google/vit-base-patch16-224-in21k"
 AUDIO_EMBEDDING_MODEL: str = "laion/clap-htsat-unfused"
 
+# Embedding dimensions (known upfront so collections can be set up without loading the models)
+TEXT_EMBEDDING_DIM: int = 768   # mpnet sentence embedding
+IMAGE_EMBEDDING_DIM: int = 768  # ViT-base hidden_size ([CLS] token)
+AUDIO_EMBEDDING_DIM: int = 512  # CLAP projection_dim
+
+# Input resolution of the ViT image processor; images are decoded straight to it
+IMAGE_INPUT_SIZE: int = 224
+
+# Sampling rate expected by the CLAP feature extractor; audio is decoded straight to it
+AUDIO_SAMPLE_RATE: int = 48000
+
+# Bump when chunking/preprocessing changes in a way that invalidates stored embeddings
+EMBEDDING_PIPELINE_VERSION: int = 3
+
 # Generator Model (LLM/LMM)
 GENERATOR_MODEL_NAME: str = "gpt-4o"
 GENERATOR_MODEL_MAX_TOKENS: int = 4096
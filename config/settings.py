@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,11 +21,157 @@ class Settings(BaseSettings):
     
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
+    # HTTP API (api/server.py) serving the Gradio UI at UI_PATH; False runs the UI alone
+    API_ENABLED: bool = True
+    UI_PATH: str = "/ui"
+    API_UPLOAD_DIR: str = os.path.join(DATA_DIR, "uploads")
+    API_MAX_BATCH_QUERIES: int = 1024
+    # Background ingestion jobs: runs are serialized, at most INGEST_JOB_MAX_PENDING queued or running
+    INGEST_JOB_WORKERS: int = 1
+    INGEST_JOB_MAX_PENDING: int = 8
+    INGEST_JOB_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    INGEST_JOB_HISTORY: int = 100
 
     HUGGINGFACE_API_KEY: Optional[str] = None
 
+    # Vector store: "qdrant" (configured below) or "numpy", the built-in exact engine
+    # (core/retrieval/numpy_engine.py) for small and medium collections: normalized vectors
+    # memory-mapped under NUMPY_ENGINE_PATH (":memory:" keeps them in RAM only)
+    VECTOR_DB_BACKEND: str = "qdrant"
+    NUMPY_ENGINE_PATH: str = os.path.join(DATA_DIR, "vector_engine")
+    NUMPY_ENGINE_DTYPE: str = "float32" # float32 or float16
+    NUMPY_ENGINE_SEARCH_BLOCK_ROWS: int = 65536
+    # deleted / replaced rows are dropped once they reach this fraction of the rows (and this many)
+    NUMPY_ENGINE_COMPACT_RATIO: float = 0.25
+    NUMPY_ENGINE_COMPACT_MIN_ROWS: int = 1024
+
+    # Qdrant backend (core/retrieval/qdrant_backend.py): a server / cluster when QDRANT_URL is
+    # set (e.g. http://localhost:6333), otherwise embedded local mode at QDRANT_PATH, or
+    # in memory when QDRANT_PATH is ":memory:"
+    QDRANT_URL: Optional[str] = None
+    QDRANT_API_KEY: Optional[str] = None
+    QDRANT_PREFER_GRPC: bool = True
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT_SECONDS: Optional[int] = None
+    QDRANT_PATH: str = os.path.join(DATA_DIR, "qdrant_data")
+    # Server upserts return once the batch is in Qdrant's WAL (wait=False; applied a moment
+    # later) with at most QDRANT_MAX_INFLIGHT_UPSERTS requests outstanding per collection
+    QDRANT_UPSERT_WAIT: bool = False
+    QDRANT_MAX_INFLIGHT_UPSERTS: int = 4
+
+    # Document store (core/retrieval/docstore.py): chunk contents and full metadata are kept in
+    # SQLite, keyed by point ID; vector payloads only keep these metadata fields, and search
+    # results are hydrated from the store in one bulk read. None: on, except with QDRANT_URL
+    # (the file is local to this process, so contents stay in the shared payloads)
+    DOCSTORE_ENABLED: Optional[bool] = None
+    DOCSTORE_PATH: str = os.path.join(PROCESSED_DATA_DIR, "docstore.sqlite")
+    DOCSTORE_PAYLOAD_FIELDS: List[str] = [
+        "source_id", "type", "chunk_id", "chunk_index", "content_hash", "start_ms", "end_ms", "duration_ms", "ingested_at"
+    ]
+
+    # Startup: models loaded (and run once) in the background after launch; requests that
+    # need a component still warming up wait this long, then get a "warming up" reply
+    WARMUP_MODELS: List[str] = ["text", "image", "audio"]
+    WARMUP_REQUEST_WAIT_SECONDS: float = 5.0
+
+    # Model registry: None disables the limit / idle unloading
+    MODEL_MEMORY_BUDGET_MB: Optional[int] = None
+    MODEL_IDLE_UNLOAD_SECONDS: Optional[int] = None
+
+    # Ingestion batching: max items per forward pass, plus a per-batch budget
+    TEXT_EMBED_BATCH_SIZE: int = 32
+    IMAGE_EMBED_BATCH_SIZE: int = 16
+    AUDIO_EMBED_BATCH_SIZE: int = 8
+    TEXT_EMBED_BATCH_MAX_TOKENS: int = 8192 # estimated as characters / 4
+    IMAGE_EMBED_BATCH_MAX_PIXELS: int = 100_000_000
+    AUDIO_EMBED_BATCH_MAX_SECONDS: float = 120.0
+    UPSERT_BATCH_SIZE: int = 32
+
+    # Text chunking, in characters, or in tokens of the text model's tokenizer when
+    # TEXT_CHUNK_BY_TOKENS is on (mpnet truncates its input at 512 tokens)
+    TEXT_CHUNK_SIZE: int = 500
+    TEXT_CHUNK_OVERLAP: int = 50
+    TEXT_CHUNK_BY_TOKENS: bool = False
+    TEXT_CHUNK_SIZE_TOKENS: int = 384
+    TEXT_CHUNK_OVERLAP_TOKENS: int = 32
+    # Documents above TEXT_STREAM_MIN_BYTES are hashed and split in a streaming pass,
+    # TEXT_STREAM_WINDOW_CHARS characters at a time, instead of being read into memory
+    TEXT_STREAM_MIN_BYTES: int = 4 * 1024 * 1024
+    TEXT_STREAM_WINDOW_CHARS: int = 1_000_000
+
+    # Audio segments are embedded from memory; WAV chunk files are only written on demand unless enabled
+    AUDIO_WRITE_CHUNK_FILES: bool = False
+    # Silence segmentation: 0 dB hysteresis matches pydub's split_on_silence; None disables the length cap
+    AUDIO_SILENCE_HYSTERESIS_DB: float = 0.0
+    AUDIO_MAX_SEGMENT_MS: Optional[int] = 30000
+
+    # Image decoding: JPEGs are downscaled while decoding (PIL draft mode) close to the model
+    # input size; images are decoded by the parse workers, ahead of the embedding stage,
+    # and by a pool of IMAGE_DECODE_WORKERS threads for paths given to the model directly
+    IMAGE_FAST_DECODE: bool = True
+    IMAGE_DECODE_IN_PARSE: bool = True
+    IMAGE_DECODE_WORKERS: int = 4
+
+    # Inference backend of the embedding models: "torch" or "onnx" (needs onnx + onnxruntime).
+    # ONNX graphs are exported once, optionally int8-quantized, and checked against PyTorch
+    # (max cosine distance ONNX_TOLERANCE) before being used.
+    EMBEDDING_BACKEND: str = "torch"
+    ONNX_QUANTIZE_INT8: bool = False
+    ONNX_CACHE_DIR: str = os.path.join(DATA_DIR, "processed", "onnx")
+    ONNX_OPSET_VERSION: int = 17
+    ONNX_INTRA_OP_THREADS: Optional[int] = None
+    ONNX_INTER_OP_THREADS: Optional[int] = None
+    ONNX_VALIDATE: bool = True
+    ONNX_TOLERANCE: float = 0.02
+    # free the PyTorch weights once the ONNX session is validated
+    ONNX_RELEASE_TORCH_MODEL: bool = True
+
+    # Persistent embedding cache (stored under EMBEDDINGS_DIR)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DTYPE: str = "float16" # float16 or float32
+    EMBEDDING_CACHE_SHARD_ROWS: int = 65536
+
+    # Streaming ingestion pipeline
+    INGEST_PARSE_WORKERS: int = 4
+    INGEST_CHUNK_QUEUE_SIZE: int = 256
+    INGEST_UPSERT_QUEUE_SIZE: int = 4
+
+    # Background refresh of the in-memory collection stats (None disables it)
+    COLLECTION_STATS_REFRESH_SECONDS: Optional[float] = 60
+
+    # Batch retrieval: queries per forward pass / requests per Qdrant search_batch call
+    QUERY_EMBED_BATCH_SIZE: int = 64
+    SEARCH_BATCH_SIZE: int = 256
+
+    # Micro-batching of concurrent online queries (Retriever): requests arriving within
+    # the window are embedded in one forward pass
+    QUERY_MICRO_BATCH_ENABLED: bool = True
+    QUERY_MICRO_BATCH_WINDOW_MS: float = 5
+    QUERY_MICRO_BATCH_MAX_SIZE: int = 32
+    # Concurrent search requests served by the UI
+    SEARCH_CONCURRENCY_LIMIT: int = 8
+
+    # Per-collection Qdrant overrides on top of config/collection_configs.py, e.g.
+    # COLLECTION_CONFIG_OVERRIDES='{"image_collection": {"quantization": "scalar"}}'
+    COLLECTION_CONFIG_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+
+    # Query embedding cache (Retriever)
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_MAX_MB: float = 64
+    QUERY_CACHE_TTL_SECONDS: Optional[float] = 3600
+
     LOG_DIR: str = "logs"
     LOG_LEVEL: str = "INFO" # DEBUG, INFO, WARNING, ERROR, CRITICAL
+
+    # Metrics (utils/metrics.py): Prometheus text file rewritten periodically, None to disable
+    METRICS_ENABLED: bool = True
+    METRICS_FILE: Optional[str] = os.path.join(PROCESSED_DATA_DIR, "metrics.prom")
+    METRICS_FILE_INTERVAL_SECONDS: Optional[float] = 15
+
+    # Opt-in profiling of slow requests: fraction of requests run under cProfile, dumps kept if slower than the threshold
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SLOW_REQUEST_SECONDS: float = 1.0
+    PROFILE_DIR: str = os.path.join(LOG_DIR, "profiles")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,54 +1,128 @@
 # core/data_processing/audio_processor.py
 import os
 
-from typing import List, Dict, Any
+import numpy as np
+
+from typing import List, Dict, Any, Optional, Tuple
 from utils.logger import logger
+from utils.metrics import timed
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from core.data_processing.silence import split_on_silence_ranges
 from config.settings import settings
+from config.model_configs import AUDIO_SAMPLE_RATE
+from utils.hashing import file_content_hash
+from core.retrieval.vector_db_backend import make_point_id
+
+def decode_audio(file_path: str, target_sr: int) -> Tuple[AudioSegment, np.ndarray]:
+    """
+    Decodes a file once, straight to mono at `target_sr`.
+    Returns the pydub segment and its samples as float32 in [-1, 1].
+    """
+    with timed("audio_decode_seconds", "Decoding (and resampling) an audio file"):
+        audio = AudioSegment.from_file(file_path)
+        if audio.channels != 1:
+            audio = audio.set_channels(1)
+        if audio.frame_rate != target_sr:
+            audio = audio.set_frame_rate(target_sr)
+
+        max_amplitude = float(1 << (8 * audio.sample_width - 1))
+        samples = np.asarray(audio.get_array_of_samples(), dtype=np.float32) / max_amplitude
+    return audio, samples
+
+def materialize_audio_chunk(metadata: Dict[str, Any]) -> Optional[str]:
+    """
+    Writes the WAV file of an audio chunk on demand (e.g. for playback) and returns its path.
+    Chunk files are not written during ingestion unless AUDIO_WRITE_CHUNK_FILES is set.
+    """
+    chunk_file_path = metadata.get("chunk_data_path")
+    if chunk_file_path and os.path.exists(chunk_file_path):
+        return chunk_file_path
+
+    source_path = metadata.get("source_path")
+    if not chunk_file_path or not source_path or not os.path.exists(source_path):
+        logger.warning(f"Cannot materialize audio chunk {metadata.get('chunk_id')}: source file not available.")
+        return None
+
+    try:
+        os.makedirs(os.path.dirname(chunk_file_path), exist_ok=True)
+        audio = AudioSegment.from_file(source_path)
+        audio[metadata["start_ms"]:metadata["end_ms"]].export(chunk_file_path, format="wav")
+        return chunk_file_path
+    except Exception as e:
+        logger.error(f"Error materializing audio chunk {metadata.get('chunk_id')}: {e}")
+        return None
 
 class AudioProcessor:
-    def __init__(self, min_silence_len: int = 1000, silence_thresh_db: int = -40, target_sr: int = 16000):
+    def __init__(self, min_silence_len: int = 1000, silence_thresh_db: int = -40, target_sr: int = AUDIO_SAMPLE_RATE,
+                 keep_silence: int = 500, hysteresis_db: Optional[float] = None, max_segment_ms: Optional[int] = None,
+                 write_chunk_files: Optional[bool] = None):
         self.min_silence_len = min_silence_len
         self.silence_thresh_db = silence_thresh_db
+        # decode directly to the embedding model's sampling rate, so segments never get resampled again
         self.target_sr = target_sr
-        logger.info(f"AudioProcessor initialized (min_silence_len={min_silence_len}ms, silence_thresh_db={silence_thresh_db}dB).")
-
-    def process(self, file_path: str) -> List[Dict[str, Any]]:
-        try:
-            logger.info(f"Processing audio file: {file_path}")
-            audio = AudioSegment.from_file(file_path)
-
-            if audio.frame_rate != self.target_sr:
-                audio = audio.set_frame_rate(self.target_sr)
+        self.keep_silence = keep_silence
+        self.hysteresis_db = settings.AUDIO_SILENCE_HYSTERESIS_DB if hysteresis_db is None else hysteresis_db
+        # long segments are split so CLAP inputs stay bounded
+        self.max_segment_ms = settings.AUDIO_MAX_SEGMENT_MS if max_segment_ms is None else max_segment_ms
+        self.write_chunk_files = settings.AUDIO_WRITE_CHUNK_FILES if write_chunk_files is None else write_chunk_files
+        logger.info(f"AudioProcessor initialized (min_silence_len={min_silence_len}ms, silence_thresh_db={silence_thresh_db}dB, target_sr={target_sr}).")
 
-            audio_segments = split_on_silence(
-                audio,
+    def _segment_ranges(self, samples: np.ndarray) -> List[List[int]]:
+        """Non-silent [start_ms, end_ms] ranges, padded like pydub's split_on_silence(keep_silence=...)."""
+        with timed("ingest_chunking_seconds", "Splitting a decoded source into chunks", modality="audio"):
+            return split_on_silence_ranges(
+                samples,
+                self.target_sr,
                 min_silence_len=self.min_silence_len,
-                silence_thresh=self.silence_thresh_db,
-                keep_silence=500
+                silence_thresh_db=self.silence_thresh_db,
+                keep_silence=self.keep_silence,
+                hysteresis_db=self.hysteresis_db,
+                max_segment_ms=self.max_segment_ms
             )
 
+    def process(self, file_path: str, source_id: Optional[str] = None, content_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Returns one chunk per non-silent segment. `content` is the path of the segment's
+        WAV file (written lazily, see materialize_audio_chunk) and `data` is a zero-copy
+        float32 view of the decoded samples at `target_sr`, ready for the embedding model.
+        Segment files are named after the source, its content hash and the segment index,
+        so a file already on disk always holds this version's audio.
+        """
+        try:
+            logger.info(f"Processing audio file: {file_path}")
+            source_id = source_id or os.path.basename(file_path)
+            content_hash = content_hash or file_content_hash(file_path)
+            audio, samples = decode_audio(file_path, self.target_sr)
+
             chunks = []
             audio_chunks_dir = os.path.join(settings.CHUNKS_DIR, "audio")
             os.makedirs(audio_chunks_dir, exist_ok=True)
 
-            for i, segment in enumerate(audio_segments):
+            for i, (start_ms, end_ms) in enumerate(self._segment_ranges(samples)):
                 segment_id = f"{os.path.basename(file_path).split('.')[0]}_chunk_audio_{i}"
-                chunk_file_path = os.path.join(audio_chunks_dir, f"{segment_id}.wav")
-                
-                # Save segments into data/processed/chunks
-                segment.export(chunk_file_path, format="wav")
+                chunk_file_path = os.path.join(audio_chunks_dir, f"{make_point_id(source_id, content_hash, i)}.wav")
+
+                start_sample = start_ms * self.target_sr // 1000
+                end_sample = end_ms * self.target_sr // 1000
 
                 metadata = {
-                    "source_id": os.path.basename(file_path),
+                    "source_id": source_id,
                     "type": "audio",
                     "chunk_id": segment_id,
                     "chunk_data_path": chunk_file_path,
-                    "duration_ms": len(segment)
+                    "source_path": os.path.abspath(file_path),
+                    "start_ms": start_ms,
+                    "end_ms": end_ms,
+                    "sample_rate": self.target_sr,
+                    "duration_ms": end_ms - start_ms
                 }
+                if self.write_chunk_files:
+                    # Save segments into data/processed/chunks
+                    audio[start_ms:end_ms].export(chunk_file_path, format="wav")
+
                 chunks.append({
                     "content": chunk_file_path,
+                    "data": samples[start_sample:end_sample],
                     "metadata": metadata
                 })
             logger.info(f"Generated {len(chunks)} audio segments from {file_path}")
@@ -58,4 +132,4 @@ class AudioProcessor:
             return []
         except Exception as e:
             logger.error(f"Error processing audio file {file_path}: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,143 @@
+# core/data_processing/silence.py
+import numpy as np
+
+from typing import List, Optional
+
+def _frame_energies(samples: np.ndarray, sample_rate: int, n_frames: int) -> np.ndarray:
+    """Sum of squared samples of every 1 ms frame (float64)."""
+    n_samples = len(samples)
+    if sample_rate % 1000 == 0:
+        samples_per_frame = sample_rate // 1000
+        full_frames = min(n_frames, n_samples // samples_per_frame)
+        # (frames, samples_per_frame) strided view of the signal, no copy
+        frames = samples[:full_frames * samples_per_frame].reshape(full_frames, samples_per_frame)
+        energies = np.zeros(n_frames, dtype=np.float64)
+        energies[:full_frames] = np.einsum("ij,ij->i", frames, frames, dtype=np.float64)
+        if full_frames < n_frames:
+            tail = samples[full_frames * samples_per_frame:].astype(np.float64)
+            energies[full_frames] = np.dot(tail, tail)
+        return energies
+
+    bounds = np.minimum(np.arange(n_frames, dtype=np.int64) * sample_rate // 1000, n_samples)
+    squares = np.square(samples, dtype=np.float64)
+    energies = np.add.reduceat(squares, bounds) if n_samples else np.zeros(n_frames)
+    # reduceat returns the element itself for empty frames, which only happen at the very end
+    energies[bounds >= n_samples] = 0.0
+    return energies
+
+def window_rms(samples: np.ndarray, sample_rate: int, window_ms: int) -> np.ndarray:
+    """
+    RMS of every `window_ms` window starting at each millisecond, computed from a
+    cumulative sum of 1 ms frame energies (one pass over the signal).
+    `samples` are floats in [-1, 1]; entry i covers [i, i + window_ms) ms.
+    """
+    length_ms = int(round(len(samples) * 1000 / sample_rate))
+    if length_ms < window_ms:
+        return np.zeros(0)
+
+    energies = _frame_energies(samples, sample_rate, length_ms)
+    cumulative = np.concatenate(([0.0], np.cumsum(energies)))
+    bounds = np.minimum(np.arange(length_ms + 1, dtype=np.int64) * sample_rate // 1000, len(samples))
+
+    starts = np.arange(length_ms - window_ms + 1)
+    window_energy = cumulative[starts + window_ms] - cumulative[starts]
+    window_samples = bounds[starts + window_ms] - bounds[starts]
+    return np.sqrt(np.maximum(window_energy, 0.0) / np.maximum(window_samples, 1))
+
+def detect_nonsilent_ranges(
+    samples: np.ndarray,
+    sample_rate: int,
+    min_silence_len: int = 1000,
+    silence_thresh_db: float = -16,
+    seek_step: int = 1,
+    hysteresis_db: float = 0.0,
+) -> List[List[int]]:
+    """
+    Vectorized equivalent of pydub.silence.detect_nonsilent on a float sample array.
+    Returns non-silent [start_ms, end_ms] ranges.
+
+    A window of `min_silence_len` ms is silent when its RMS is at or below
+    `silence_thresh_db` dBFS. With `hysteresis_db` > 0, a silent run only ends once a
+    window rises above `silence_thresh_db + hysteresis_db`, so noise hovering around
+    the threshold does not chop a pause into pieces. hysteresis_db=0 matches pydub.
+    """
+    length_ms = int(round(len(samples) * 1000 / sample_rate))
+    rms = window_rms(samples, sample_rate, min_silence_len)
+    if len(rms) == 0:
+        return [[0, length_ms]]
+
+    window_starts = np.arange(0, len(rms), seek_step)
+    if (len(rms) - 1) % seek_step:
+        # make sure the last portion of the audio is searched, like pydub does
+        window_starts = np.append(window_starts, len(rms) - 1)
+    rms = rms[window_starts]
+
+    low = 10 ** (silence_thresh_db / 20)
+    if hysteresis_db > 0:
+        high = 10 ** ((silence_thresh_db + hysteresis_db) / 20)
+        # 1 = enter silence, 0 = leave silence, -1 = keep the previous state
+        events = np.where(rms <= low, 1, np.where(rms > high, 0, -1))
+        last_event = np.maximum.accumulate(np.where(events >= 0, np.arange(len(events)), 0))
+        silent = events[last_event] == 1
+    else:
+        silent = rms <= low
+
+    silence_starts = window_starts[silent]
+    if len(silence_starts) == 0:
+        return [[0, length_ms]]
+
+    # merge silent windows that overlap or touch into silent ranges
+    breaks = np.flatnonzero(np.diff(silence_starts) > min_silence_len)
+    range_starts = silence_starts[np.concatenate(([0], breaks + 1))]
+    range_ends = silence_starts[np.concatenate((breaks, [len(silence_starts) - 1]))] + min_silence_len
+
+    if range_starts[0] == 0 and range_ends[0] == length_ms:
+        return []
+
+    # the non-silent ranges are the gaps between silent ones
+    nonsilent_starts = np.concatenate(([0], range_ends))
+    nonsilent_ends = np.concatenate((range_starts, [length_ms]))
+    ranges = [[int(start), int(end)] for start, end in zip(nonsilent_starts, nonsilent_ends)]
+    if range_ends[-1] == length_ms:
+        ranges.pop()
+    if ranges and ranges[0] == [0, 0]:
+        ranges.pop(0)
+    return ranges
+
+def pad_ranges(ranges: List[List[int]], length_ms: int, keep_silence: int) -> List[List[int]]:
+    """
+    Pads ranges with `keep_silence` ms on both sides, like pydub.silence.split_on_silence:
+    when the padding of two neighbours overlaps, the silence is split evenly between them.
+    """
+    padded = [[start - keep_silence, end + keep_silence] for start, end in ranges]
+    for previous, current in zip(padded, padded[1:]):
+        if current[0] < previous[1]:
+            previous[1] = (previous[1] + current[0]) // 2
+            current[0] = previous[1]
+    return [[max(start, 0), min(end, length_ms)] for start, end in padded]
+
+def limit_segment_length(ranges: List[List[int]], max_segment_ms: Optional[int]) -> List[List[int]]:
+    """Splits ranges longer than `max_segment_ms` into equal parts no longer than it."""
+    if not max_segment_ms:
+        return ranges
+    limited = []
+    for start, end in ranges:
+        n_parts = max(1, -(-(end - start) // max_segment_ms))
+        edges = np.linspace(start, end, n_parts + 1).round().astype(int)
+        limited.extend([[int(a), int(b)] for a, b in zip(edges[:-1], edges[1:])])
+    return limited
+
+def split_on_silence_ranges(
+    samples: np.ndarray,
+    sample_rate: int,
+    min_silence_len: int = 1000,
+    silence_thresh_db: float = -16,
+    keep_silence: int = 100,
+    seek_step: int = 1,
+    hysteresis_db: float = 0.0,
+    max_segment_ms: Optional[int] = None,
+) -> List[List[int]]:
+    """[start_ms, end_ms] ranges of the segments pydub's split_on_silence would return."""
+    length_ms = int(round(len(samples) * 1000 / sample_rate))
+    ranges = detect_nonsilent_ranges(samples, sample_rate, min_silence_len, silence_thresh_db, seek_step, hysteresis_db)
+    return limit_segment_length(pad_ranges(ranges, length_ms, keep_silence), max_segment_ms)
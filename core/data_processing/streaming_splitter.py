@@ -0,0 +1,72 @@
+# core/data_processing/streaming_splitter.py
+from typing import Iterator, List, Optional, TextIO, Tuple
+from langchain_text_splitters import TextSplitter
+from utils.metrics import timed
+
+class StreamingTextSplitter:
+    """
+    Runs a LangChain splitter over a text stream window by window, so a document never
+    has to be loaded completely.
+
+    Each window is appended to the unfinished tail of the previous one and split; all
+    chunks except the last `holdback` are emitted (they end before the window boundary
+    and cannot change when more text arrives), and the next split restarts at the first
+    held-back chunk. Chunk sizes and overlaps are therefore the splitter's own, and
+    memory stays around `window_chars` plus a few chunks. Chunk boundaries next to a
+    window boundary can differ slightly from splitting the whole text at once.
+
+    `max_overlap_chars` bounds the overlap between consecutive chunks in characters (the
+    splitter's chunk_overlap when it counts characters), which keeps start offsets right
+    in repetitive text; leave it None when the splitter counts tokens.
+    """
+    def __init__(self, splitter: TextSplitter, window_chars: int = 1_000_000, holdback: int = 2,
+                 max_overlap_chars: Optional[int] = None):
+        self.splitter = splitter
+        self.window_chars = window_chars
+        self.holdback = max(1, holdback)
+        self.max_overlap_chars = max_overlap_chars
+
+    def split_text(self, text: str) -> List[Tuple[str, int]]:
+        """Splits `text` into (chunk, start offset) pairs."""
+        with timed("ingest_chunking_seconds", "Splitting a decoded source into chunks", modality="text"):
+            chunks = self.splitter.split_text(text)
+
+        results = []
+        search_from = 0
+        for chunk in chunks:
+            # chunks advance through the text, so the next one starts after the previous start
+            # (LangChain's own start_index assumes the overlap is counted in characters)
+            start = text.find(chunk, search_from)
+            if start < 0:
+                start = text.find(chunk)
+            results.append((chunk, start))
+            search_from = start + 1
+            if self.max_overlap_chars is not None:
+                search_from = max(search_from, start + len(chunk) - self.max_overlap_chars)
+        return results
+
+    def iter_chunks(self, stream: TextIO) -> Iterator[Tuple[str, int]]:
+        """Yields (chunk, start offset in the document) pairs while reading `stream`."""
+        buffer = ""
+        buffer_start = 0 # document offset of buffer[0]
+        while True:
+            window = stream.read(self.window_chars)
+            at_end = not window
+            buffer += window
+            if not at_end and len(buffer) < self.window_chars:
+                continue
+
+            pieces = self.split_text(buffer) if buffer else []
+            if at_end:
+                for chunk, start in pieces:
+                    yield chunk, buffer_start + start
+                return
+            if len(pieces) <= self.holdback:
+                # a window too small for the chunk size, read more first
+                continue
+
+            for chunk, start in pieces[:-self.holdback]:
+                yield chunk, buffer_start + start
+            keep_from = pieces[-self.holdback][1]
+            buffer = buffer[keep_from:]
+            buffer_start += keep_from
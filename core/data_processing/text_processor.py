@@ -1,44 +1,96 @@
+import io
 import os
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Iterator, Union, BinaryIO, TextIO
 from utils.logger import logger
+from config.settings import settings
+from config.model_configs import TEXT_EMBEDDING_MODEL
+from core.data_processing.streaming_splitter import StreamingTextSplitter
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+def _token_length_function():
+    """Token count of the text embedding model's tokenizer (without special tokens), or None."""
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(TEXT_EMBEDDING_MODEL)
+    except Exception as e:
+        logger.warning(f"Could not load the tokenizer of '{TEXT_EMBEDDING_MODEL}', chunking by characters instead: {e}")
+        return None
+
+    def token_length(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+    return token_length
+
 class TextProcessor:
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+    def __init__(self, chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None, by_tokens: Optional[bool] = None):
+        # chunk sizes are in tokens of the embedding model's tokenizer when chunking by tokens, so
+        # chunks fit in its max sequence length instead of being silently truncated
+        if by_tokens is None:
+            by_tokens = settings.TEXT_CHUNK_BY_TOKENS
+        length_function = _token_length_function() if by_tokens else None
+        self.by_tokens = length_function is not None
+        if self.by_tokens:
+            self.chunk_size = chunk_size or settings.TEXT_CHUNK_SIZE_TOKENS
+            self.chunk_overlap = settings.TEXT_CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+        else:
+            self.chunk_size = chunk_size or settings.TEXT_CHUNK_SIZE
+            self.chunk_overlap = settings.TEXT_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
-            length_function=len, # count character, can be replaced 
-            add_start_index=True # 
+            length_function=length_function or len, # count character, or tokens
+            add_start_index=True #
+        )
+        self.streaming_splitter = StreamingTextSplitter(
+            self.text_splitter,
+            window_chars=settings.TEXT_STREAM_WINDOW_CHARS,
+            max_overlap_chars=None if self.by_tokens else self.chunk_overlap
         )
-        
-        logger.info(f"TextProcessor initialized with LangChain's RecursiveCharacterTextSplitter (chunk_size={chunk_size}, chunk_overlap={chunk_overlap})")
-        
-    def process(self, file_path: str) -> List[Dict[str, Any]]:
+
+        unit = "tokens" if self.by_tokens else "characters"
+        logger.info(f"TextProcessor initialized with LangChain's RecursiveCharacterTextSplitter (chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap} {unit})")
+
+    @staticmethod
+    def _chunk(chunk_content: str, start_index: int, i: int, name: str, source_id: Optional[str]) -> Dict[str, Any]:
+        chunk_id = f"{os.path.basename(name).split('.')[0]}_chunk_text_{i}"
+        metadata = {
+            "source_id": source_id or os.path.basename(name),
+            "type": "text",
+            "chunk_id": chunk_id,
+            "start_index": start_index,
+            "content_length": len(chunk_content)
+        }
+        return {
+            "content": chunk_content,
+            "metadata": metadata
+        }
+
+    def process(self, file_path: str, source_id: Optional[str] = None) -> List[Dict[str, Any]]:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            logger.info(f"Processing text document: {file_path}")
-            split_texts = self.text_splitter.split_text(text)
-            
-            chunks = []
-            for i, chunk_content in enumerate(split_texts):
-                chunk_id = f"{os.path.basename(file_path).split('.')[0]}_chunk_text_{i}"
-                metadata = {
-                    "source_id": os.path.basename(file_path),
-                    "type": "text",
-                    "chunk_id": chunk_id,
-                    "content_length": len(chunk_content)
-                }
-                chunks.append({
-                    "content": chunk_content,
-                    "metadata": metadata
-                })
-            logger.info(f"Generated {len(chunks)} text chunks from {file_path}")
-            return chunks
+            return list(self.iter_file_chunks(lambda: open(file_path, "rb"), file_path, source_id))
         except Exception as e:
             logger.error(f"Error processing text document {file_path}: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def iter_file_chunks(self, open_stream: Callable[[], BinaryIO], name: str, source_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Like `iter_chunks`, but the stream is only opened once iteration starts, and always closed."""
+        with open_stream() as stream:
+            yield from self.iter_chunks(stream, name, source_id)
+
+    def iter_chunks(self, stream: Union[BinaryIO, TextIO], name: str, source_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the chunks of a UTF-8 document while reading it window by window (see
+        StreamingTextSplitter), so very large files are never held in memory. Takes
+        ownership of `stream` and closes it. Decoding errors are raised to the caller.
+        """
+        # newline="" keeps \r\n, so start_index matches the raw decoded text
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="") if not isinstance(stream, io.TextIOBase) else stream
+        logger.info(f"Processing text document: {name}")
+        n_chunks = 0
+        try:
+            for chunk_content, start_index in self.streaming_splitter.iter_chunks(text_stream):
+                yield self._chunk(chunk_content, start_index, n_chunks, name, source_id)
+                n_chunks += 1
+        finally:
+            text_stream.close()
+        logger.info(f"Generated {n_chunks} text chunks from {name}")
@@ -1,11 +1,19 @@
 # models/embeddings/audio_embedding_model.py
 import torch
 import librosa
+import numpy as np
 
-from typing import List
+from typing import Any, Dict, List, Union
 from transformers import AutoProcessor, AutoModel
 from utils.logger import logger
+from utils.metrics import metrics, timed
+from config.settings import settings
 from config.model_configs import AUDIO_EMBEDDING_MODEL
+from core.embeddings.onnx_backend import build_onnx_backend
+
+def _audio_embeddings(model: Any, inputs: Dict[str, Any]):
+    audio_features = model.get_audio_features(**inputs)
+    return audio_features / audio_features.norm(p=2, dim=-1, keepdim=True)
 
 class AudioEmbeddingModel:
     def __init__(self):
@@ -14,33 +22,75 @@ class AudioEmbeddingModel:
         
         self.processor = AutoProcessor.from_pretrained(AUDIO_EMBEDDING_MODEL)
         self.model = AutoModel.from_pretrained(AUDIO_EMBEDDING_MODEL).to(self.device)
+        self.model.eval()
+        
+        sample_rate = self.processor.feature_extractor.sampling_rate
+        rng = np.random.default_rng(0)
+        self.onnx_backend = build_onnx_backend(
+            "audio", AUDIO_EMBEDDING_MODEL, self.device, self.model,
+            example_inputs=self._preprocess([np.zeros(sample_rate, dtype=np.float32)]),
+            forward_fn=_audio_embeddings,
+            dynamic_axes={"input_features": {0: "batch"}, "is_longer": {0: "batch"}},
+            reference_fn=self._torch_forward,
+            validation_inputs=self._preprocess([
+                (0.1 * rng.standard_normal(int(sample_rate * seconds))).astype(np.float32) for seconds in (0.5, 3.0, 7.0)
+            ])
+        )
+        if self.onnx_backend is not None and settings.ONNX_RELEASE_TORCH_MODEL:
+            self.model = None
+            self.model_bytes = self.onnx_backend.size_bytes
         logger.info("Audio Embedding Model loaded successfully.")
+    
+    def _preprocess(self, audio_inputs: List[np.ndarray]) -> Dict[str, Any]:
+        sample_rate = self.processor.feature_extractor.sampling_rate
+        return dict(self.processor(audios=audio_inputs, sampling_rate=sample_rate, return_tensors="pt", padding=True))
+    
+    def _torch_forward(self, inputs: Dict[str, Any]) -> np.ndarray:
+        with torch.no_grad():
+            return _audio_embeddings(self.model, {name: value.to(self.device) for name, value in inputs.items()}).cpu().numpy()
         
-    def get_embeddings(self, audio_paths: List[str]) -> List[List[float]]:
+    def get_embeddings(self, audio_paths: List[Union[str, np.ndarray]]) -> List[List[float]]:
+        """
+        Returns one embedding per input, in input order. Inputs are file paths or
+        float32 sample arrays already at the model's sampling rate (used as is).
+        Clips that could not be loaded get an empty list instead of being dropped.
+        """
         if not audio_paths:
             return []
         
         audio_inputs = []
+        valid_indices = []
         sample_rate = self.processor.feature_extractor.sampling_rate
         
-        for audio_path in audio_paths:
-            try:
-                audio_data, sr = librosa.load(audio_path, sr=sample_rate)
-                audio_inputs.append(audio_data)
-            except Exception as e:
-                logger.warning(f"Could not load audio {audio_path}: {e}. Skipping.")
-                continue
+        with timed("embedding_stage_seconds", "Embedding model stages", model="audio", stage="decode"):
+            for i, audio_path in enumerate(audio_paths):
+                try:
+                    if isinstance(audio_path, np.ndarray):
+                        audio_data = audio_path
+                    else:
+                        audio_data, sr = librosa.load(audio_path, sr=sample_rate)
+                    audio_inputs.append(audio_data)
+                    valid_indices.append(i)
+                except Exception as e:
+                    logger.warning(f"Could not load audio input {i}: {e}. Skipping.")
+                    continue
             
         if not audio_inputs:
-            return []
+            return [[] for _ in audio_paths]
         
-        inputs = self.processor(audios=audio_inputs, sampling_rate=sample_rate, return_tensors="pt", padding=True).to(self.device)
+        with timed("embedding_stage_seconds", "Embedding model stages", model="audio", stage="preprocess"):
+            inputs = self._preprocess(audio_inputs)
         
-        with torch.no_grad():
-            audio_features = self.model.get_audio_features(**inputs)
-            
-        embeddings = audio_features / audio_features.norm(p=2, dim=-1, keepdim=True)
+        with timed("embedding_stage_seconds", "Embedding model stages", model="audio", stage="forward"):
+            if self.onnx_backend is not None:
+                embeddings = self.onnx_backend.run(inputs)
+            else:
+                embeddings = self._torch_forward(inputs)
         
-        embeddings_list = embeddings.cpu().tolist()
-        logger.debug(f"Generated {len(embeddings_list)} embeddings for {len(audio_inputs)} audio clips.")
+        with timed("embedding_stage_seconds", "Embedding model stages", model="audio", stage="postprocess"):
+            embeddings_list = [[] for _ in audio_paths]
+            for i, embedding in zip(valid_indices, embeddings.tolist()):
+                embeddings_list[i] = embedding
+        metrics.counter("embeddings_total", "Embeddings computed per model").inc(len(audio_inputs), model="audio")
+        logger.debug(f"Generated {len(audio_inputs)} embeddings for {len(audio_paths)} audio clips.")
         return embeddings_list
\ No newline at end of file
@@ -0,0 +1,180 @@
+# core/embeddings/embedding_cache.py
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from typing import List, Dict, Optional, Tuple
+from utils.logger import logger
+from utils.hashing import new_hasher
+from config.settings import settings
+
+# index record: 16-byte key digest, shard number, row inside the shard
+_INDEX_DTYPE = np.dtype([("key", "V16"), ("shard", "<u4"), ("row", "<u4")])
+
+class _CacheNamespace:
+    """
+    Embeddings of one model + preprocessing configuration.
+
+    Vectors are appended to fixed-width shard files (`shard_00000.bin`, ...) read back
+    through np.memmap; `index.bin` is an append-only list of (key, shard, row) records
+    loaded into a dict on open. Nothing is ever rewritten in place.
+    """
+    def __init__(self, directory: str, dim: int, dtype: str, shard_rows: int):
+        self.directory = directory
+        self.shard_rows = shard_rows
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim, self.dtype = meta["dim"], np.dtype(meta["dtype"])
+        else:
+            self.dim, self.dtype = dim, np.dtype(dtype)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "dtype": self.dtype.name}, f)
+        self.row_bytes = self.dim * self.dtype.itemsize
+
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._maps: Dict[int, np.memmap] = {}
+        self._load_index()
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"shard_{shard:05d}.bin")
+
+    def _shard_rows_on_disk(self, shard: int) -> int:
+        path = self._shard_path(shard)
+        return os.path.getsize(path) // self.row_bytes if os.path.exists(path) else 0
+
+    def _load_index(self):
+        index_path = os.path.join(self.directory, "index.bin")
+        if os.path.exists(index_path):
+            records = np.fromfile(index_path, dtype=_INDEX_DTYPE)
+            rows_on_disk = {}
+            for key, shard, row in zip(records["key"], records["shard"], records["row"]):
+                shard, row = int(shard), int(row)
+                if shard not in rows_on_disk:
+                    rows_on_disk[shard] = self._shard_rows_on_disk(shard)
+                # records written before a crash may point past the end of their shard
+                if row < rows_on_disk[shard]:
+                    self._index[bytes(key)] = (shard, row)
+
+        self._current_shard = max((shard for shard, _ in self._index.values()), default=0)
+        self._current_rows = self._shard_rows_on_disk(self._current_shard)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _rows(self, shard: int, row: int) -> np.memmap:
+        mapped = self._maps.get(shard)
+        if mapped is None or row >= mapped.shape[0]:
+            # (re)map the shard, it may have grown since it was last mapped
+            n_rows = self._shard_rows_on_disk(shard)
+            mapped = np.memmap(self._shard_path(shard), dtype=self.dtype, mode="r", shape=(n_rows, self.dim))
+            self._maps[shard] = mapped
+        return mapped
+
+    def get(self, keys: List[bytes]) -> List[Optional[List[float]]]:
+        results = []
+        with self.lock:
+            for key in keys:
+                location = self._index.get(key)
+                if location is None:
+                    results.append(None)
+                    continue
+                shard, row = location
+                results.append(self._rows(shard, row)[row].astype(np.float32).tolist())
+        return results
+
+    def put(self, keys: List[bytes], embeddings: List[List[float]]):
+        with self.lock:
+            new_items = [(key, embedding) for key, embedding in zip(keys, embeddings)
+                         if key not in self._index and len(embedding) == self.dim]
+            start = 0
+            while start < len(new_items):
+                if self._current_rows >= self.shard_rows:
+                    self._current_shard += 1
+                    self._current_rows = 0
+                take = min(len(new_items) - start, self.shard_rows - self._current_rows)
+                items = new_items[start:start + take]
+
+                vectors = np.asarray([embedding for _, embedding in items], dtype=self.dtype)
+                records = np.zeros(take, dtype=_INDEX_DTYPE)
+                records["key"] = [key for key, _ in items]
+                records["shard"] = self._current_shard
+                records["row"] = np.arange(self._current_rows, self._current_rows + take)
+
+                # vectors first, index second: a crash in between only leaves unreferenced rows
+                with open(self._shard_path(self._current_shard), "ab") as f:
+                    f.write(vectors.tobytes())
+                with open(os.path.join(self.directory, "index.bin"), "ab") as f:
+                    f.write(records.tobytes())
+
+                for i, (key, _) in enumerate(items):
+                    self._index[key] = (self._current_shard, self._current_rows + i)
+                self._current_rows += take
+                start += take
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, preprocessing params, content hash).
+    Lets a rebuild of the vector store over unchanged data skip model inference.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, dtype: Optional[str] = None, shard_rows: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.EMBEDDINGS_DIR
+        self.dtype = dtype or settings.EMBEDDING_CACHE_DTYPE
+        self.shard_rows = shard_rows or settings.EMBEDDING_CACHE_SHARD_ROWS
+        self._namespaces: Dict[str, _CacheNamespace] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"EmbeddingCache initialized at {self.cache_dir} (dtype={self.dtype}).")
+
+    @staticmethod
+    def _namespace_name(model_name: str, params: str) -> str:
+        hasher = new_hasher()
+        hasher.update(params.encode("utf-8"))
+        return f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}-{hasher.hexdigest()[:12]}"
+
+    @staticmethod
+    def _key(content_hash: str) -> bytes:
+        hasher = new_hasher()
+        hasher.update(content_hash.encode("utf-8"))
+        return hasher.digest()
+
+    def _namespace(self, model_name: str, params: str, dim: int) -> _CacheNamespace:
+        name = self._namespace_name(model_name, params)
+        with self._lock:
+            namespace = self._namespaces.get(name)
+            if namespace is None:
+                namespace = _CacheNamespace(os.path.join(self.cache_dir, name), dim, self.dtype, self.shard_rows)
+                self._namespaces[name] = namespace
+        return namespace
+
+    def get_many(self, model_name: str, params: str, content_hashes: List[str], dim: int) -> List[Optional[List[float]]]:
+        """Returns the cached embedding for each content hash, or None on a miss."""
+        try:
+            namespace = self._namespace(model_name, params, dim)
+            results = namespace.get([self._key(content_hash) for content_hash in content_hashes])
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            results = [None] * len(content_hashes)
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model_name: str, params: str, content_hashes: List[str], embeddings: List[List[float]]):
+        """Stores embeddings (empty ones are ignored). Existing entries are kept as they are."""
+        items = [(content_hash, embedding) for content_hash, embedding in zip(content_hashes, embeddings) if embedding]
+        if not items:
+            return
+        try:
+            namespace = self._namespace(model_name, params, len(items[0][1]))
+            namespace.put([self._key(content_hash) for content_hash, _ in items], [embedding for _, embedding in items])
+        except Exception as e:
+            logger.warning(f"Could not write {len(items)} embeddings to the cache: {e}")
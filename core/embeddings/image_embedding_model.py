@@ -1,9 +1,20 @@
 import torch
-from typing import List
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
 from PIL import Image
 from transformers import ViTImageProcessor, ViTModel
 from utils.logger import logger
+from utils.metrics import metrics, timed
+from config.settings import settings
 from config.model_configs import IMAGE_EMBEDDING_MODEL
+from core.data_processing.image_processor import decode_image
+from core.embeddings.onnx_backend import build_onnx_backend
+
+def _cls_embeddings(model: Any, inputs: Dict[str, Any]):
+    # [CLS] token of the last hidden state, L2-normalized
+    cls_embeddings = model(**inputs).last_hidden_state[:, 0, :]
+    return cls_embeddings / cls_embeddings.norm(p=2, dim=-1, keepdim=True)
 
 class ImageEmbeddingModel:
     def __init__(self):
@@ -11,71 +22,104 @@ class ImageEmbeddingModel:
         logger.info(f"Loading Image Embedding Model '{IMAGE_EMBEDDING_MODEL}' to device: {self.device}")
         
         self.model = ViTModel.from_pretrained(IMAGE_EMBEDDING_MODEL).to(self.device)
-        self.processor = ViTImageProcessor.from_pretrained(IMAGE_EMBEDDING_MODEL)
         
         # Set model to evaluation mode
         self.model.eval()
         
+        # the processor config drives our own preprocessing: the same resize, rescale and
+        # normalization as ViTImageProcessor, but vectorized over the batch
+        processor = ViTImageProcessor.from_pretrained(IMAGE_EMBEDDING_MODEL)
+        self.image_size = processor.size["height"]
+        self.resample = processor.resample
+        self.rescale_factor = processor.rescale_factor if processor.do_rescale else 1.0
+        self.image_mean = np.asarray(processor.image_mean if processor.do_normalize else [0.0] * 3, dtype=np.float32)
+        self.image_std = np.asarray(processor.image_std if processor.do_normalize else [1.0] * 3, dtype=np.float32)
+        self.decode_pool = ThreadPoolExecutor(max_workers=settings.IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode")
+        
+        rng = np.random.default_rng(0)
+        self.onnx_backend = build_onnx_backend(
+            "image", IMAGE_EMBEDDING_MODEL, self.device, self.model,
+            example_inputs=self._preprocess([np.zeros((self.image_size, self.image_size, 3), dtype=np.uint8)]),
+            forward_fn=_cls_embeddings,
+            dynamic_axes={"pixel_values": {0: "batch"}},
+            reference_fn=self._torch_forward,
+            validation_inputs=self._preprocess([self._to_array(rng.integers(0, 256, (300, 400, 3), dtype=np.uint8)) for _ in range(3)])
+        )
+        if self.onnx_backend is not None and settings.ONNX_RELEASE_TORCH_MODEL:
+            self.model = None
+            self.model_bytes = self.onnx_backend.size_bytes
+        
         logger.info("Image Embedding Model loaded successfully.")
+    
+    def _torch_forward(self, inputs: Dict[str, Any]) -> np.ndarray:
+        with torch.no_grad():
+            return _cls_embeddings(self.model, {name: value.to(self.device) for name, value in inputs.items()}).cpu().numpy()
+
+    def _to_array(self, image_input: Union[str, np.ndarray]) -> np.ndarray:
+        """Path or already decoded RGB array -> uint8 array at the model input size."""
+        if isinstance(image_input, np.ndarray):
+            if image_input.shape[:2] == (self.image_size, self.image_size):
+                return image_input
+            return np.asarray(Image.fromarray(image_input).resize((self.image_size, self.image_size), resample=self.resample))
+        return decode_image(image_input, self.image_size, resample=self.resample)
+
+    def _decode_all(self, image_inputs: List[Union[str, np.ndarray]]) -> List[Optional[np.ndarray]]:
+        # PIL releases the GIL while decoding and resizing, so a thread pool scales
+        def load(image_input: Union[str, np.ndarray]) -> Optional[np.ndarray]:
+            try:
+                return self._to_array(image_input)
+            except Exception as e:
+                logger.warning(f"Could not load image {image_input if isinstance(image_input, str) else 'array'}: {e}. Skipping.")
+                return None
+        if len(image_inputs) == 1:
+            return [load(image_inputs[0])]
+        return list(self.decode_pool.map(load, image_inputs))
+
+    def _preprocess(self, arrays: List[np.ndarray]) -> Dict[str, Any]:
+        """Stacks uint8 HWC arrays into normalized float32 pixel_values (N, 3, H, W)."""
+        pixel_values = np.stack(arrays).astype(np.float32)
+        pixel_values *= self.rescale_factor
+        pixel_values -= self.image_mean
+        pixel_values /= self.image_std
+        return {"pixel_values": torch.from_numpy(np.ascontiguousarray(pixel_values.transpose(0, 3, 1, 2)))}
         
-    def get_embeddings(self, image_paths: List[str]) -> List[List[float]]:
-        if not image_paths:
+    def get_embeddings(self, image_inputs: List[Union[str, np.ndarray]]) -> List[List[float]]:
+        """Embeds image paths, or RGB uint8 arrays already decoded (see decode_image)."""
+        if not image_inputs:
             logger.warning("No image paths provided")
             return []
         
-        images = []
-        valid_paths = []
-        
-        for img_path in image_paths:
-            try:
-                image = Image.open(img_path).convert("RGB")
-                images.append(image)
-                valid_paths.append(img_path)
-            except Exception as e:
-                logger.warning(f"Could not load image {img_path}: {e}. Skipping.")
-                continue
+        with timed("embedding_stage_seconds", "Embedding model stages", model="image", stage="decode"):
+            arrays = self._decode_all(image_inputs)
+        valid_indices = [i for i, array in enumerate(arrays) if array is not None]
             
-        if not images:
+        if not valid_indices:
             logger.warning("No valid images to process")
-            return []
+            return [[] for _ in image_inputs]
         
         try:
             # Process images
-            inputs = self.processor(images=images, return_tensors="pt").to(self.device)
-            
-            with torch.no_grad():
-                # Get model outputs
-                outputs = self.model(**inputs)
-                
-                # Extract embeddings from the [CLS] token (first token)
-                # Shape: (batch_size, sequence_length, hidden_size)
-                last_hidden_states = outputs.last_hidden_state
-                
-                # Take the [CLS] token embedding (index 0)
-                # Shape: (batch_size, hidden_size)
-                cls_embeddings = last_hidden_states[:, 0, :]
-                
-                # Alternatively, you can use pooler_output if available
-                # cls_embeddings = outputs.pooler_output
-            
-            # Normalize embeddings (L2 normalization)
-            embeddings = cls_embeddings / cls_embeddings.norm(p=2, dim=-1, keepdim=True)
+            with timed("embedding_stage_seconds", "Embedding model stages", model="image", stage="preprocess"):
+                inputs = self._preprocess([arrays[i] for i in valid_indices])
             
-            # Convert to list
-            embeddings_list = embeddings.cpu().tolist()
+            with timed("embedding_stage_seconds", "Embedding model stages", model="image", stage="forward"):
+                if self.onnx_backend is not None:
+                    embeddings = self.onnx_backend.run(inputs)
+                else:
+                    embeddings = self._torch_forward(inputs)
             
-            logger.debug(f"Generated {len(embeddings_list)} embeddings for {len(images)} images.")
+            with timed("embedding_stage_seconds", "Embedding model stages", model="image", stage="postprocess"):
+                # Convert to list, keeping one entry per input (empty list for images that failed to load)
+                embeddings_list = [[] for _ in image_inputs]
+                for i, embedding in zip(valid_indices, embeddings.tolist()):
+                    embeddings_list[i] = embedding
+            metrics.counter("embeddings_total", "Embeddings computed per model").inc(len(valid_indices), model="image")
             
-            # Ensure we return the right number of embeddings
-            if len(embeddings_list) != len(image_paths):
-                logger.warning(f"Mismatch: {len(embeddings_list)} embeddings for {len(image_paths)} input paths")
-                # Pad with empty lists if needed
-                while len(embeddings_list) < len(image_paths):
-                    embeddings_list.append([])
+            logger.debug(f"Generated {len(valid_indices)} embeddings for {len(image_inputs)} inputs.")
             
             return embeddings_list
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            # Return empty embeddings for all input paths
-            return [[] for _ in image_paths]
\ No newline at end of file
+            # Return empty embeddings for all inputs
+            return [[] for _ in image_inputs]
@@ -0,0 +1,159 @@
+# core/embeddings/micro_batcher.py
+import queue
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from utils.logger import logger
+from utils.metrics import metrics
+from config.settings import settings
+
+class _Request:
+    __slots__ = ("content", "future", "enqueued_at")
+
+    def __init__(self, content: Any):
+        self.content = content
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of one embedding model.
+
+    Requests submitted by concurrent callers are collected for up to `window_ms`
+    (counted from the first request of a batch) or until `max_batch_size` items are
+    waiting, then embedded with a single `embed_fn` call on a background thread.
+    Each caller gets its results back through futures. If the batch call fails, its
+    requests are retried one by one, so only the bad ones fail.
+    """
+    def __init__(self, name: str, embed_fn: Callable[[List[Any]], List[List[float]]],
+                 window_ms: Optional[float] = None, max_batch_size: Optional[int] = None):
+        self.name = name
+        self.embed_fn = embed_fn
+        self.window_seconds = (settings.QUERY_MICRO_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch_size = max(1, settings.QUERY_MICRO_BATCH_MAX_SIZE if max_batch_size is None else max_batch_size)
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # metrics
+        self._metrics_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.failed_batches = 0
+        self.failed_requests = 0
+        self._recent_batch_sizes = deque(maxlen=1024)
+        self._recent_waits_ms = deque(maxlen=1024)
+        logger.info(f"MicroBatcher '{name}' initialized (window={self.window_seconds * 1000:.1f} ms, max_batch_size={self.max_batch_size}).")
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"micro-batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def submit(self, contents: List[Any]) -> List[Future]:
+        """Queues items for embedding; returns one future per item."""
+        self._ensure_worker()
+        requests = [_Request(content) for content in contents]
+        for request in requests:
+            self._queue.put(request)
+        return [request.future for request in requests]
+
+    def embed(self, contents: List[Any], timeout: Optional[float] = None) -> List[List[float]]:
+        """Blocking helper: submits the items and waits for their embeddings, in order."""
+        return [future.result(timeout=timeout) for future in self.submit(contents)]
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _collect_batch(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # put the stop signal back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            started_at = time.monotonic()
+
+            try:
+                embeddings = self.embed_fn([request.content for request in batch])
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"embedding function returned {len(embeddings)} results for {len(batch)} inputs")
+            except Exception as e:
+                with self._metrics_lock:
+                    self.failed_batches += 1
+                if len(batch) == 1:
+                    logger.error(f"MicroBatcher '{self.name}' failed to embed a request: {e}")
+                    batch[0].future.set_exception(e)
+                    continue
+                # one bad request must not fail the others: retry them one by one
+                logger.warning(f"MicroBatcher '{self.name}' failed to embed a batch of {len(batch)} ({e}). Retrying requests individually...")
+                for request in batch:
+                    self._embed_one(request)
+                self._record_batch(batch, started_at)
+                continue
+
+            for request, embedding in zip(batch, embeddings):
+                request.future.set_result(embedding)
+            self._record_batch(batch, started_at)
+
+    def _embed_one(self, request: _Request):
+        try:
+            embeddings = self.embed_fn([request.content])
+            if len(embeddings) != 1:
+                raise ValueError(f"embedding function returned {len(embeddings)} results for 1 input")
+            request.future.set_result(embeddings[0])
+        except Exception as e:
+            logger.error(f"MicroBatcher '{self.name}' failed to embed a request: {e}")
+            with self._metrics_lock:
+                self.failed_requests += 1
+            request.future.set_exception(e)
+
+    def _record_batch(self, batch: List[_Request], started_at: float):
+        with self._metrics_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self._recent_batch_sizes.append(len(batch))
+            self._recent_waits_ms.extend((started_at - request.enqueued_at) * 1000 for request in batch)
+        metrics.histogram("micro_batch_size", "Items per micro-batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128)).observe(len(batch), batcher=self.name)
+        wait_histogram = metrics.histogram("micro_batch_wait_seconds", "Time a query waited for its micro-batch to start")
+        for request in batch:
+            wait_histogram.observe(started_at - request.enqueued_at, batcher=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            waits = sorted(self._recent_waits_ms)
+            sizes = list(self._recent_batch_sizes)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "failed_batches": self.failed_batches,
+                "failed_requests": self.failed_requests,
+                "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_wait_ms": sum(waits) / len(waits) if waits else 0.0,
+                "p99_wait_ms": waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+            }
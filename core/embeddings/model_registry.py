@@ -0,0 +1,221 @@
+# core/embeddings/model_registry.py
+import gc
+import sys
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Optional
+from utils.logger import logger
+from config.settings import settings
+from core.embeddings.onnx_backend import backend_tag
+
+# Embedding model modules are imported inside the factories so that nothing heavy
+# (torch, transformers, ...) is loaded until a model is actually requested.
+def _load_text_model():
+    from core.embeddings.text_embedding_model import TextEmbeddingModel
+    return TextEmbeddingModel()
+
+def _load_image_model():
+    from core.embeddings.image_embedding_model import ImageEmbeddingModel
+    return ImageEmbeddingModel()
+
+def _load_audio_model():
+    from core.embeddings.audio_embedding_model import AudioEmbeddingModel
+    return AudioEmbeddingModel()
+
+def _estimate_model_bytes(embedder: Any) -> int:
+    """
+    Size of the weights and buffers of the torch module held in `embedder.model`, or the
+    embedder's own `model_bytes` hint (e.g. an ONNX graph that replaced the torch weights).
+    """
+    if getattr(embedder, "model_bytes", None):
+        return embedder.model_bytes
+    model = getattr(embedder, "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return total
+    except Exception as e:
+        logger.warning(f"Could not estimate memory usage of {type(embedder).__name__}: {e}")
+        return 0
+
+class _ModelEntry:
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.size_bytes = 0
+        self.last_used = 0.0
+        # backend of the last loaded instance, kept after unloading
+        self.backend: Optional[str] = None
+        self.lock = threading.Lock()
+
+class ModelRegistry:
+    """
+    Process-wide, lazily-loaded registry of embedding models.
+
+    Each model is loaded on its first `get()` and then shared by every caller
+    (IngestionService, Retriever, ...). When a memory budget is configured the least
+    recently used models are unloaded to stay under it, and models idle for longer than
+    `idle_unload_seconds` are unloaded by a background thread.
+
+    Callers should fetch the model through `get()` for each unit of work instead of
+    keeping a long-lived reference, otherwise an unloaded model cannot be freed.
+    """
+    def __init__(self, memory_budget_mb: Optional[int] = None, idle_unload_seconds: Optional[int] = None):
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.idle_unload_seconds = idle_unload_seconds
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._reaper_thread = None
+
+        self.register("text", _load_text_model)
+        self.register("image", _load_image_model)
+        self.register("audio", _load_audio_model)
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register (or replace) the factory used to build model `name`."""
+        with self._lock:
+            old_entry = self._entries.get(name)
+            self._entries[name] = _ModelEntry(name, factory)
+        if old_entry is not None and old_entry.instance is not None:
+            self._release(old_entry)
+        logger.debug(f"Model '{name}' registered in ModelRegistry.")
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, name: str) -> Any:
+        entry = self._get_entry(name)
+        with entry.lock:
+            if entry.instance is None:
+                logger.info(f"ModelRegistry: loading model '{name}' on first use...")
+                start_time = time.perf_counter()
+                entry.instance = entry.factory()
+                entry.size_bytes = _estimate_model_bytes(entry.instance)
+                entry.backend = backend_tag(entry.instance)
+                logger.info(f"ModelRegistry: model '{name}' loaded in {time.perf_counter() - start_time:.1f}s "
+                            f"(~{entry.size_bytes / (1024 * 1024):.0f} MB).")
+                just_loaded = True
+            else:
+                just_loaded = False
+            entry.last_used = time.monotonic()
+            instance = entry.instance
+
+        if just_loaded:
+            self._enforce_memory_budget(keep=name)
+            self._ensure_reaper()
+        return instance
+
+    def backend_of(self, name: str) -> str:
+        """
+        Inference backend of model `name` (see onnx_backend.backend_tag), for cache keys.
+        Known without reloading once the model has been loaded; loads it otherwise.
+        """
+        entry = self._get_entry(name)
+        if entry.backend is None:
+            self.get(name)
+        return entry.backend
+
+    def is_loaded(self, name: str) -> bool:
+        return self._get_entry(name).instance is not None
+
+    def loaded_bytes(self) -> int:
+        with self._lock:
+            entries = list(self._entries.values())
+        return sum(entry.size_bytes for entry in entries if entry.instance is not None)
+
+    def unload(self, name: str) -> bool:
+        entry = self._get_entry(name)
+        with entry.lock:
+            if entry.instance is None:
+                return False
+            self._release(entry)
+        return True
+
+    def unload_idle(self, max_idle_seconds: Optional[float] = None) -> List[str]:
+        """Unload every model that has not been used for `max_idle_seconds`."""
+        max_idle_seconds = self.idle_unload_seconds if max_idle_seconds is None else max_idle_seconds
+        if max_idle_seconds is None:
+            return []
+
+        now = time.monotonic()
+        unloaded = []
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            # never block on a model that is currently being loaded
+            if not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                if entry.instance is not None and now - entry.last_used >= max_idle_seconds:
+                    self._release(entry)
+                    unloaded.append(entry.name)
+            finally:
+                entry.lock.release()
+        return unloaded
+
+    def _get_entry(self, name: str) -> _ModelEntry:
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model '{name}'. Registered models: {self.names()}")
+        return entry
+
+    def _release(self, entry: _ModelEntry):
+        logger.info(f"ModelRegistry: unloading model '{entry.name}' (~{entry.size_bytes / (1024 * 1024):.0f} MB).")
+        entry.instance = None
+        entry.size_bytes = 0
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _enforce_memory_budget(self, keep: str):
+        if self.memory_budget_bytes is None:
+            return
+
+        while self.loaded_bytes() > self.memory_budget_bytes:
+            with self._lock:
+                candidates = [entry for entry in self._entries.values()
+                              if entry.instance is not None and entry.name != keep]
+            if not candidates:
+                logger.warning(f"ModelRegistry: model '{keep}' alone exceeds the memory budget "
+                               f"of {self.memory_budget_bytes / (1024 * 1024):.0f} MB.")
+                return
+
+            # evict the least recently used model first
+            victim = min(candidates, key=lambda entry: entry.last_used)
+            if not victim.lock.acquire(blocking=False):
+                return
+            try:
+                if victim.instance is not None:
+                    self._release(victim)
+            finally:
+                victim.lock.release()
+
+    def _ensure_reaper(self):
+        if not self.idle_unload_seconds:
+            return
+        with self._lock:
+            if self._reaper_thread is not None:
+                return
+            self._reaper_thread = threading.Thread(target=self._reap_idle_models, name="model-registry-reaper", daemon=True)
+            self._reaper_thread.start()
+
+    def _reap_idle_models(self):
+        interval = max(1.0, self.idle_unload_seconds / 4)
+        while True:
+            time.sleep(interval)
+            try:
+                self.unload_idle()
+            except Exception as e:
+                logger.error(f"ModelRegistry: error while unloading idle models: {e}")
+
+model_registry = ModelRegistry(
+    memory_budget_mb=settings.MODEL_MEMORY_BUDGET_MB,
+    idle_unload_seconds=settings.MODEL_IDLE_UNLOAD_SECONDS
+)
@@ -0,0 +1,180 @@
+# core/embeddings/onnx_backend.py
+import importlib.metadata
+import os
+import re
+
+import numpy as np
+
+from typing import Any, Callable, Dict, List, Optional
+from utils.logger import logger
+from config.settings import settings
+
+# onnx / onnxruntime are optional: only needed (and imported) with EMBEDDING_BACKEND="onnx"
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+        return onnxruntime
+    except ImportError:
+        return None
+
+def onnx_backend_enabled(device: str = "cpu") -> bool:
+    if settings.EMBEDDING_BACKEND != "onnx":
+        return False
+    if _import_onnxruntime() is None:
+        logger.warning("EMBEDDING_BACKEND is 'onnx' but onnxruntime is not installed; using PyTorch.")
+        return False
+    if device != "cpu":
+        logger.info(f"ONNX backend is CPU-only, keeping PyTorch on '{device}'.")
+        return False
+    return True
+
+def backend_tag(embedder: Any) -> str:
+    """
+    Backend `embedder` actually runs on, as recorded in embedding cache keys: "torch" when
+    the ONNX backend is off or fell back to PyTorch, else "onnx" or "onnx-int8".
+    """
+    onnx_backend = getattr(embedder, "onnx_backend", None)
+    if onnx_backend is None:
+        return "torch"
+    return "onnx-int8" if onnx_backend.quantize else "onnx"
+
+def _package_version(package: str) -> str:
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "none"
+
+def export_cache_key() -> str:
+    """Everything an exported / quantized graph depends on besides the model itself."""
+    return (f"opset{settings.ONNX_OPSET_VERSION}-torch{_package_version('torch')}"
+            f"-onnx{_package_version('onnx')}-ort{_package_version('onnxruntime')}")
+
+def _export_wrapper(module: Any, input_names: List[str], forward_fn: Callable[[Any, Dict[str, Any]], Any]):
+    """nn.Module taking the model inputs positionally, as torch.onnx.export needs."""
+    import torch
+
+    class _ExportWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.module = module
+
+        def forward(self, *tensors):
+            return forward_fn(self.module, dict(zip(input_names, tensors)))
+
+    return _ExportWrapper().eval()
+
+def _min_cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    a = a / np.maximum(np.linalg.norm(a, axis=-1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=-1, keepdims=True), 1e-12)
+    return float(np.min(np.sum(a * b, axis=-1)))
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime replacement for the forward pass of one embedding model.
+
+    The torch module is exported once (optionally with dynamic int8 weight quantization)
+    and the graph is cached under ONNX_CACHE_DIR, keyed by model name, opset and torch /
+    onnx / onnxruntime versions (int8 graphs get their own file). `forward_fn`
+    maps (module, named inputs) to the embeddings exactly like the embedder's PyTorch path.
+    """
+    def __init__(self, name: str, model_name: str, quantize: Optional[bool] = None):
+        self.name = name
+        self.model_name = model_name
+        self.quantize = settings.ONNX_QUANTIZE_INT8 if quantize is None else quantize
+        model_dir = os.path.join(settings.ONNX_CACHE_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name),
+                                 re.sub(r"[^A-Za-z0-9_.-]+", "_", export_cache_key()))
+        self.fp32_path = os.path.join(model_dir, "model.onnx")
+        self.model_path = os.path.join(model_dir, "model.int8.onnx") if self.quantize else self.fp32_path
+        self.input_names: List[str] = []
+        self.session = None
+
+    def export(self, module: Any, example_inputs: Dict[str, Any], forward_fn: Callable[[Any, Dict[str, Any]], Any],
+               dynamic_axes: Dict[str, Dict[int, str]]):
+        """Exports (and quantizes) the model unless a cached graph exists."""
+        self.input_names = list(example_inputs.keys())
+        if not os.path.exists(self.fp32_path):
+            import torch
+
+            logger.info(f"Exporting '{self.model_name}' to ONNX: {self.fp32_path}")
+            os.makedirs(os.path.dirname(self.fp32_path), exist_ok=True)
+            tmp_path = f"{self.fp32_path}.tmp"
+            wrapper = _export_wrapper(module, self.input_names, forward_fn)
+            with torch.no_grad():
+                torch.onnx.export(
+                    wrapper,
+                    tuple(example_inputs[name] for name in self.input_names),
+                    tmp_path,
+                    input_names=self.input_names,
+                    output_names=["embeddings"],
+                    dynamic_axes={**dynamic_axes, "embeddings": {0: "batch"}},
+                    opset_version=settings.ONNX_OPSET_VERSION,
+                    do_constant_folding=True
+                )
+            os.replace(tmp_path, self.fp32_path)
+
+        if self.quantize and not os.path.exists(self.model_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"Quantizing '{self.model_name}' ONNX graph to int8: {self.model_path}")
+            tmp_path = f"{self.model_path}.tmp"
+            quantize_dynamic(self.fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, self.model_path)
+
+    def load(self):
+        ort = _import_onnxruntime()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.ONNX_INTRA_OP_THREADS:
+            options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+        if settings.ONNX_INTER_OP_THREADS:
+            options.inter_op_num_threads = settings.ONNX_INTER_OP_THREADS
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        # some exporters drop unused inputs (e.g. CLAP's is_longer), only feed what the graph takes
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+        logger.info(f"ONNX Runtime session ready for '{self.model_name}' ({'int8' if self.quantize else 'fp32'}).")
+
+    @property
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.model_path) if os.path.exists(self.model_path) else 0
+
+    def run(self, inputs: Dict[str, Any]) -> np.ndarray:
+        feed = {}
+        for name in self.input_names:
+            value = inputs[name]
+            feed[name] = value.detach().cpu().numpy() if hasattr(value, "detach") else np.asarray(value)
+        return self.session.run(["embeddings"], feed)[0]
+
+    def validate(self, reference_fn: Callable[[Dict[str, Any]], np.ndarray], validation_inputs: Dict[str, Any]) -> bool:
+        """Checks that ONNX embeddings stay within ONNX_TOLERANCE (cosine distance) of the PyTorch ones."""
+        reference = reference_fn(validation_inputs)
+        candidate = self.run(validation_inputs)
+        similarity = _min_cosine_similarity(reference, candidate)
+        if 1.0 - similarity > settings.ONNX_TOLERANCE:
+            logger.error(f"ONNX backend for '{self.model_name}' is outside tolerance "
+                         f"(min cosine similarity {similarity:.5f}, tolerance {settings.ONNX_TOLERANCE}).")
+            return False
+        logger.info(f"ONNX backend for '{self.model_name}' validated (min cosine similarity {similarity:.5f}).")
+        return True
+
+def build_onnx_backend(name: str, model_name: str, device: str, module: Any, example_inputs: Dict[str, Any],
+                       forward_fn: Callable[[Any, Dict[str, Any]], Any], dynamic_axes: Dict[str, Dict[int, str]],
+                       reference_fn: Callable[[Dict[str, Any]], np.ndarray],
+                       validation_inputs: Optional[Dict[str, Any]] = None) -> Optional[OnnxEmbeddingBackend]:
+    """
+    Returns a validated ONNX backend for the model, or None (the caller keeps using PyTorch)
+    when the backend is disabled, onnxruntime is missing, or export/validation fails.
+    `validation_inputs` should use another batch / sequence size than `example_inputs`
+    so the dynamic axes get checked too.
+    """
+    if not onnx_backend_enabled(device):
+        return None
+    backend = OnnxEmbeddingBackend(name, model_name)
+    try:
+        backend.export(module, example_inputs, forward_fn, dynamic_axes)
+        backend.load()
+        if settings.ONNX_VALIDATE and not backend.validate(reference_fn, validation_inputs or example_inputs):
+            return None
+        return backend
+    except Exception as e:
+        logger.error(f"Could not set up the ONNX backend for '{model_name}', using PyTorch: {e}")
+        return None
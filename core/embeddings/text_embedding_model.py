@@ -1,9 +1,14 @@
 import torch
+import numpy as np
 
-from typing import List
+from typing import Any, Dict, List
 from sentence_transformers import SentenceTransformer
+from sentence_transformers.util import batch_to_device
 from utils.logger import logger
+from utils.metrics import metrics, timed
+from config.settings import settings
 from config.model_configs import TEXT_EMBEDDING_MODEL
+from core.embeddings.onnx_backend import build_onnx_backend
 
 class TextEmbeddingModel:
     def __init__(self):
@@ -11,12 +16,52 @@ class TextEmbeddingModel:
         logger.info(f"Loading Text Embedding Model '{TEXT_EMBEDDING_MODEL}' to device: {self.device}")
         
         self.model = SentenceTransformer(TEXT_EMBEDDING_MODEL, device=self.device)
+        self.tokenizer = self.model.tokenizer
+        self.max_seq_length = self.model.max_seq_length
+        self.do_lower_case = getattr(self.model[0], "do_lower_case", False)
+        
+        self.onnx_backend = build_onnx_backend(
+            "text", TEXT_EMBEDDING_MODEL, self.device, self.model,
+            example_inputs=self._tokenize(["An example sentence.", "A second, slightly longer example sentence for the export."]),
+            forward_fn=lambda module, features: module(features)["sentence_embedding"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in self._tokenize(["x"]).keys()},
+            reference_fn=self._torch_forward,
+            validation_inputs=self._tokenize(["Query", "Some text about a dog playing in a park.", "A third sentence, longer than the others, to check the dynamic sequence axis."])
+        )
+        if self.onnx_backend is not None and settings.ONNX_RELEASE_TORCH_MODEL:
+            self.model = None
+            self.model_bytes = self.onnx_backend.size_bytes
         logger.info("Text Embedding Model loaded successfully.")
         
+    def _tokenize(self, texts: List[str]) -> Dict[str, Any]:
+        # same as SentenceTransformer.tokenize, without needing the model weights
+        texts = [str(text).strip() for text in texts]
+        if self.do_lower_case:
+            texts = [text.lower() for text in texts]
+        return dict(self.tokenizer(texts, padding=True, truncation="longest_first", return_tensors="pt", max_length=self.max_seq_length))
+    
+    def _torch_forward(self, features: Dict[str, Any]) -> np.ndarray:
+        with torch.no_grad():
+            # the model adds its outputs to the dict it gets, so give it a copy
+            sentence_embeddings = self.model(batch_to_device(dict(features), self.device))["sentence_embedding"]
+        return sentence_embeddings.detach().cpu().float().numpy()
+        
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         if not texts:
             return []
         
-        embeddings = self.model.encode(texts, convert_to_numpy=True).tolist()
+        # same steps as SentenceTransformer.encode with a single batch, timed separately
+        with timed("embedding_stage_seconds", "Embedding model stages", model="text", stage="preprocess"):
+            features = self._tokenize(texts)
+        
+        with timed("embedding_stage_seconds", "Embedding model stages", model="text", stage="forward"):
+            if self.onnx_backend is not None:
+                sentence_embeddings = self.onnx_backend.run(features)
+            else:
+                sentence_embeddings = self._torch_forward(features)
+        
+        with timed("embedding_stage_seconds", "Embedding model stages", model="text", stage="postprocess"):
+            embeddings = sentence_embeddings.tolist()
+        metrics.counter("embeddings_total", "Embeddings computed per model").inc(len(embeddings), model="text")
         logger.debug(f"Generated {len(embeddings)} embeddings for {len(texts)} texts.")
-        return embeddings
\ No newline at end of file
+        return embeddings
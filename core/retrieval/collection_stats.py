@@ -0,0 +1,92 @@
+# core/retrieval/collection_stats.py
+import threading
+import time
+
+from typing import Dict, Any, Callable, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+
+class CollectionStats:
+    """
+    In-memory statistics of one collection: point count, a version number bumped on
+    every write, and the time of the last write. Kept up to date by VectorDBManager
+    on upsert/delete so that hot paths never have to count points.
+    """
+    def __init__(self, collection_name: str, count_fn: Callable[[bool], int]):
+        self.collection_name = collection_name
+        self._count_fn = count_fn
+        self._lock = threading.Lock()
+        self.point_count = 0
+        self.version = 0
+        self.last_modified: Optional[float] = None
+        self.last_refreshed: Optional[float] = None
+
+    def record_write(self, delta: int):
+        with self._lock:
+            self.point_count = max(0, self.point_count + delta)
+            self.version += 1
+            self.last_modified = time.time()
+
+    def refresh(self, exact: bool = False) -> int:
+        """Re-reads the count from the database (approximate unless `exact`)."""
+        count = self._count_fn(exact)
+        with self._lock:
+            if count != self.point_count:
+                self.version += 1
+            self.point_count = count
+            self.last_refreshed = time.time()
+        return count
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "collection_name": self.collection_name,
+                "point_count": self.point_count,
+                "version": self.version,
+                "last_modified": self.last_modified,
+                "last_refreshed": self.last_refreshed,
+            }
+
+# Stats are shared by every VectorDBManager pointing at the same collection of the same
+# client (IngestionService and Retriever each have their own managers).
+_registry: Dict[Tuple[int, str], CollectionStats] = {}
+_registry_lock = threading.Lock()
+_refresher_thread = None
+
+def get_collection_stats(client: Any, collection_name: str, count_fn: Callable[[bool], int]) -> CollectionStats:
+    key = (id(client), collection_name)
+    with _registry_lock:
+        stats = _registry.get(key)
+        created = stats is None
+        if created:
+            stats = CollectionStats(collection_name, count_fn)
+            _registry[key] = stats
+    if created:
+        try:
+            stats.refresh(exact=False)
+        except Exception as e:
+            logger.error(f"Could not read initial point count of collection '{collection_name}': {e}")
+        _ensure_refresher()
+    return stats
+
+def _ensure_refresher():
+    global _refresher_thread
+    if not settings.COLLECTION_STATS_REFRESH_SECONDS:
+        return
+    with _registry_lock:
+        if _refresher_thread is not None:
+            return
+        _refresher_thread = threading.Thread(target=_refresh_periodically, name="collection-stats-refresher", daemon=True)
+        _refresher_thread.start()
+
+def _refresh_periodically():
+    # corrects any drift (writes from other processes, approximate deltas) in the background
+    while True:
+        time.sleep(settings.COLLECTION_STATS_REFRESH_SECONDS)
+        with _registry_lock:
+            all_stats = list(_registry.values())
+        for stats in all_stats:
+            try:
+                stats.refresh(exact=False)
+            except Exception as e:
+                logger.warning(f"Background refresh of collection '{stats.collection_name}' stats failed: {e}")
@@ -0,0 +1,143 @@
+# core/retrieval/docstore.py
+import json
+import os
+import sqlite3
+import threading
+
+from typing import Any, Dict, List, Optional, Tuple
+from utils.logger import logger
+from utils.metrics import timed
+from config.settings import settings
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMS = 900
+
+class DocStore:
+    """
+    Chunk documents (content + full metadata) in SQLite, keyed by point ID, so vector
+    payloads only carry the ID and a few small filterable fields. Reads run on a
+    per-thread connection; WAL mode lets them proceed while the ingestion writes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # every per-thread connection, so close() can close them all
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        else:
+            # one shared connection, every thread would otherwise get its own empty database
+            self._shared = sqlite3.connect(path, check_same_thread=False)
+        connection = self._connection()
+        with self._write_lock, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, source_id TEXT, doc TEXT NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS chunks_source_id ON chunks (source_id)")
+        logger.info(f"DocStore initialized at {path}.")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self.path == ":memory:":
+            return self._shared
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # only used by this thread, but closed by whichever thread calls close()
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def put_many(self, docs: List[Tuple[str, Dict[str, Any]]]):
+        """Inserts or replaces (point ID, chunk dict) pairs in one transaction."""
+        if not docs:
+            return
+        rows = [(doc_id, doc.get("metadata", {}).get("source_id"), json.dumps(doc, ensure_ascii=False)) for doc_id, doc in docs]
+        connection = self._connection()
+        with timed("docstore_write_seconds", "Document store writes"), self._write_lock, connection:
+            connection.executemany("INSERT OR REPLACE INTO chunks (id, source_id, doc) VALUES (?, ?, ?)", rows)
+
+    def get_many(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Documents of `doc_ids` found in the store, by ID (one query per 900 IDs)."""
+        unique_ids = list(dict.fromkeys(doc_ids))
+        docs: Dict[str, Dict[str, Any]] = {}
+        connection = self._connection()
+        with timed("docstore_read_seconds", "Document store bulk reads"):
+            for start in range(0, len(unique_ids), _MAX_PARAMS):
+                batch = unique_ids[start:start + _MAX_PARAMS]
+                query = f"SELECT id, doc FROM chunks WHERE id IN ({','.join('?' * len(batch))})"
+                if self.path == ":memory:":
+                    with self._write_lock:
+                        rows = connection.execute(query, batch).fetchall()
+                else:
+                    rows = connection.execute(query, batch).fetchall()
+                for doc_id, doc in rows:
+                    docs[doc_id] = json.loads(doc)
+        return docs
+
+    def delete_source(self, source_id: str) -> int:
+        connection = self._connection()
+        with self._write_lock, connection:
+            return connection.execute("DELETE FROM chunks WHERE source_id = ?", (source_id,)).rowcount
+
+    def count(self) -> int:
+        connection = self._connection()
+        with self._write_lock:
+            return connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self):
+        """Closes the connections of every thread; later calls reopen the file."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        if getattr(self, "_shared", None) is not None:
+            connections.append(self._shared)
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing a DocStore connection: {e}")
+
+_docstores: Dict[str, DocStore] = {}
+_docstores_lock = threading.Lock()
+
+def _uses_qdrant_server() -> bool:
+    return settings.VECTOR_DB_BACKEND == "qdrant" and bool(settings.QDRANT_URL)
+
+def docstore_enabled() -> bool:
+    """
+    DOCSTORE_ENABLED, or by default: on with local vector storage, off with a Qdrant server,
+    whose other clients (replicas, other processes) could not read this process's SQLite file.
+    """
+    if settings.DOCSTORE_ENABLED is not None:
+        return settings.DOCSTORE_ENABLED
+    return not _uses_qdrant_server()
+
+def get_docstore(path: Optional[str] = None) -> Optional[DocStore]:
+    """Shared DocStore at `path` (DOCSTORE_PATH by default), or None when the store is disabled."""
+    if not docstore_enabled():
+        return None
+    path = path or settings.DOCSTORE_PATH
+    with _docstores_lock:
+        docstore = _docstores.get(path)
+        if docstore is None:
+            if _uses_qdrant_server():
+                logger.warning(f"DocStore enabled with a Qdrant server: chunk contents are only in {path}. "
+                               "Every process searching the server must use the same DOCSTORE_PATH, "
+                               "or its results will have no content.")
+            docstore = DocStore(path)
+            _docstores[path] = docstore
+    return docstore
+
+def split_payload(chunk_data: Dict[str, Any], doc_id: str) -> Dict[str, Any]:
+    """
+    Slim vector payload of a chunk stored in the DocStore: its document ID plus the
+    DOCSTORE_PAYLOAD_FIELDS of its metadata (what filters and ID-only callers need).
+    """
+    metadata = chunk_data.get("metadata", {})
+    return {
+        "doc_id": doc_id,
+        "metadata": {key: metadata[key] for key in settings.DOCSTORE_PAYLOAD_FIELDS if key in metadata},
+    }
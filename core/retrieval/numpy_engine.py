@@ -0,0 +1,317 @@
+# core/retrieval/numpy_engine.py
+import json
+import os
+import threading
+
+import numpy as np
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+
+PayloadPredicate = Callable[[Dict[str, Any]], bool]
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row (float32); all-zero rows stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class NumpyCollection:
+    """
+    One collection of the built-in exact engine: L2-normalized vectors in a row-major
+    matrix, with the point ID and payload of each row kept alongside.
+
+    On disk (`directory`), vectors are appended to `vectors_<generation>.bin` and read back
+    through np.memmap, and `points_<generation>.jsonl` is an append-only log of row
+    assignments and deletions replayed on open. Nothing is rewritten in place: re-upserting
+    an ID tombstones its old row and appends a new one, and `compact()` rewrites both files
+    without the dead rows into the next generation once tombstones pile up. Without a
+    directory everything stays in memory.
+    """
+    def __init__(self, name: str, dim: int, directory: Optional[str] = None, dtype: Optional[str] = None):
+        self.name = name
+        self.directory = directory
+        self._lock = threading.RLock()
+        self.dim, self.dtype, self.generation = dim, np.dtype(dtype or settings.NUMPY_ENGINE_DTYPE), 0
+
+        self._ids: List[Optional[str]] = []               # row -> point ID (None once deleted)
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}                 # point ID -> live row
+        self._n_rows = 0
+        self._ram = np.zeros((0, dim), dtype=self.dtype)  # in-memory mode only
+        self._map: Optional[np.memmap] = None
+        self._log = None
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._open()
+
+    # --- persistence ---
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _vectors_path(self, generation: Optional[int] = None) -> str:
+        return os.path.join(self.directory, f"vectors_{self.generation if generation is None else generation}.bin")
+
+    def _log_path(self, generation: Optional[int] = None) -> str:
+        return os.path.join(self.directory, f"points_{self.generation if generation is None else generation}.jsonl")
+
+    def _write_meta(self, generation: int):
+        tmp_path = self._meta_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "generation": generation}, f)
+        os.replace(tmp_path, self._meta_path())
+
+    def _open(self):
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                raise ValueError(f"Collection '{self.name}' stores {meta['dim']}-d vectors, not {self.dim}-d.")
+            self.dtype, self.generation = np.dtype(meta["dtype"]), meta["generation"]
+        else:
+            self._write_meta(self.generation)
+
+        row_bytes = self.dim * self.dtype.itemsize
+        vectors_path = self._vectors_path()
+        rows_on_disk = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+        if os.path.exists(self._log_path()):
+            with open(self._log_path(), "rb+") as f:
+                complete_bytes = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # a write cut short by a crash: dropped so the next append starts a new line
+                        f.truncate(complete_bytes)
+                        break
+                    complete_bytes += len(line)
+                    record = json.loads(line)
+                    if "delete" in record:
+                        self._tombstone(record["delete"])
+                    elif record["row"] < rows_on_disk:
+                        # rows logged before a crash may point past the end of the vector file
+                        self._assign(record["row"], record["id"], record["payload"])
+        # rows written but never logged are dead space, reclaimed by the next compaction
+        self._n_rows = rows_on_disk
+        self._resize_row_arrays(rows_on_disk)
+        self._log = open(self._log_path(), "a", encoding="utf-8")
+        logger.info(f"Opened vector engine collection '{self.name}' ({len(self._row_of)} points, {self._n_rows} rows).")
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self._map = None
+
+    # --- row bookkeeping ---
+    def _resize_row_arrays(self, n_rows: int):
+        missing = n_rows - len(self._ids)
+        if missing > 0:
+            self._ids.extend([None] * missing)
+            self._payloads.extend([None] * missing)
+        if n_rows > len(self._alive):
+            alive = np.zeros(max(n_rows, 2 * len(self._alive)), dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+
+    def _assign(self, row: int, point_id: str, payload: Dict[str, Any]):
+        self._resize_row_arrays(row + 1)
+        old_row = self._row_of.get(point_id)
+        if old_row is not None and old_row != row:
+            self._tombstone(old_row)
+        self._ids[row], self._payloads[row] = point_id, payload
+        self._alive[row] = True
+        self._row_of[point_id] = row
+
+    def _tombstone(self, row: int):
+        if row >= len(self._ids) or not self._alive[row]:
+            return
+        if self._row_of.get(self._ids[row]) == row:
+            del self._row_of[self._ids[row]]
+        self._ids[row], self._payloads[row] = None, None
+        self._alive[row] = False
+
+    def _append_vectors(self, vectors: np.ndarray):
+        if self.directory is None:
+            if self._n_rows + len(vectors) > len(self._ram):
+                ram = np.zeros((max(self._n_rows + len(vectors), 2 * len(self._ram), 1024), self.dim), dtype=self.dtype)
+                ram[:self._n_rows] = self._ram[:self._n_rows]
+                self._ram = ram
+            self._ram[self._n_rows:self._n_rows + len(vectors)] = vectors
+        else:
+            with open(self._vectors_path(), "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+        self._n_rows += len(vectors)
+
+    def _matrix(self, n_rows: int) -> np.ndarray:
+        """The first `n_rows` rows of the vector matrix (a memmap on disk)."""
+        if self.directory is None:
+            return self._ram[:n_rows]
+        if self._map is None or self._map.shape[0] < n_rows:
+            # (re)map the file, it may have grown since it was last mapped
+            if n_rows == 0:
+                return np.zeros((0, self.dim), dtype=self.dtype)
+            self._map = np.memmap(self._vectors_path(), dtype=self.dtype, mode="r", shape=(self._n_rows, self.dim))
+        return self._map[:n_rows]
+
+    # --- public API ---
+    def count(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def dead_rows(self) -> int:
+        return self._n_rows - len(self._row_of)
+
+    def upsert(self, point_ids: List[str], vectors: Any, payloads: List[Dict[str, Any]]) -> int:
+        """Inserts or replaces points; returns how many IDs were new."""
+        vectors = normalize_rows(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim or len(vectors) != len(point_ids) or len(payloads) != len(point_ids):
+            raise ValueError(f"Expected {len(point_ids)} vectors of dimension {self.dim} with one payload each, got shape {vectors.shape}.")
+        with self._lock:
+            new_points = len(set(point_ids) - self._row_of.keys())
+            first_row = self._n_rows
+            lines = [json.dumps({"row": first_row + i, "id": point_id, "payload": payload}, ensure_ascii=False)
+                     for i, (point_id, payload) in enumerate(zip(point_ids, payloads))]
+            # vectors first, log second: a crash in between only leaves unreferenced rows
+            self._append_vectors(vectors.astype(self.dtype))
+            for i, (point_id, payload) in enumerate(zip(point_ids, payloads)):
+                self._assign(first_row + i, point_id, payload)
+            if self._log is not None:
+                self._log.write("\n".join(lines) + "\n")
+                self._log.flush()
+            self._maybe_compact()
+        return new_points
+
+    def delete_where(self, predicate: PayloadPredicate) -> int:
+        """Tombstones every point whose payload matches; returns how many were deleted."""
+        with self._lock:
+            rows = [row for row in np.flatnonzero(self._alive[:self._n_rows]) if predicate(self._payloads[row])]
+            for row in rows:
+                self._tombstone(int(row))
+            if rows and self._log is not None:
+                self._log.write("".join(json.dumps({"delete": int(row)}) + "\n" for row in rows))
+                self._log.flush()
+            self._maybe_compact()
+        return len(rows)
+
+    def search(self, queries: Any, k: int, predicate: Optional[PayloadPredicate] = None,
+               block_rows: Optional[int] = None) -> List[List[Tuple[float, str, Dict[str, Any]]]]:
+        """
+        Exact cosine top-k for each query row: blocked matrix multiply over the live
+        rows, `argpartition` per block, then a final sort of the merged candidates.
+        Returns (score, point ID, payload) triples, best first.
+        """
+        queries = normalize_rows(np.atleast_2d(queries))
+        if k <= 0:
+            return [[] for _ in queries]
+        block_rows = block_rows or settings.NUMPY_ENGINE_SEARCH_BLOCK_ROWS
+        with self._lock:
+            # searches run outside the lock on a snapshot: vector rows are only ever appended
+            # and compaction swaps in new arrays, but replaced / deleted rows get their payload
+            # cleared in place, so the payload list is copied (a shallow copy of references)
+            n_rows = self._n_rows
+            matrix = self._matrix(n_rows)
+            allowed = self._alive[:n_rows].copy()
+            payloads = self._payloads[:n_rows]
+            ids = self._ids[:n_rows]
+        if predicate is not None:
+            for row in np.flatnonzero(allowed):
+                allowed[row] = predicate(payloads[row])
+
+        n_queries = len(queries)
+        best_scores = np.empty((n_queries, 0), dtype=np.float32)
+        best_rows = np.empty((n_queries, 0), dtype=np.int64)
+        for start in range(0, n_rows, block_rows):
+            block_allowed = allowed[start:start + block_rows]
+            if not block_allowed.any():
+                continue
+            scores = queries @ np.asarray(matrix[start:start + block_rows], dtype=np.float32).T
+            scores[:, ~block_allowed] = -np.inf
+            block_k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores, kind="stable")
+            results.append([(float(scores[i]), ids[rows[i]], payloads[rows[i]]) for i in order if np.isfinite(scores[i])])
+        return results
+
+    def _maybe_compact(self):
+        dead = self.dead_rows
+        if dead >= settings.NUMPY_ENGINE_COMPACT_MIN_ROWS and dead >= settings.NUMPY_ENGINE_COMPACT_RATIO * self._n_rows:
+            self.compact()
+
+    def compact(self):
+        """Drops tombstoned rows: live rows are rewritten, in order, into a new generation."""
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive[:self._n_rows])
+            vectors = np.asarray(self._matrix(self._n_rows)[live_rows], dtype=self.dtype)
+            ids = [self._ids[row] for row in live_rows]
+            payloads = [self._payloads[row] for row in live_rows]
+            dead = self.dead_rows
+
+            if self.directory is not None:
+                generation = self.generation + 1
+                with open(self._vectors_path(generation), "wb") as f:
+                    f.write(np.ascontiguousarray(vectors).tobytes())
+                with open(self._log_path(generation), "w", encoding="utf-8") as f:
+                    for row, (point_id, payload) in enumerate(zip(ids, payloads)):
+                        f.write(json.dumps({"row": row, "id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+                # the new generation only becomes current once both of its files are complete
+                self._write_meta(generation)
+                self.close()
+                for path in (self._vectors_path(), self._log_path()):
+                    os.remove(path)
+                self.generation = generation
+                self._log = open(self._log_path(), "a", encoding="utf-8")
+            else:
+                self._ram = vectors.copy()
+
+            # new containers: searches still running keep the old ones
+            self._ids, self._payloads = ids, payloads
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._row_of = {point_id: row for row, point_id in enumerate(ids)}
+            self._n_rows = len(ids)
+            self._map = None
+        logger.info(f"Compacted vector engine collection '{self.name}': dropped {dead} dead rows, {len(ids)} left.")
+
+class NumpyVectorEngine:
+    """
+    Built-in exact vector engine, the numpy counterpart of a QdrantClient: holds the
+    collections stored under `path` (None or ":memory:" keeps them in memory only).
+    """
+    def __init__(self, path: Optional[str] = None, dtype: Optional[str] = None):
+        self.path = None if path == ":memory:" else path
+        self.dtype = dtype or settings.NUMPY_ENGINE_DTYPE
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Numpy vector engine {'at ' + self.path if self.path else 'running in memory'}.")
+
+    def collection(self, name: str, dim: int) -> NumpyCollection:
+        """Opens (or creates) a collection; every caller gets the same instance."""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                directory = os.path.join(self.path, name) if self.path else None
+                collection = NumpyCollection(name, dim, directory, self.dtype)
+                self._collections[name] = collection
+            elif collection.dim != dim:
+                raise ValueError(f"Collection '{name}' stores {collection.dim}-d vectors, not {dim}-d.")
+        return collection
+
+    def collection_names(self) -> List[str]:
+        with self._lock:
+            return list(self._collections)
+
+    def close(self):
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
@@ -0,0 +1,142 @@
+# core/retrieval/numpy_vector_db_manager.py
+from typing import List, Tuple, Dict, Any, Optional
+from utils.logger import logger
+from utils.metrics import metrics, timed
+from config.settings import settings
+from core.retrieval.collection_stats import get_collection_stats
+from core.retrieval.numpy_engine import NumpyVectorEngine, PayloadPredicate
+from core.retrieval.vector_db_backend import BaseVectorDBManager, point_id_for
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, MatchExcept, Range
+
+_MISSING = object()
+
+def _payload_value(payload: Dict[str, Any], key: str) -> Any:
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _condition_predicate(condition: Any) -> PayloadPredicate:
+    if isinstance(condition, Filter):
+        return compile_payload_filter(condition)
+    if not isinstance(condition, FieldCondition):
+        raise ValueError(f"Unsupported filter condition for the numpy engine: {type(condition).__name__}")
+
+    def test(value: Any) -> bool:
+        match, value_range = condition.match, condition.range
+        if isinstance(match, MatchValue) and value != match.value:
+            return False
+        if isinstance(match, MatchAny) and value not in match.any:
+            return False
+        if isinstance(match, MatchExcept) and value in match.except_:
+            return False
+        if match is not None and not isinstance(match, (MatchValue, MatchAny, MatchExcept)):
+            raise ValueError(f"Unsupported match for the numpy engine: {type(match).__name__}")
+        if isinstance(value_range, Range):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            if (value_range.gt is not None and not value > value_range.gt) or (value_range.gte is not None and not value >= value_range.gte) \
+                    or (value_range.lt is not None and not value < value_range.lt) or (value_range.lte is not None and not value <= value_range.lte):
+                return False
+        return True
+
+    def predicate(payload: Dict[str, Any]) -> bool:
+        value = _payload_value(payload, condition.key)
+        if value is _MISSING:
+            return False
+        # like Qdrant, a list matches when any of its elements does
+        return any(test(item) for item in value) if isinstance(value, list) else test(value)
+    return predicate
+
+def compile_payload_filter(payload_filter: Any) -> Optional[PayloadPredicate]:
+    """
+    Turns a Qdrant `Filter` (or its dict form) into a payload predicate: must / should /
+    must_not over FieldConditions with MatchValue, MatchAny, MatchExcept or Range, nested
+    Filters included. Other conditions raise ValueError.
+    """
+    if payload_filter is None:
+        return None
+    if isinstance(payload_filter, dict):
+        payload_filter = Filter.model_validate(payload_filter)
+    if getattr(payload_filter, "min_should", None) is not None:
+        raise ValueError("min_should filters are not supported by the numpy engine.")
+
+    def as_list(conditions: Any) -> List[Any]:
+        if conditions is None:
+            return []
+        return conditions if isinstance(conditions, list) else [conditions]
+
+    must = [_condition_predicate(condition) for condition in as_list(payload_filter.must)]
+    should = [_condition_predicate(condition) for condition in as_list(payload_filter.should)]
+    must_not = [_condition_predicate(condition) for condition in as_list(payload_filter.must_not)]
+
+    def predicate(payload: Dict[str, Any]) -> bool:
+        return all(test(payload) for test in must) \
+            and (not should or any(test(payload) for test in should)) \
+            and not any(test(payload) for test in must_not)
+    return predicate
+
+class NumpyVectorDBManager(BaseVectorDBManager):
+    """
+    VectorDBManager backed by the built-in exact engine (core/retrieval/numpy_engine.py).
+    Search is always exact, so the Qdrant search parameters (rescore, oversampling,
+    hnsw_ef, exact) are accepted and ignored; Qdrant `Filter`s are evaluated on the payloads.
+    """
+    def __init__(self, collection_name: str, embedding_dim: int, client: NumpyVectorEngine = None):
+        logger.info(f"Initializing numpy VectorDBManager for collection: '{collection_name}'")
+        if client is None:
+            logger.warning("No shared vector engine provided. Creating a new instance.")
+            client = NumpyVectorEngine(settings.NUMPY_ENGINE_PATH)
+        self.client = client
+        self.collection_name = collection_name
+        self.embedding_dim = embedding_dim
+        # managers of the same collection (IngestionService, Retriever) share one instance
+        self.collection = client.collection(collection_name, embedding_dim)
+        self.stats = get_collection_stats(self.client, self.collection_name, lambda exact: self.collection.count())
+
+    def add_vectors(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> bool:
+        """Same contract as the Qdrant VectorDBManager.add_vectors: deterministic IDs overwrite."""
+        if not embeddings:
+            logger.warning("No embeddings to add. Skipping.")
+            return True
+        if len(embeddings) != len(metadatas):
+            logger.error("Number of embeddings and metadatas must match.")
+            raise ValueError("Embeddings and metadatas count mismatch.")
+        try:
+            with timed("vector_engine_upsert_seconds", "Numpy vector engine upserts", collection=self.collection_name):
+                new_points = self.collection.upsert([point_id_for(metadata) for metadata in metadatas], embeddings, metadatas)
+            metrics.counter("vector_engine_upserted_points_total", "Points upserted into the numpy vector engine").inc(len(embeddings), collection=self.collection_name)
+            self.stats.record_write(new_points)
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting points to collection '{self.collection_name}': {e}")
+            return False
+
+    def delete_by_source(self, source_id: str) -> bool:
+        try:
+            deleted = self.collection.delete_where(lambda payload: _payload_value(payload, "metadata.source_id") == source_id)
+            self.stats.record_write(-deleted)
+            logger.debug(f"Deleted {deleted} points of source '{source_id}' from collection '{self.collection_name}'.")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting points of source '{source_id}' from collection '{self.collection_name}': {e}")
+            return False
+
+    def search_vectors(self, query_embedding: List[float], k: int = 5, filter_payload: Any = None,
+                       rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                       hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        return self.search_vectors_batch([query_embedding], k, filter_payload)[0]
+
+    def search_vectors_batch(self, query_embeddings: List[List[float]], k: int = 5, filter_payload: Any = None,
+                             rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                             hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[List[Tuple[float, str, Dict[str, Any]]]]:
+        kind = "single" if len(query_embeddings) == 1 else "batch"
+        try:
+            predicate = compile_payload_filter(filter_payload)
+            with timed("vector_engine_search_seconds", "Numpy vector engine searches", collection=self.collection_name, kind=kind):
+                return self.collection.search(query_embeddings, k, predicate)
+        except Exception as e:
+            logger.error(f"Error searching in collection '{self.collection_name}': {e}")
+            return [[] for _ in query_embeddings]
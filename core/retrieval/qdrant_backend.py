@@ -0,0 +1,37 @@
+# core/retrieval/qdrant_backend.py
+from typing import Optional
+from utils.logger import logger
+from config.settings import settings
+from qdrant_client import QdrantClient
+
+def create_qdrant_client(url: Optional[str] = None, path: Optional[str] = None) -> QdrantClient:
+    """
+    Qdrant client for the backend chosen by settings (arguments override them):
+
+    - QDRANT_URL set: a Qdrant server or cluster, over gRPC when QDRANT_PREFER_GRPC
+    - QDRANT_PATH ":memory:": in-process, nothing persisted
+    - otherwise: embedded local mode storing its data under QDRANT_PATH (single process, file lock)
+    """
+    url = settings.QDRANT_URL if url is None else url
+    if url:
+        client = QdrantClient(
+            url=url,
+            api_key=settings.QDRANT_API_KEY,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT_SECONDS
+        )
+        logger.info(f"Qdrant client connected to server {url} ({'gRPC' if settings.QDRANT_PREFER_GRPC else 'REST'}).")
+        return client
+
+    path = path or settings.QDRANT_PATH
+    if path == ":memory:":
+        logger.info("Qdrant client running in memory (nothing is persisted).")
+        return QdrantClient(location=":memory:")
+    logger.info(f"Qdrant client running in local mode, storage: {path}")
+    return QdrantClient(path=path)
+
+def is_local_client(client: QdrantClient) -> bool:
+    """True for embedded (path / :memory:) clients: their calls are synchronous and `wait` is ignored."""
+    from qdrant_client.local.qdrant_local import QdrantLocal
+    return isinstance(getattr(client, "_client", None), QdrantLocal)
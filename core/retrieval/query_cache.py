@@ -0,0 +1,84 @@
+# core/retrieval/query_cache.py
+import threading
+import time
+
+import numpy as np
+
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+
+class QueryEmbeddingCache:
+    """
+    In-memory LRU + TTL cache of query embeddings.
+    Bounded by the total size of the stored vectors; entries older than `ttl_seconds`
+    are treated as misses.
+    """
+    def __init__(self, max_mb: Optional[float] = None, ttl_seconds: Optional[float] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.QUERY_CACHE_ENABLED if enabled is None else enabled
+        self.max_bytes = int((max_mb if max_mb is not None else settings.QUERY_CACHE_MAX_MB) * 1024 * 1024)
+        self.ttl_seconds = settings.QUERY_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(f"QueryEmbeddingCache initialized (enabled={self.enabled}, max={self.max_bytes // (1024 * 1024)} MB, ttl={self.ttl_seconds}s).")
+
+    def get(self, key: Tuple) -> Optional[List[float]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            vector, created_at = entry
+            if self.ttl_seconds and time.monotonic() - created_at > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def put(self, key: Tuple, embedding: List[float]):
+        if not self.enabled or not embedding:
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, time.monotonic())
+            self._bytes += vector.nbytes
+            # evict least recently used entries until we are back under budget
+            while self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= vector.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,99 +1,291 @@
 # core/retrieval/retriever.py
 import os
+import unicodedata
 
 from utils.logger import logger
+from utils.metrics import metrics, timed
 from config.settings import settings
-from typing import List, Dict, Any, Union
-from qdrant_client import QdrantClient
+from typing import List, Dict, Any, Optional, Union, Tuple
 
-from core.embeddings.text_embedding_model import TextEmbeddingModel
-from core.embeddings.image_embedding_model import ImageEmbeddingModel
-from core.embeddings.audio_embedding_model import AudioEmbeddingModel
+from core.embeddings.model_registry import model_registry
+from core.embeddings.micro_batcher import MicroBatcher
+from config.model_configs import (
+    TEXT_EMBEDDING_DIM, IMAGE_EMBEDDING_DIM, AUDIO_EMBEDDING_DIM,
+    TEXT_EMBEDDING_MODEL, IMAGE_EMBEDDING_MODEL, AUDIO_EMBEDDING_MODEL
+)
+from utils.hashing import file_content_hash
 
-from core.retrieval.vector_db_manager import VectorDBManager
+from core.retrieval.vector_db_backend import BaseVectorDBManager, create_vector_db_manager
+from core.retrieval.query_cache import QueryEmbeddingCache
+from core.retrieval.docstore import get_docstore
+from core.retrieval.search_filters import SearchFilters
 
 class Retriever:
-    def __init__(self, client: QdrantClient):
+    def __init__(self, client: Any):
         logger.info("Initializing the Retriever...")
         
-        # Initialize embedding models
-        self.text_embedder = TextEmbeddingModel()
-        self.image_embedder = ImageEmbeddingModel()
-        self.audio_embedder = AudioEmbeddingModel()
-        logger.info("Embedding models initialized.")
-        
-        qdrant_db_path = os.path.join(settings.DATA_DIR, "qdrant_data")
+        # Embedding models come from the shared model registry (loaded on first use);
+        # the client is a QdrantClient or a NumpyVectorEngine (see core/retrieval/vector_db_backend.py)
         self.client = client
-        logger.info(f"Single Qdrant client initialized, connected to: {qdrant_db_path}")
+        logger.info("Using the shared vector store client.")
         
         # Initialize vector database
-        text_dim = self.text_embedder.model.get_sentence_embedding_dimension()
-        self.text_db_manager = VectorDBManager(collection_name="text_collection", embedding_dim=text_dim, client=self.client)
+        self.text_db_manager = create_vector_db_manager(collection_name="text_collection", embedding_dim=TEXT_EMBEDDING_DIM, client=self.client)
+        
+        self.image_db_manager = create_vector_db_manager(collection_name="image_collection", embedding_dim=IMAGE_EMBEDDING_DIM, client=self.client)
+        
+        self.audio_db_manager = create_vector_db_manager(collection_name="audio_collection", embedding_dim=AUDIO_EMBEDDING_DIM, client=self.client)
         
-        image_dim = 512
-        self.image_db_manager = VectorDBManager(collection_name="image_collection", embedding_dim=image_dim, client=self.client)
+        self.query_cache = QueryEmbeddingCache()
+        # chunk contents of the hits are read from here (None: payloads carry them)
+        self.docstore = get_docstore()
         
-        audio_dim = 512
-        self.audio_db_manager = VectorDBManager(collection_name="audio_collection", embedding_dim=audio_dim, client=self.client)
+        # concurrent queries of the same type share forward passes
+        self.micro_batchers: Dict[str, MicroBatcher] = {}
+        if settings.QUERY_MICRO_BATCH_ENABLED:
+            for query_type in ("text", "image", "audio"):
+                self.micro_batchers[query_type] = MicroBatcher(
+                    f"{query_type}-query",
+                    lambda items, query_type=query_type: self._embedder_for(query_type).get_embeddings(items)
+                )
         
         logger.info("VectorDB Managers connected to Qdrant collections.")
         logger.info(f"Text collection ('{self.text_db_manager.collection_name}') contains {self.text_db_manager.get_total_vectors()} vectors.")
         logger.info(f"Image collection ('{self.image_db_manager.collection_name}') contains {self.image_db_manager.get_total_vectors()} vectors.")
         logger.info(f"Audio collection ('{self.audio_db_manager.collection_name}') contains {self.audio_db_manager.get_total_vectors()} vectors.")
         
-    def retrieve(self, query: Union[str, bytes], query_type: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    @property
+    def text_embedder(self):
+        return model_registry.get("text")
+
+    @property
+    def image_embedder(self):
+        return model_registry.get("image")
+
+    @property
+    def audio_embedder(self):
+        return model_registry.get("audio")
+
+    def _embedder_for(self, query_type: str):
+        return {
+            "text": self.text_embedder,
+            "image": self.image_embedder,
+            "audio": self.audio_embedder,
+        }[query_type]
+
+    @staticmethod
+    def _query_cache_key(query: str, query_type: str) -> Tuple:
+        model_name = {
+            "text": TEXT_EMBEDDING_MODEL,
+            "image": IMAGE_EMBEDDING_MODEL,
+            "audio": AUDIO_EMBEDDING_MODEL,
+        }[query_type]
+        # ONNX / int8 query embeddings differ slightly from the PyTorch ones
+        backend = model_registry.backend_of(query_type)
+        if query_type == "text":
+            # collapse whitespace so trivially different spellings share an entry
+            return (model_name, backend, query_type, " ".join(unicodedata.normalize("NFC", query).split()))
+        # uploaded files get a new temp path every time, so key them by content
+        return (model_name, backend, query_type, file_content_hash(query))
+
+    def _embed_queries(self, queries: List[str], query_type: str) -> List[List[float]]:
+        """Embeds queries of one type with a single forward pass for all cache misses."""
+        cache_keys = [self._query_cache_key(query, query_type) for query in queries]
+        embeddings = [self.query_cache.get(cache_key) for cache_key in cache_keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if len(missing) < len(queries):
+            logger.debug(f"Query embedding cache hits: {len(queries) - len(missing)}/{len(queries)} '{query_type}' queries.")
+        if not missing:
+            return embeddings
+
+        # identical queries in one batch are embedded once
+        positions: Dict[Tuple, List[int]] = {}
+        for i in missing:
+            positions.setdefault(cache_keys[i], []).append(i)
+        unique_keys = list(positions)
+
+        batch_size = settings.QUERY_EMBED_BATCH_SIZE
+        for start in range(0, len(unique_keys), batch_size):
+            batch_keys = unique_keys[start:start + batch_size]
+            batch_queries = [queries[positions[key][0]] for key in batch_keys]
+            micro_batcher = self.micro_batchers.get(query_type)
+            if micro_batcher is not None:
+                computed = micro_batcher.embed(batch_queries)
+            else:
+                computed = self._embedder_for(query_type).get_embeddings(batch_queries)
+            for key, embedding in zip(batch_keys, computed):
+                for i in positions[key]:
+                    embeddings[i] = embedding
+                self.query_cache.put(key, embedding)
+        return embeddings
+
+    def _embed_query(self, query: str, query_type: str) -> List[float]:
+        return self._embed_queries([query], query_type)[0]
+
+    def _db_manager_for(self, query_type: str) -> BaseVectorDBManager:
+        return {
+            "text": self.text_db_manager,
+            "image": self.image_db_manager,
+            "audio": self.audio_db_manager,
+        }[query_type]
+
+    @staticmethod
+    def _validate_query(query: Union[str, bytes], query_type: str):
+        if query_type == "text":
+            if not isinstance(query, str):
+                raise TypeError("Text query must be a string.")
+        elif query_type == "image":
+            if not isinstance(query, str) or not os.path.exists(query):
+                raise TypeError("Image query must be a valid file path.")
+        elif query_type == "audio":
+            if not isinstance(query, str) or not os.path.exists(query):
+                raise TypeError("Audio query must be a valid file path.")
+        else:
+            raise ValueError(f"Unsupported query type: {query_type}")
+
+    def _format_results(self, search_results: List[List[Tuple[float, str, Dict[str, Any]]]], hydrate: bool = True) -> List[List[Dict[str, Any]]]:
+        """
+        Formats the hits of one or more searches. With `hydrate`, the documents of every hit
+        are read from the DocStore in one bulk fetch; otherwise results carry the point ID,
+        the score and the small payload metadata only (content is None).
+        """
+        docs: Dict[str, Dict[str, Any]] = {}
+        if hydrate and self.docstore is not None:
+            # the DocStore is keyed by point ID; slim payloads say their point lives there
+            doc_ids = [point_id for hits in search_results for _, point_id, payload in hits if (payload or {}).get("doc_id")]
+            if doc_ids:
+                docs = self.docstore.get_many(doc_ids)
+                if len(docs) < len(set(doc_ids)):
+                    logger.warning(f"{len(set(doc_ids)) - len(docs)} hits have no document in the DocStore.")
+
+        formatted_results = []
+        for hits in search_results:
+            formatted_hits = []
+            for score, point_id, payload in hits:
+                # points ingested without the DocStore carry their content in the payload
+                payload = payload or {}
+                doc = docs.get(point_id, payload)
+                formatted_hits.append({
+                    "score": score,
+                    "id": point_id,
+                    "metadata": doc.get("metadata", {}),
+                    "content": doc.get("content")
+                })
+            formatted_results.append(formatted_hits)
+        return formatted_results
+
+    def retrieve(self, query: Union[str, bytes], query_type: str, top_k: int = 5,
+                 rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                 hydrate: bool = True, filters: Optional[SearchFilters] = None) -> List[Dict[str, Any]]:
+        """
+        `rescore` / `oversampling` tune the search of quantized collections
+        (None = the collection's configured default). `hydrate=False` skips reading the
+        contents from the DocStore, for callers that only need IDs and scores. `filters`
+        restricts the search to matching points (source, type, duration, ingestion time).
+        """
         logger.info(f"Received retrieval request. Query type: '{query_type}', Top K: {top_k}")
         
-        embedding = None
-        db_manager_to_use = None
-        
+        metrics.counter("retrieval_queries_total", "Queries received by the Retriever").inc(query_type=query_type)
         # create embeddings
         try:
-            if query_type == "text":
-                if not isinstance(query, str):
-                    raise TypeError("Text query must be a string.")
-                embedding = self.text_embedder.get_embeddings(query)
-                db_manager_to_use = self.text_db_manager
-            elif query_type == "image":
-                if not isinstance(query, str) or not os.path.exists(query):
-                    raise TypeError("Image query must be a valid file path.")
-                embedding = self.image_embedder.get_embeddings([query])[0]
-                db_manager_to_use = self.image_db_manager
-            elif query_type == "audio":
-                if not isinstance(query, str) or not os.path.exists(query):
-                    raise TypeError("Audio query must be a valid file path.")
-                embedding = self.audio_embedder.get_embeddings([query])[0]
-                db_manager_to_use = self.audio_db_manager
-            else:
-                logger.error(f"Unsupported query type: {query_type}")
-                return []
+            self._validate_query(query, query_type)
+            with timed("query_embedding_seconds", "Query embedding (cache lookup, micro-batch wait and forward pass)", query_type=query_type):
+                embedding = self._embed_query(query, query_type)
+            db_manager_to_use = self._db_manager_for(query_type)
         except Exception as e:
             logger.error(f"Error generating embedding for query: {e}")
             return []
         
-        if embedding is None:
+        if not embedding:
             logger.warning("Could not generate embedding for the query.")
             return []
         
         # searching vectors
         try:
-            search_results = db_manager_to_use.search_vectors(embedding, k=top_k)
+            search_results = db_manager_to_use.search_vectors(
+                embedding, k=top_k, filter_payload=filters.to_qdrant_filter() if filters else None,
+                rescore=rescore, oversampling=oversampling
+            )
         except Exception as e:
             logger.error(f"Error searching in vector database: {e}")
             return []
         
-        formatted_results = []
-        for score, payload in search_results:
-            formatted_results.append({
-                "score": score,
-                "metadata": payload['metadata'],
-                "content": payload['content']
-            })
+        try:
+            formatted_results = self._format_results([search_results], hydrate)[0]
+        except Exception as e:
+            logger.error(f"Error reading the documents of the results: {e}")
+            return []
             
         logger.info(f"Retrieval complete. Found {len(formatted_results)} results.")
         return formatted_results
+
+    def retrieve_batch(self, queries: List[Tuple[Union[str, bytes], str]], top_k: int = 5,
+                       rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                       hydrate: bool = True, filters: Optional[SearchFilters] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieves results for many (query, query_type) pairs at once. Queries are grouped
+        by type, each group is embedded in batched forward passes and searched with Qdrant
+        batch search, and the hits of all queries are hydrated together. `filters` applies
+        to every query. Returns one result list per query, in input order; invalid or
+        failed queries get an empty list.
+        """
+        logger.info(f"Received batch retrieval request with {len(queries)} queries. Top K: {top_k}")
+        search_results: List[List[Tuple[float, str, Dict[str, Any]]]] = [[] for _ in queries]
+        filter_payload = filters.to_qdrant_filter() if filters else None
+
+        groups: Dict[str, List[int]] = {}
+        for i, (query, query_type) in enumerate(queries):
+            try:
+                self._validate_query(query, query_type)
+            except Exception as e:
+                logger.warning(f"Skipping query {i}: {e}")
+                continue
+            groups.setdefault(query_type, []).append(i)
+
+        for query_type, indices in groups.items():
+            try:
+                embeddings = self._embed_queries([queries[i][0] for i in indices], query_type)
+            except Exception as e:
+                logger.error(f"Error generating embeddings for {len(indices)} '{query_type}' queries: {e}")
+                continue
+
+            valid = [(i, embedding) for i, embedding in zip(indices, embeddings) if embedding]
+            if len(valid) < len(indices):
+                logger.warning(f"Could not generate embeddings for {len(indices) - len(valid)} '{query_type}' queries.")
+            if not valid:
+                continue
+
+            try:
+                batch_results = self._db_manager_for(query_type).search_vectors_batch(
+                    [embedding for _, embedding in valid], k=top_k, filter_payload=filter_payload,
+                    rescore=rescore, oversampling=oversampling
+                )
+            except Exception as e:
+                logger.error(f"Error batch searching '{query_type}' queries: {e}")
+                continue
+            for (i, _), hits in zip(valid, batch_results):
+                search_results[i] = hits
+
+        try:
+            results = self._format_results(search_results, hydrate)
+        except Exception as e:
+            logger.error(f"Error reading the documents of {len(queries)} queries: {e}")
+            return [[] for _ in queries]
+        logger.info(f"Batch retrieval complete for {len(queries)} queries.")
+        return results
     
+    def get_micro_batcher_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {query_type: batcher.stats() for query_type, batcher in self.micro_batchers.items()}
+
+    def get_collection_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "text": self.text_db_manager.get_stats(),
+            "image": self.image_db_manager.get_stats(),
+            "audio": self.audio_db_manager.get_stats(),
+        }
+
     def is_database_empty(self) -> bool:
+        """O(1): reads the in-memory point counts kept by the VectorDBManagers."""
         total_vectors = self.text_db_manager.get_total_vectors() \
             + self.image_db_manager.get_total_vectors() \
             + self.audio_db_manager.get_total_vectors()
@@ -0,0 +1,40 @@
+# core/retrieval/search_filters.py
+from typing import Any, List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+class SearchFilters(BaseModel):
+    """
+    Typed restrictions of a search, compiled to a Qdrant `Filter` over the indexed payload
+    fields (see "payload_indexes" in config/collection_configs.py). Empty fields don't filter.
+    """
+    source_ids: Optional[List[str]] = Field(None, min_length=1)
+    types: Optional[List[Literal["text", "image", "audio"]]] = Field(None, min_length=1)
+    # audio segments only: text and image chunks have no duration and never match
+    min_duration_ms: Optional[int] = Field(None, ge=0)
+    max_duration_ms: Optional[int] = Field(None, ge=0)
+    # ingestion time, in Unix seconds
+    ingested_after: Optional[int] = None
+    ingested_before: Optional[int] = None
+
+    @model_validator(mode="after")
+    def _check_ranges(self) -> "SearchFilters":
+        if self.min_duration_ms is not None and self.max_duration_ms is not None and self.min_duration_ms > self.max_duration_ms:
+            raise ValueError("min_duration_ms must not exceed max_duration_ms.")
+        if self.ingested_after is not None and self.ingested_before is not None and self.ingested_after > self.ingested_before:
+            raise ValueError("ingested_after must not exceed ingested_before.")
+        return self
+
+    def to_qdrant_filter(self) -> Optional[Any]:
+        """Conjunction of the set fields (a Qdrant `Filter`), or None when nothing is filtered."""
+        # imported here, the API builds request models before the vector store is loaded
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, Range
+        conditions = []
+        for key, values in (("metadata.source_id", self.source_ids), ("metadata.type", self.types)):
+            if values:
+                match = MatchValue(value=values[0]) if len(values) == 1 else MatchAny(any=list(values))
+                conditions.append(FieldCondition(key=key, match=match))
+        for key, low, high in (("metadata.duration_ms", self.min_duration_ms, self.max_duration_ms),
+                               ("metadata.ingested_at", self.ingested_after, self.ingested_before)):
+            if low is not None or high is not None:
+                conditions.append(FieldCondition(key=key, range=Range(gte=low, lte=high)))
+        return Filter(must=conditions) if conditions else None
@@ -0,0 +1,96 @@
+# core/retrieval/vector_db_backend.py
+from concurrent.futures import Future
+from uuid import uuid4, uuid5, UUID
+from typing import List, Tuple, Dict, Any, Optional
+from utils.logger import logger
+from config.settings import settings
+
+# Namespace for deterministic point IDs (any fixed UUID works, it must just never change)
+POINT_ID_NAMESPACE = UUID("6f0c3a52-2d1e-4f4a-9a47-5d0b8f1e7c21")
+
+def make_point_id(source_id: str, content_hash: str, chunk_index: int) -> str:
+    """Deterministic point ID: re-ingesting the same content yields the same points."""
+    return str(uuid5(POINT_ID_NAMESPACE, f"{source_id}:{content_hash}:{chunk_index}"))
+
+def point_id_for(chunk_data: Dict[str, Any]) -> str:
+    if chunk_data.get("doc_id"):
+        # slim payload of a chunk kept in the DocStore, the ID was assigned at ingestion
+        return chunk_data["doc_id"]
+    metadata = chunk_data.get("metadata", {})
+    if metadata.get("content_hash") and metadata.get("chunk_index") is not None:
+        return make_point_id(metadata.get("source_id", ""), metadata["content_hash"], metadata["chunk_index"])
+    return str(uuid4())
+
+class BaseVectorDBManager:
+    """
+    Contract of a vector store collection, as used by IngestionService and Retriever.
+    Payloads are chunk dicts (slim ones, see core/retrieval/docstore.py, when the chunk
+    lives in the DocStore). Searches return (score, point ID, payload) triples, scores
+    being cosine similarities (higher is better), and `stats` (CollectionStats) keeps
+    the point count in memory.
+    """
+    collection_name: str
+    embedding_dim: int
+
+    def add_vectors(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> bool:
+        raise NotImplementedError
+
+    def add_vectors_async(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> Future:
+        """Backends without non-blocking writes upsert inline and return a finished Future."""
+        future: Future = Future()
+        if self.add_vectors(embeddings, metadatas):
+            future.set_result(True)
+        else:
+            future.set_exception(RuntimeError(f"upsert into '{self.collection_name}' failed"))
+        return future
+
+    def delete_by_source(self, source_id: str) -> bool:
+        raise NotImplementedError
+
+    def search_vectors(self, query_embedding: List[float], k: int = 5, filter_payload: Any = None,
+                       rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                       hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def search_vectors_batch(self, query_embeddings: List[List[float]], k: int = 5, filter_payload: Any = None,
+                             rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                             hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[List[Tuple[float, str, Dict[str, Any]]]]:
+        raise NotImplementedError
+
+    def get_total_vectors(self, exact: bool = False) -> int:
+        """
+        Number of points in the collection. By default served from the in-memory stats (O(1));
+        `exact=True` runs a full count and refreshes the stats with it.
+        """
+        if not exact:
+            return self.stats.point_count
+        try:
+            return self.stats.refresh(exact=True)
+        except Exception as e:
+            logger.error(f"Error counting vectors in collection '{self.collection_name}': {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.stats.as_dict()
+
+    def close(self):
+        pass
+
+def create_vector_db_client() -> Any:
+    """Client of the configured VECTOR_DB_BACKEND: a QdrantClient or a NumpyVectorEngine."""
+    if settings.VECTOR_DB_BACKEND == "qdrant":
+        from core.retrieval.qdrant_backend import create_qdrant_client
+        return create_qdrant_client()
+    if settings.VECTOR_DB_BACKEND == "numpy":
+        from core.retrieval.numpy_engine import NumpyVectorEngine
+        return NumpyVectorEngine(settings.NUMPY_ENGINE_PATH)
+    raise ValueError(f"Unsupported VECTOR_DB_BACKEND '{settings.VECTOR_DB_BACKEND}' (expected 'qdrant' or 'numpy').")
+
+def create_vector_db_manager(collection_name: str, embedding_dim: int, client: Any = None) -> BaseVectorDBManager:
+    """Manager for one collection of `client`'s backend (VECTOR_DB_BACKEND when no client is given)."""
+    from core.retrieval.numpy_engine import NumpyVectorEngine
+    if isinstance(client, NumpyVectorEngine) or (client is None and settings.VECTOR_DB_BACKEND == "numpy"):
+        from core.retrieval.numpy_vector_db_manager import NumpyVectorDBManager
+        return NumpyVectorDBManager(collection_name=collection_name, embedding_dim=embedding_dim, client=client)
+    from core.retrieval.vector_db_manager import VectorDBManager
+    return VectorDBManager(collection_name=collection_name, embedding_dim=embedding_dim, client=client)
@@ -1,14 +1,25 @@
-import os
+import threading
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from utils.logger import logger
+from utils.metrics import metrics, timed
 from config.settings import settings
-from uuid import uuid4
 
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
+from core.retrieval.collection_stats import get_collection_stats
+from core.retrieval.qdrant_backend import create_qdrant_client, is_local_client
+from core.retrieval.vector_db_backend import BaseVectorDBManager, point_id_for
+from config.collection_configs import get_collection_config
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, UpdateStatus
+from qdrant_client.http.models import (
+    Distance, VectorParams, PointStruct, UpdateStatus,
+    Filter, FieldCondition, MatchValue, FilterSelector, SearchRequest,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, Disabled,
+    SearchParams, QuantizationSearchParams, HnswConfigDiff, OptimizersConfigDiff, PayloadSchemaType
+)
 
-class VectorDBManager:
+class VectorDBManager(BaseVectorDBManager):
     def __init__(self, collection_name: str, embedding_dim: int, client: QdrantClient = None):
         logger.info(f"Initializing Qdrant VectorDBManager for collection: '{collection_name}'")
         
@@ -16,14 +27,23 @@ class VectorDBManager:
             self.client = client
             logger.info("Using shared Qdrant client instance.")
         else:
-            logger.warning("No shared Qdrant client provided. Creating a new local instance.")
-            qdrant_db_path = os.path.join(settings.DATA_DIR, "qdrant_data")
-            self.client = QdrantClient(path=qdrant_db_path)
+            logger.warning("No shared Qdrant client provided. Creating a new instance.")
+            self.client = create_qdrant_client()
         
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        # storage / index / search settings of this collection (config/collection_configs.py)
+        self.collection_config = get_collection_config(collection_name)
         
         self.create_collection_if_not_exists()
+        self.stats = get_collection_stats(self.client, self.collection_name, self._count_points)
+
+        # non-blocking upserts (add_vectors_async); embedded Qdrant is synchronous, so they run inline there
+        self._local = is_local_client(self.client)
+        self._upsert_wait = settings.QDRANT_UPSERT_WAIT
+        self._upsert_slots = threading.BoundedSemaphore(settings.QDRANT_MAX_INFLIGHT_UPSERTS)
+        self._upsert_pool: Optional[ThreadPoolExecutor] = None
+        self._upsert_pool_lock = threading.Lock()
         
     def create_collection_if_not_exists(self):
         try:
@@ -37,67 +57,253 @@ class VectorDBManager:
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.embedding_dim,
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.COSINE,
+                        on_disk=self.collection_config["vectors_on_disk"]
+                    ),
+                    quantization_config=self._quantization_config(),
+                    hnsw_config=self._hnsw_config(),
+                    optimizers_config=self._optimizers_config(),
+                    on_disk_payload=self.collection_config["payload_on_disk"]
                 )
                 logger.success(f"Collection '{self.collection_name}' created successfully.")
             else:
                 logger.info(f"Collection '{self.collection_name}' already exists.")
+                self._sync_collection_config()
+            self._create_payload_indexes()
                 
         except Exception as e:
             logger.error(f"Error checking or creating collection '{self.collection_name}': {e}")
             raise
-        
-    def add_vectors(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]):
-        if not embeddings:
-            logger.warning("No embeddings to add. Skipping.")
+
+    def _create_payload_indexes(self):
+        """Creates the configured payload indexes the collection doesn't have yet."""
+        if is_local_client(self.client):
+            # embedded Qdrant always scans payloads, indexes have no effect there
+            return
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        for field_name, schema in self.collection_config["payload_indexes"].items():
+            if field_name in existing:
+                continue
+            logger.info(f"Creating {schema} payload index on '{field_name}' of collection '{self.collection_name}'.")
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=PayloadSchemaType(schema),
+                wait=True
+            )
+
+    def _quantization_config(self):
+        quantization = self.collection_config["quantization"]
+        always_ram = self.collection_config["quantization_always_ram"]
+        if quantization is None:
+            return None
+        if quantization == "scalar":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=self.collection_config["quantization_quantile"],
+                always_ram=always_ram
+            ))
+        if quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+        raise ValueError(f"Unsupported quantization '{quantization}' for collection '{self.collection_name}' (expected None, 'scalar' or 'binary').")
+
+    def _hnsw_config(self) -> Optional[HnswConfigDiff]:
+        m, ef_construct = self.collection_config["hnsw_m"], self.collection_config["hnsw_ef_construct"]
+        if m is None and ef_construct is None:
+            return None
+        return HnswConfigDiff(m=m, ef_construct=ef_construct)
+
+    def _optimizers_config(self) -> Optional[OptimizersConfigDiff]:
+        if self.collection_config["indexing_threshold"] is None:
+            return None
+        return OptimizersConfigDiff(indexing_threshold=self.collection_config["indexing_threshold"])
+
+    def _sync_collection_config(self):
+        """
+        Applies changed quantization / HNSW / indexing settings to an existing collection
+        (Qdrant rebuilds the affected indexes in the background).
+        """
+        try:
+            current = self.client.get_collection(self.collection_name).config
+        except Exception as e:
+            logger.warning(f"Could not read config of collection '{self.collection_name}': {e}")
+            return
+
+        updates = {}
+        desired_quantization = self._quantization_config()
+        if current.quantization_config != desired_quantization:
+            updates["quantization_config"] = desired_quantization if desired_quantization is not None else Disabled.DISABLED
+
+        hnsw_config = self._hnsw_config()
+        if hnsw_config is not None and (
+            (hnsw_config.m is not None and hnsw_config.m != current.hnsw_config.m)
+            or (hnsw_config.ef_construct is not None and hnsw_config.ef_construct != current.hnsw_config.ef_construct)
+        ):
+            updates["hnsw_config"] = hnsw_config
+
+        optimizers_config = self._optimizers_config()
+        if optimizers_config is not None and optimizers_config.indexing_threshold != current.optimizer_config.indexing_threshold:
+            updates["optimizers_config"] = optimizers_config
+
+        if not updates:
             return
+        try:
+            logger.info(f"Updating {', '.join(updates)} of collection '{self.collection_name}'.")
+            self.client.update_collection(collection_name=self.collection_name, **updates)
+        except Exception as e:
+            logger.warning(f"Could not update config of collection '{self.collection_name}': {e}")
+
+    def _search_params(self, rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                       hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> Optional[SearchParams]:
+        """Search-time parameters; arguments override the collection's configured defaults."""
+        hnsw_ef = self.collection_config["hnsw_ef"] if hnsw_ef is None else hnsw_ef
+        exact = self.collection_config["exact"] if exact is None else exact
+        quantization = None
+        if self.collection_config["quantization"] is not None or rescore is not None or oversampling is not None:
+            quantization = QuantizationSearchParams(
+                ignore=False,
+                rescore=self.collection_config["rescore"] if rescore is None else rescore,
+                oversampling=self.collection_config["oversampling"] if oversampling is None else oversampling
+            )
+        if quantization is None and hnsw_ef is None and not exact:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
         
+    def _build_points(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> List[PointStruct]:
         if len(embeddings) != len(metadatas):
             logger.error("Number of embeddings and metadatas must match.")
             raise ValueError("Embeddings and metadatas count mismatch.")
-        
-        points_to_add = []
-        for i, (embedding, metadata) in enumerate(zip(embeddings, metadatas)):
-            point_id = str(uuid4())
-                
-            points_to_add.append(
-                PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload=metadata
-                )
-            )
-            
-        try:
+        return [
+            PointStruct(id=point_id_for(metadata), vector=embedding, payload=metadata)
+            for embedding, metadata in zip(embeddings, metadatas)
+        ]
+
+    def _upsert_points(self, points: List[PointStruct], wait: bool):
+        with timed("qdrant_upsert_seconds", "Qdrant upsert calls", collection=self.collection_name):
             operation_info = self.client.upsert(
                 collection_name=self.collection_name,
-                wait=True,
-                points=points_to_add
+                wait=wait,
+                points=points
             )
-            if operation_info.status == UpdateStatus.COMPLETED:
-                logger.debug(f"Successfully upserted {len(points_to_add)} points to collection '{self.collection_name}'.")
-            else:
-                logger.warning(f"Upsert operation finished with status: {operation_info.status}")
+        metrics.counter("qdrant_upserted_points_total", "Points upserted into Qdrant").inc(len(points), collection=self.collection_name)
+        if operation_info.status in (UpdateStatus.COMPLETED, UpdateStatus.ACKNOWLEDGED):
+            logger.debug(f"Successfully upserted {len(points)} points to collection '{self.collection_name}' ({operation_info.status}).")
+        else:
+            logger.warning(f"Upsert operation finished with status: {operation_info.status}")
+        # counted as new: the ingestion deletes the points of a changed source before re-adding
+        # them; overwrites are rare and corrected by the periodic (or exact) stats refresh
+        self.stats.record_write(len(points))
+
+    def add_vectors(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> bool:
+        """
+        Upserts one point per (embedding, chunk) and waits until Qdrant has applied it.
+        Chunks carrying `content_hash` and `chunk_index` metadata get deterministic IDs,
+        so re-upserting them overwrites instead of duplicating. Returns False if the upsert failed.
+        """
+        if not embeddings:
+            logger.warning("No embeddings to add. Skipping.")
+            return True
+
+        points_to_add = self._build_points(embeddings, metadatas)
+        try:
+            self._upsert_points(points_to_add, wait=True)
+            return True
         except Exception as e:
             logger.error(f"Error upserting points to collection '{self.collection_name}': {e}")
-            
-    def search_vectors(self, query_embedding: List[float], k: int = 5, filter_payload: Dict = None) -> List[Tuple[float, Dict[str, Any]]]:
+            return False
+
+    def add_vectors_async(self, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> Future:
+        """
+        Like `add_vectors`, but sends the upsert from a background thread and returns a
+        Future (raising if the upsert failed). With a Qdrant server the request uses
+        wait=QDRANT_UPSERT_WAIT, so by default it completes once the batch is in Qdrant's
+        WAL. At most QDRANT_MAX_INFLIGHT_UPSERTS upserts are outstanding: beyond that the
+        call blocks, which throttles the caller. Embedded Qdrant upserts inline.
+        """
+        points_to_add = self._build_points(embeddings, metadatas)
+        if self._local or not points_to_add:
+            future: Future = Future()
+            try:
+                if points_to_add:
+                    self._upsert_points(points_to_add, wait=True)
+                future.set_result(True)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._upsert_slots.acquire()
+        try:
+            return self._get_upsert_pool().submit(self._upsert_in_flight, points_to_add)
+        except Exception:
+            self._upsert_slots.release()
+            raise
+
+    def _upsert_in_flight(self, points: List[PointStruct]) -> bool:
+        try:
+            self._upsert_points(points, wait=self._upsert_wait)
+            return True
+        finally:
+            self._upsert_slots.release()
+
+    def _get_upsert_pool(self) -> ThreadPoolExecutor:
+        with self._upsert_pool_lock:
+            if self._upsert_pool is None:
+                self._upsert_pool = ThreadPoolExecutor(
+                    max_workers=settings.QDRANT_MAX_INFLIGHT_UPSERTS,
+                    thread_name_prefix=f"qdrant-upsert-{self.collection_name}"
+                )
+            return self._upsert_pool
+
+    def close(self):
+        """Waits for the outstanding non-blocking upserts."""
+        with self._upsert_pool_lock:
+            pool, self._upsert_pool = self._upsert_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def delete_by_source(self, source_id: str) -> bool:
+        """Deletes every point whose payload `metadata.source_id` equals `source_id`."""
+        source_filter = Filter(must=[FieldCondition(key="metadata.source_id", match=MatchValue(value=source_id))])
         try:
-            search_results = self.client.search(
+            # counting only the matching points keeps the in-memory stats exact without a full count
+            deleted = self.client.count(collection_name=self.collection_name, count_filter=source_filter, exact=True).count
+            self.client.delete(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
-                query_filter=filter_payload,
-                limit=k,
-                with_payload=True, # include payload in return
-                with_vectors=False # exclude vectors in return
+                points_selector=FilterSelector(filter=source_filter),
+                wait=True
             )
+            self.stats.record_write(-deleted)
+            logger.debug(f"Deleted points of source '{source_id}' from collection '{self.collection_name}'.")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting points of source '{source_id}' from collection '{self.collection_name}': {e}")
+            return False
+            
+    def search_vectors(self, query_embedding: List[float], k: int = 5, filter_payload: Optional[Filter] = None,
+                       rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                       hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """
+        `rescore` / `oversampling` control the quantized search of quantized collections,
+        `hnsw_ef` / `exact` the HNSW search (None = collection default, see config/collection_configs.py).
+        Returns (score, point ID, payload) triples, best first.
+        """
+        try:
+            with timed("qdrant_search_seconds", "Qdrant search calls", collection=self.collection_name, kind="single"):
+                search_results = self.client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    query_filter=filter_payload,
+                    search_params=self._search_params(rescore, oversampling, hnsw_ef, exact),
+                    limit=k,
+                    with_payload=True, # include payload in return
+                    with_vectors=False # exclude vectors in return
+                )
             
             formatted_results = []
             for scored_point in search_results:
                 score = scored_point.score
                 payload = scored_point.payload
-                formatted_results.append((score, payload))
+                formatted_results.append((score, str(scored_point.id), payload))
             
             logger.debug(f"Searched for top {k} neighbors. Found {len(formatted_results)} results.")
             return formatted_results
@@ -105,13 +311,36 @@ class VectorDBManager:
             logger.error(f"Error searching in collection '{self.collection_name}': {e}")
             return []
         
-    def get_total_vectors(self) -> int:
-        try:
-            count_result = self.client.count(
-                collection_name=self.collection_name,
-                exact=True
-            )
-            return count_result.count
-        except Exception as e:
-            logger.error(f"Error counting vectors in collection '{self.collection_name}': {e}")
-            return 0
\ No newline at end of file
+    def search_vectors_batch(self, query_embeddings: List[List[float]], k: int = 5, filter_payload: Optional[Filter] = None,
+                             rescore: Optional[bool] = None, oversampling: Optional[float] = None,
+                             hnsw_ef: Optional[int] = None, exact: Optional[bool] = None) -> List[List[Tuple[float, str, Dict[str, Any]]]]:
+        """Searches many query vectors with Qdrant batch search. Returns one result list per query, in order."""
+        all_results = []
+        search_params = self._search_params(rescore, oversampling, hnsw_ef, exact)
+        batch_size = settings.SEARCH_BATCH_SIZE
+        for start in range(0, len(query_embeddings), batch_size):
+            requests = [
+                SearchRequest(
+                    vector=query_embedding,
+                    filter=filter_payload,
+                    params=search_params,
+                    limit=k,
+                    with_payload=True,
+                    with_vector=False
+                )
+                for query_embedding in query_embeddings[start:start + batch_size]
+            ]
+            try:
+                with timed("qdrant_search_seconds", "Qdrant search calls", collection=self.collection_name, kind="batch"):
+                    batch_results = self.client.search_batch(collection_name=self.collection_name, requests=requests)
+            except Exception as e:
+                logger.error(f"Error batch searching in collection '{self.collection_name}': {e}")
+                batch_results = [[] for _ in requests]
+            for search_results in batch_results:
+                all_results.append([(scored_point.score, str(scored_point.id), scored_point.payload) for scored_point in search_results])
+
+        logger.debug(f"Batch searched {len(query_embeddings)} queries for top {k} neighbors.")
+        return all_results
+
+    def _count_points(self, exact: bool) -> int:
+        return self.client.count(collection_name=self.collection_name, exact=exact).count
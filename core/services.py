@@ -0,0 +1,144 @@
+# core/services.py
+import threading
+import time
+
+from typing import Any, Dict, Optional
+from utils.logger import logger
+from config.settings import settings
+
+class WarmingUp(Exception):
+    """A request needs a component that is still loading; retry in a few seconds."""
+
+class Services:
+    """
+    Process-wide services shared by the UI and the HTTP API, built in the background.
+
+    `start()` returns at once; a warm-up thread then opens the vector store, builds the
+    IngestionService and Retriever ("storage"), and loads each model listed in
+    WARMUP_MODELS, running one tiny inference so the first real query does not pay for
+    lazy initialization. Heavy modules (qdrant_client, langchain, torch, ...) are only
+    imported by that thread. Handlers call `require(...)`, which waits up to
+    WARMUP_REQUEST_WAIT_SECONDS and then raises WarmingUp with the current state.
+    """
+    COMPONENTS = ("storage", "text", "image", "audio")
+
+    def __init__(self):
+        self.client = None
+        self.ingestion_service = None
+        self.retriever = None
+        self.status: Dict[str, str] = {name: "pending" for name in self.COMPONENTS}
+        self.errors: Dict[str, str] = {}
+        self._events = {name: threading.Event() for name in self.COMPONENTS}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+
+    def start(self) -> "Services":
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.monotonic()
+                self._thread = threading.Thread(target=self._warm_up, name="services-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _set(self, name: str, status: str, error: Optional[Exception] = None):
+        self.status[name] = status
+        if error is not None:
+            self.errors[name] = str(error)
+        if status in ("ready", "failed", "lazy"):
+            self._events[name].set()
+
+    def _warm_up(self):
+        self._set("storage", "loading")
+        try:
+            from core.retrieval.vector_db_backend import create_vector_db_client
+            from ingestions.ingestion import IngestionService
+            from core.retrieval.retriever import Retriever
+
+            # Create ONE client (QdrantClient or numpy engine) only for sharing
+            self.client = create_vector_db_client()
+            self.ingestion_service = IngestionService(client=self.client)
+            self.retriever = Retriever(client=self.client)
+            self._set("storage", "ready")
+            logger.info(f"Services ready after {time.monotonic() - self._started_at:.1f}s.")
+        except Exception as e:
+            logger.error(f"Failed to initialize services: {e}")
+            self._set("storage", "failed", e)
+            for name in self.COMPONENTS[1:]:
+                self._set(name, "failed", e)
+            return
+
+        from core.embeddings.model_registry import model_registry
+        for name in self.COMPONENTS[1:]:
+            if name not in settings.WARMUP_MODELS:
+                # loaded by the first request that needs it
+                self._set(name, "lazy")
+        for name in settings.WARMUP_MODELS:
+            if name not in self._events:
+                logger.warning(f"Unknown model in WARMUP_MODELS: {name}")
+                continue
+            self._set(name, "loading")
+            try:
+                self._warm_inference(name, model_registry.get(name))
+                self._set(name, "ready")
+            except Exception as e:
+                # requests still try to load it on demand
+                logger.error(f"Warm-up of the {name} model failed: {e}")
+                self._set(name, "failed", e)
+        logger.info(f"Warm-up finished after {time.monotonic() - self._started_at:.1f}s: {self.status}")
+
+    @staticmethod
+    def _warm_inference(name: str, embedder: Any):
+        import numpy as np
+        from config.model_configs import IMAGE_INPUT_SIZE, AUDIO_SAMPLE_RATE
+
+        sample = {
+            "text": "warm up",
+            "image": np.zeros((IMAGE_INPUT_SIZE, IMAGE_INPUT_SIZE, 3), dtype=np.uint8),
+            "audio": np.zeros(AUDIO_SAMPLE_RATE, dtype=np.float32),
+        }[name]
+        embedder.get_embeddings([sample])
+
+    def close(self):
+        """Drains the ingestion's in-flight upserts, then closes the vector store client."""
+        if self.ingestion_service is not None:
+            self.ingestion_service.close()
+        if self.client is not None:
+            self.client.close()
+
+    def is_ready(self, *components: str) -> bool:
+        return all(self._events[name].is_set() for name in (components or self.COMPONENTS))
+
+    def require(self, *components: str, timeout: Optional[float] = None):
+        """
+        Waits until `components` are warmed up (storage is always required). Raises
+        WarmingUp after `timeout` seconds, or RuntimeError if storage failed to start.
+        """
+        timeout = settings.WARMUP_REQUEST_WAIT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self._wait(components, lambda: max(0.0, deadline - time.monotonic()))
+
+    def wait_ready(self, *components: str):
+        """Like `require`, without a time limit (for background jobs, which just queue)."""
+        self._wait(components, lambda: None)
+
+    def _wait(self, components, remaining_seconds):
+        self.start()
+        for name in ("storage",) + tuple(name for name in components if name != "storage"):
+            if not self._events[name].wait(remaining_seconds()):
+                raise WarmingUp(f"The service is warming up ({self.describe()}), please retry in a few seconds.")
+        if self.status["storage"] == "failed":
+            raise RuntimeError(f"Could not initialize services: {self.errors.get('storage')}")
+
+    def describe(self) -> str:
+        return ", ".join(f"{name}: {status}" for name, status in self.status.items())
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready() and self.status["storage"] == "ready",
+            "components": dict(self.status),
+            "errors": dict(self.errors),
+            "seconds_since_start": round(time.monotonic() - self._started_at, 1) if self._started_at else None,
+        }
+
+services = Services()
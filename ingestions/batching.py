@@ -0,0 +1,92 @@
+# ingestions/batching.py
+from typing import List, Dict, Any, Optional, Callable
+
+from PIL import Image
+from utils.logger import logger
+from config.settings import settings
+
+def estimate_text_tokens(chunk: Dict[str, Any]) -> float:
+    # ~4 characters per token for English text, good enough for budgeting
+    return len(chunk["content"]) / 4 + 1
+
+def estimate_image_pixels(chunk: Dict[str, Any]) -> float:
+    if chunk.get("data") is not None:
+        # already decoded at the model input size
+        return chunk["data"].shape[0] * chunk["data"].shape[1]
+    try:
+        # Image.open only parses the header, pixels are not decoded here
+        with Image.open(chunk["content"]) as image:
+            width, height = image.size
+        return width * height
+    except Exception:
+        return 0
+
+def estimate_audio_seconds(chunk: Dict[str, Any]) -> float:
+    return chunk["metadata"].get("duration_ms", 0) / 1000
+
+class ModalityBatcher:
+    """
+    Accumulates chunks of a single modality and cuts them into embedding batches
+    bounded by an item count and a cost budget (tokens, pixels, seconds...).
+    A single chunk that exceeds the budget on its own is emitted as a batch of one.
+    """
+    def __init__(self, max_items: int, max_cost: Optional[float] = None, cost_fn: Optional[Callable[[Dict[str, Any]], float]] = None):
+        self.max_items = max(1, max_items)
+        self.max_cost = max_cost
+        self.cost_fn = cost_fn
+        self._chunks: List[Dict[str, Any]] = []
+        self._cost = 0.0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, chunk: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """Adds a chunk and returns the batches that became full (possibly none)."""
+        ready = []
+        cost = self.cost_fn(chunk) if (self.cost_fn and self.max_cost) else 0.0
+
+        if self._chunks and self.max_cost and self._cost + cost > self.max_cost:
+            ready.append(self.flush())
+
+        self._chunks.append(chunk)
+        self._cost += cost
+
+        if len(self._chunks) >= self.max_items or (self.max_cost and self._cost >= self.max_cost):
+            ready.append(self.flush())
+        return ready
+
+    def flush(self) -> List[Dict[str, Any]]:
+        batch, self._chunks, self._cost = self._chunks, [], 0.0
+        return batch
+
+def create_batchers() -> Dict[str, ModalityBatcher]:
+    return {
+        "text": ModalityBatcher(settings.TEXT_EMBED_BATCH_SIZE, settings.TEXT_EMBED_BATCH_MAX_TOKENS, estimate_text_tokens),
+        "image": ModalityBatcher(settings.IMAGE_EMBED_BATCH_SIZE, settings.IMAGE_EMBED_BATCH_MAX_PIXELS, estimate_image_pixels),
+        "audio": ModalityBatcher(settings.AUDIO_EMBED_BATCH_SIZE, settings.AUDIO_EMBED_BATCH_MAX_SECONDS, estimate_audio_seconds),
+    }
+
+def embed_with_isolation(embedder: Any, contents: List[Any]) -> List[List[float]]:
+    """
+    Embeds `contents` in one forward pass. If the batch fails, or some items come back
+    empty, those items are retried one by one so a single bad item cannot drop the rest.
+    Returns one embedding per input (an empty list for items that still failed).
+    """
+    try:
+        embeddings = embedder.get_embeddings(contents)
+        if len(embeddings) != len(contents):
+            raise ValueError(f"embedder returned {len(embeddings)} embeddings for {len(contents)} inputs")
+    except Exception as e:
+        logger.warning(f"Batch embedding of {len(contents)} items failed ({e}). Retrying items individually...")
+        embeddings = [[] for _ in contents]
+
+    if len(contents) > 1:
+        for i, embedding in enumerate(embeddings):
+            if embedding:
+                continue
+            try:
+                single = embedder.get_embeddings([contents[i]])
+                embeddings[i] = single[0] if single else []
+            except Exception as e:
+                logger.warning(f"Embedding failed for item {i} of batch: {e}")
+    return embeddings
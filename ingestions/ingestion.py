@@ -1,67 +1,334 @@
 # core/ingestion/ingestion_service.py
+import io
 import os
-from typing import List, Optional, Callable
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Union
 
 from utils.logger import logger
-from qdrant_client import QdrantClient
+from config.settings import settings
 
 from core.data_processing.text_processor import TextProcessor
 from core.data_processing.audio_processor import AudioProcessor
 from core.data_processing.image_processor import ImageProcessor
 
-from core.embeddings.text_embedding_model import TextEmbeddingModel
-from core.embeddings.image_embedding_model import ImageEmbeddingModel
-from core.embeddings.audio_embedding_model import AudioEmbeddingModel
+from core.embeddings.model_registry import model_registry
+from core.embeddings.embedding_cache import EmbeddingCache
+from core.embeddings.onnx_backend import backend_tag
+from config.model_configs import (
+    TEXT_EMBEDDING_DIM, IMAGE_EMBEDDING_DIM, AUDIO_EMBEDDING_DIM,
+    TEXT_EMBEDDING_MODEL, IMAGE_EMBEDDING_MODEL, AUDIO_EMBEDDING_MODEL, EMBEDDING_PIPELINE_VERSION
+)
 
-from core.retrieval.vector_db_manager import VectorDBManager
+from core.retrieval.vector_db_backend import BaseVectorDBManager, create_vector_db_manager, point_id_for
+from core.retrieval.docstore import get_docstore, split_payload
+from ingestions.batching import embed_with_isolation
+from ingestions.pipeline import IngestionPipeline, UnsupportedSource
+from ingestions.manifest import IngestionManifest
+from ingestions.sources import FileSource, ZipMemberSource, iter_zip_sources
+from utils.hashing import file_content_hash, bytes_content_hash
+from utils.metrics import metrics, timed
 
 class IngestionService:
-    def __init__(self, client: QdrantClient):
-        logger.info("Initializing IngestionService (Stateless)...")
+    def __init__(self, client: Any):
+        logger.info("Initializing IngestionService...")
         
         self.client = client
+        self.manifest = IngestionManifest()
+        self._pending_manifest: Dict[str, Dict[str, Any]] = {}
+        # type of every source whose chunks were produced in the current run, to purge the failed ones
+        self._started_sources: Dict[str, str] = {}
+        # one ingestion run at a time (UI uploads and API jobs share this service)
+        self._ingest_lock = threading.Lock()
+        self.embedding_cache = EmbeddingCache() if settings.EMBEDDING_CACHE_ENABLED else None
+        # chunk contents live in the DocStore, vector payloads stay small
+        self.docstore = get_docstore()
         
         self.text_processor = TextProcessor()
         self.image_processor = ImageProcessor()
         self.audio_processor = AudioProcessor()
         
-        self.text_embedder = TextEmbeddingModel()
-        self.image_embedder = ImageEmbeddingModel()
-        self.audio_embedder = AudioEmbeddingModel()
-        
-        text_embedding_dim = self.text_embedder.model.get_sentence_embedding_dimension()
-        self.text_db_manager = VectorDBManager(
+        # Embedding models are shared with the Retriever and loaded on first use
+        self.text_db_manager = create_vector_db_manager(
             client=self.client,
             collection_name="text_collection",
-            embedding_dim=text_embedding_dim
+            embedding_dim=TEXT_EMBEDDING_DIM
         )
         
-        image_embedding_dim = self.image_embedder.model.config.hidden_size 
-        self.image_vector_db_manager = VectorDBManager(
+        self.image_vector_db_manager = create_vector_db_manager(
             client=self.client,
             collection_name="image_collection", 
-            embedding_dim=image_embedding_dim
+            embedding_dim=IMAGE_EMBEDDING_DIM
         )
         
-        audio_embedding_dim = self.audio_embedder.model.config.projection_dim
-        self.audio_vector_db_manager = VectorDBManager(
+        self.audio_vector_db_manager = create_vector_db_manager(
             client=self.client,
             collection_name="audio_collection", 
-            embedding_dim=audio_embedding_dim
+            embedding_dim=AUDIO_EMBEDDING_DIM
         )
         
         logger.info("IngestionService initialized successfully.")
 
+    @property
+    def text_embedder(self):
+        return model_registry.get("text")
+
+    @property
+    def image_embedder(self):
+        return model_registry.get("image")
+
+    @property
+    def audio_embedder(self):
+        return model_registry.get("audio")
+
+    def _db_manager_for(self, chunk_type: str) -> BaseVectorDBManager:
+        return {
+            "text": self.text_db_manager,
+            "image": self.image_vector_db_manager,
+            "audio": self.audio_vector_db_manager,
+        }[chunk_type]
+
+    def close(self):
+        """Waits for the outstanding non-blocking upserts and stops the upsert threads."""
+        for chunk_type in ("text", "image", "audio"):
+            self._db_manager_for(chunk_type).close()
+
+    def _embedding_params(self, chunk_type: str, backend: str) -> str:
+        """Preprocessing parameters that change the embedding of a chunk, part of the cache key."""
+        params = f"pipeline=v{EMBEDDING_PIPELINE_VERSION}"
+        if backend != "torch":
+            # ONNX / int8 embeddings are close to, but not bit-identical with, the PyTorch ones
+            params += f";backend={backend}"
+        if chunk_type == "image":
+            params += f";fast_decode={settings.IMAGE_FAST_DECODE}"
+        if chunk_type == "audio":
+            params += (f";min_silence_len={self.audio_processor.min_silence_len}"
+                       f";silence_thresh_db={self.audio_processor.silence_thresh_db}"
+                       f";keep_silence={self.audio_processor.keep_silence}"
+                       f";hysteresis_db={self.audio_processor.hysteresis_db}"
+                       f";max_segment_ms={self.audio_processor.max_segment_ms}"
+                       f";target_sr={self.audio_processor.target_sr}")
+        return params
+
+    @staticmethod
+    def _content_key(chunk_type: str, chunk_data: Dict[str, Any]) -> str:
+        metadata = chunk_data["metadata"]
+        if chunk_type == "text":
+            return bytes_content_hash(chunk_data["content"].encode("utf-8"))
+        if chunk_type == "image":
+            return metadata.get("content_hash") or file_content_hash(chunk_data["content"])
+        # audio segments are identified by their source file and position in it
+        return f"{metadata.get('content_hash')}:{metadata.get('start_ms')}-{metadata.get('end_ms')}"
+
+    def _embed_batch(self, chunk_type: str, batch: List[Dict[str, Any]]) -> List[List[float]]:
+        """
+        Embeds a batch of chunks of one modality. Returns one embedding per chunk ([] on failure).
+        Embeddings already in the persistent cache are reused, only misses reach the model.
+        """
+        model_name = self._model_version_for(chunk_type)
+        # backend the model runs on (an ONNX setup may have fallen back to PyTorch)
+        params = self._embedding_params(chunk_type, model_registry.backend_of(chunk_type))
+        dim = {"text": TEXT_EMBEDDING_DIM, "image": IMAGE_EMBEDDING_DIM, "audio": AUDIO_EMBEDDING_DIM}[chunk_type]
+
+        if self.embedding_cache is not None:
+            keys = [self._content_key(chunk_type, chunk_data) for chunk_data in batch]
+            embeddings = self.embedding_cache.get_many(model_name, params, keys, dim)
+        else:
+            keys = []
+            embeddings = [None] * len(batch)
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
+        embedder = {
+            "text": self.text_embedder,
+            "image": self.image_embedder,
+            "audio": self.audio_embedder,
+        }[chunk_type]
+        # in-memory data (decoded audio samples) is preferred over re-reading the file
+        computed = embed_with_isolation(embedder, [batch[i].get('data', batch[i]['content']) for i in missing])
+        for i, embedding in zip(missing, computed):
+            embeddings[i] = embedding
+
+        if self.embedding_cache is not None:
+            # stored under the backend of the instance that computed them
+            params = self._embedding_params(chunk_type, backend_tag(embedder))
+            self.embedding_cache.put_many(model_name, params, [keys[i] for i in missing], computed)
+        return embeddings
+
     def ingest_files(self, file_paths: List[str]):
         '''Ingest files without displaying progress bar'''
         return self.ingest_files_with_progress(file_paths, None)
     
-    def ingest_files_with_progress(self, file_paths: List[str], progress_callback: Optional[Callable] = None):
+    @staticmethod
+    def _chunk_type_for(file_path: str) -> Optional[str]:
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext in ['.txt']:
+            return "text"
+        elif file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif']:
+            return "image"
+        elif file_ext in ['.wav', '.mp3']:
+            return "audio"
+        return None
+
+    @staticmethod
+    def _model_version_for(chunk_type: str) -> str:
+        model_name = {
+            "text": TEXT_EMBEDDING_MODEL,
+            "image": IMAGE_EMBEDDING_MODEL,
+            "audio": AUDIO_EMBEDDING_MODEL,
+        }[chunk_type]
+        return f"{model_name}@v{EMBEDDING_PIPELINE_VERSION}"
+
+    def _process_source(self, source: Union[FileSource, ZipMemberSource]) -> Optional[Iterable[Dict[str, Any]]]:
         """
-        Turn on progress bar for tracking
+        Parses one source (file on disk or ZIP member) into chunks, yielded as they are
+        produced. Returns None when the manifest shows it is already ingested with the same
+        content and model version. When the source changed, or a previous run failed on it,
+        its old points are deleted first. Raises UnsupportedSource for unknown file types.
+        """
+        chunk_type = self._chunk_type_for(source.name)
+        if chunk_type is None:
+            raise UnsupportedSource(f"Unsupported file type '{os.path.splitext(source.name)[1].lower()}' for file: {source}")
+
+        source_id = source.source_id
+        model_version = self._model_version_for(chunk_type)
+        entry = self.manifest.get(source_id)
+
+        if entry and entry.get("model_version") == model_version:
+            # cheap check first: same size and mtime means the file was not touched
+            if entry.get("size") == source.size and entry.get("mtime") == source.mtime:
+                logger.debug(f"Skipping unchanged file: {source_id}")
+                metrics.counter("ingest_sources_total", "Sources seen by the ingestion pipeline").inc(modality=chunk_type, status="unchanged")
+                return None
+
+        # text is split straight from memory, or streamed a second time when it is large;
+        # images and audio need a file on disk
+        data = None
+        with timed("ingest_read_seconds", "Reading (and extracting) a source file and hashing it", modality=chunk_type):
+            if chunk_type == "text":
+                if source.size <= settings.TEXT_STREAM_MIN_BYTES:
+                    data, content_hash = source.read_bytes()
+                else:
+                    content_hash = source.content_hash()
+            else:
+                local_path, content_hash = source.local_path()
+
+        if entry and entry.get("model_version") == model_version and entry.get("content_hash") == content_hash:
+            logger.debug(f"Skipping unchanged file (same content): {source_id}")
+            metrics.counter("ingest_sources_total", "Sources seen by the ingestion pipeline").inc(modality=chunk_type, status="unchanged")
+            self.manifest.set(source_id, {**entry, "size": source.size, "mtime": source.mtime})
+            return None
+
+        if entry:
+            if entry.get("status") == "failed":
+                logger.info(f"Previous ingestion of this file failed, replacing its points: {source_id}")
+            else:
+                logger.info(f"File changed since last ingestion, replacing its points: {source_id}")
+            self._db_manager_for(entry.get("type", chunk_type)).delete_by_source(source_id)
+            if self.docstore is not None:
+                self.docstore.delete_source(source_id)
+            self.manifest.remove(source_id)
+
+        self._started_sources[source_id] = chunk_type
+        if chunk_type == "text":
+            chunks = self.text_processor.iter_file_chunks((lambda: io.BytesIO(data)) if data is not None else source.open, source.name, source_id=source_id)
+        elif chunk_type == "image":
+            chunks = self.image_processor.process(local_path, source_id=source_id)
+        else:
+            chunks = self.audio_processor.process(local_path, source_id=source_id, content_hash=content_hash)
+        return self._annotate_chunks(source, chunk_type, content_hash, model_version, chunks)
+
+    def _annotate_chunks(self, source: Union[FileSource, ZipMemberSource], chunk_type: str, content_hash: str,
+                         model_version: str, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Adds the manifest fields to each chunk; the source is queued for the manifest once all of its chunks are out."""
+        chunk_index = 0
+        # Unix seconds, filterable (SearchFilters.ingested_after / ingested_before)
+        ingested_at = int(time.time())
+        for chunk_data in chunks:
+            chunk_data["metadata"]["content_hash"] = content_hash
+            chunk_data["metadata"]["chunk_index"] = chunk_index
+            chunk_data["metadata"]["ingested_at"] = ingested_at
+            chunk_index += 1
+            yield chunk_data
+
+        metrics.counter("ingest_sources_total", "Sources seen by the ingestion pipeline").inc(
+            modality=chunk_type, status="parsed" if chunk_index else "failed"
+        )
+        metrics.counter("ingest_chunks_total", "Chunks produced by the processors").inc(chunk_index, modality=chunk_type)
+        if chunk_index:
+            self._pending_manifest[source.source_id] = {
+                "content_hash": content_hash,
+                "size": source.size,
+                "mtime": source.mtime,
+                "model_version": model_version,
+                "type": chunk_type,
+                "num_chunks": chunk_index,
+            }
+
+    def _upsert(self, chunk_type: str, embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> Future:
+        # in-memory data is only needed for embedding, it is never stored
+        payloads = [{key: value for key, value in chunk_data.items() if key != 'data'} for chunk_data in metadatas]
+        if self.docstore is not None:
+            # documents first, so a point found by a search always has its document
+            doc_ids = [point_id_for(chunk_data) for chunk_data in payloads]
+            self.docstore.put_many(list(zip(doc_ids, payloads)))
+            payloads = [split_payload(chunk_data, doc_id) for chunk_data, doc_id in zip(payloads, doc_ids)]
+        # non-blocking: the pipeline collects the result while the next batches are embedded
+        return self._db_manager_for(chunk_type).add_vectors_async(embeddings, payloads)
+
+    def _purge_failed_source(self, source_id: str):
+        """
+        Deletes the points and documents a failed source got before failing, so a partial
+        source is never searchable. When that fails too, a "failed" manifest entry is kept:
+        the next run sees an entry that does not match and deletes the points first.
+        """
+        chunk_type = self._started_sources[source_id]
+        purged = self._db_manager_for(chunk_type).delete_by_source(source_id)
+        if self.docstore is not None:
+            try:
+                self.docstore.delete_source(source_id)
+            except Exception as e:
+                logger.error(f"Error deleting the documents of failed source '{source_id}': {e}")
+                purged = False
+        if purged:
+            logger.warning(f"Ingestion of '{source_id}' failed, its saved chunks were removed. It is retried next time.")
+            self.manifest.remove(source_id)
+        else:
+            self.manifest.set(source_id, {"status": "failed", "type": chunk_type})
+
+    def _parse_source(self, source: Union[str, FileSource, ZipMemberSource]) -> Optional[Iterable[Dict[str, Any]]]:
+        if isinstance(source, str):
+            source = FileSource(source)
+        return self._process_source(source)
+
+    def ingest_files_with_progress(self, file_paths: List[str], progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Turn on progress bar for tracking.
+        Parsing, embedding and upserting run concurrently (see IngestionPipeline).
+        Returns the pipeline statistics.
         """
         logger.info(f"Starting ingestion for {len(file_paths)} files...")
-        
+        return self._ingest_sources(file_paths, len(file_paths), progress_callback)
+
+    def ingest_zip_with_progress(self, zip_path: str, progress_callback: Optional[Callable] = None, extract_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ingests an uploaded ZIP archive without extracting it first: members are read from
+        the archive and fed to the pipeline one by one, so embedding starts with the first
+        member. Text is split straight from the archive; images and audio are written to
+        `extract_dir` (RAW_DATA_DIR by default) since results are displayed from there.
+        Raises zipfile.BadZipFile for invalid archives.
+        """
+        with zipfile.ZipFile(zip_path, "r") as zip_file:
+            total_members = sum(1 for info in zip_file.infolist() if not info.is_dir())
+            logger.info(f"Starting streaming ingestion of {total_members} files from {zip_path}...")
+            sources = iter_zip_sources(zip_file, extract_dir or settings.RAW_DATA_DIR)
+            return self._ingest_sources(sources, total_members, progress_callback)
+
+    def _ingest_sources(self, sources: Iterable[Any], total_sources: int, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
         # Kiểm tra và xử lý progress_callback an toàn
         def safe_progress(value, desc=""):
             try:
@@ -70,159 +337,51 @@ class IngestionService:
             except Exception as e:
                 logger.warning(f"Progress callback error: {e}")
         
+        if not self._ingest_lock.acquire(blocking=False):
+            safe_progress(0.4, desc="Waiting for another ingestion to finish...")
+            self._ingest_lock.acquire()
+        try:
+            return self._run_pipeline(sources, total_sources, safe_progress)
+        finally:
+            self._ingest_lock.release()
+
+    def _run_pipeline(self, sources: Iterable[Any], total_sources: int, safe_progress: Callable) -> Dict[str, Any]:
         safe_progress(0.4, desc="Starting file processing...")
         
-        all_chunks_to_process = []
-        
-        # 1. Walk through files to split chunks
-        for i, file_path in enumerate(file_paths):
-            try:
-                base_progress = 0.4 + (i / len(file_paths)) * 0.3  # 40% -> 70%
-                file_name = os.path.basename(file_path)
-                
-                safe_progress(base_progress, desc=f"Processing file {i+1}/{len(file_paths)}: {file_name}")
-                
-                file_ext = os.path.splitext(file_path)[1].lower()
-                chunks = []
-                
-                safe_progress(base_progress + 0.01, desc=f"Reading {file_name}...")
-                
-                if file_ext in ['.txt']:
-                    chunks = self.text_processor.process(file_path)
-                elif file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif']:
-                    chunks = self.image_processor.process(file_path)
-                elif file_ext in ['.wav', '.mp3']:
-                    chunks = self.audio_processor.process(file_path)
-                else:
-                    logger.warning(f"Unsupported file type '{file_ext}' for file: {file_path}. Skipping.")
-                    continue
-                
-                # Kiểm tra chunks có hợp lệ không
-                if not chunks or len(chunks) == 0:
-                    logger.warning(f"No chunks generated from file: {file_path}")
-                    continue
-                
-                safe_progress(base_progress + 0.02, desc=f"Generated {len(chunks)} chunks from {file_name}")
-                all_chunks_to_process.extend(chunks)
-                
-            except Exception as e:
-                logger.error(f"Error processing file {file_path}: {e}")
-                continue
-        
-        if not all_chunks_to_process:
-            logger.warning("No processable chunks were generated from the provided files.")
-            safe_progress(1.0, desc="No chunks to process")
-            return
-
-        logger.info(f"Generated {len(all_chunks_to_process)} total chunks. Now generating embeddings...")
+        self._pending_manifest = {}
+        self._started_sources = {}
+        pipeline = IngestionPipeline(
+            parse_fn=self._parse_source,
+            embed_fn=self._embed_batch,
+            upsert_fn=self._upsert
+        )
+        stats = pipeline.run(
+            sources,
+            total_sources=total_sources,
+            progress_callback=lambda value, desc: safe_progress(0.4 + value * 0.59, desc=desc)  # 40% -> 99%
+        )
         
-        safe_progress(0.7, desc=f"Generated {len(all_chunks_to_process)} chunks. Starting embeddings...")
-
-        # 2. Create embeddings and add to batch
-        text_embeddings_batch, text_metadatas_batch = [], []
-        audio_embeddings_batch, audio_metadatas_batch = [], []
-        image_embeddings_batch, image_metadatas_batch = [], []
-        BATCH_SIZE = 32
-
-        for i, chunk_data in enumerate(all_chunks_to_process):
-            try:
-                base_progress = 0.7 + (i / len(all_chunks_to_process)) * 0.25  # 70% -> 95%
-                
-                # Kiểm tra chunk_data có hợp lệ không
-                if not chunk_data or 'metadata' not in chunk_data or 'content' not in chunk_data:
-                    logger.warning(f"Invalid chunk data at index {i}, skipping...")
-                    continue
-                
-                chunk_type = chunk_data['metadata'].get('type', 'unknown')
-                content = chunk_data['content']
-                chunk_id = chunk_data['metadata'].get('chunk_id', f'chunk_{i}')
-                
-                # Kiểm tra content có hợp lệ không
-                if not content:
-                    logger.warning(f"Empty content for chunk {chunk_id}, skipping...")
-                    continue
-                
-                safe_progress(base_progress, desc=f"Processing chunk {i+1}/{len(all_chunks_to_process)} ({chunk_type})")
-                
-                if chunk_type == "text":
-                    safe_progress(base_progress + 0.001, desc=f"Creating text embedding for chunk {i+1}")
-                    embeddings = self.text_embedder.get_embeddings([content])
-                    if embeddings and len(embeddings) > 0:
-                        text_embeddings_batch.append(embeddings[0])
-                        text_metadatas_batch.append(chunk_data)
-                    else:
-                        logger.warning(f"Failed to generate text embedding for chunk {chunk_id}")
-                        
-                elif chunk_type == "audio":
-                    safe_progress(base_progress + 0.001, desc=f"Creating audio embedding for chunk {i+1}")
-                    embeddings = self.audio_embedder.get_embeddings([content])
-                    if embeddings and len(embeddings) > 0:
-                        audio_embeddings_batch.append(embeddings[0])
-                        audio_metadatas_batch.append(chunk_data)
-                    else:
-                        logger.warning(f"Failed to generate audio embedding for chunk {chunk_id}")
-                        
-                elif chunk_type == "image":
-                    safe_progress(base_progress + 0.001, desc=f"Creating image embedding for chunk {i+1}")
-                    embeddings = self.image_embedder.get_embeddings([content])
-                    if embeddings and len(embeddings) > 0:
-                        image_embeddings_batch.append(embeddings[0])
-                        image_metadatas_batch.append(chunk_data)
-                    else:
-                        logger.warning(f"Failed to generate image embedding for chunk {chunk_id}")
-
-                # add batch when reaching BATCH_SIZE
-                if len(text_embeddings_batch) >= BATCH_SIZE:
-                    safe_progress(base_progress + 0.002, desc=f"Saving batch of {len(text_embeddings_batch)} text embeddings...")
-                    self.text_db_manager.add_vectors(text_embeddings_batch, text_metadatas_batch)
-                    text_embeddings_batch, text_metadatas_batch = [], []
-                    
-                if len(audio_embeddings_batch) >= BATCH_SIZE:
-                    safe_progress(base_progress + 0.002, desc=f"Saving batch of {len(audio_embeddings_batch)} audio embeddings...")
-                    self.audio_vector_db_manager.add_vectors(audio_embeddings_batch, audio_metadatas_batch)
-                    audio_embeddings_batch, audio_metadatas_batch = [], []
-                    
-                if len(image_embeddings_batch) >= BATCH_SIZE:
-                    safe_progress(base_progress + 0.002, desc=f"Saving batch of {len(image_embeddings_batch)} image embeddings...")
-                    self.image_vector_db_manager.add_vectors(image_embeddings_batch, image_metadatas_batch)
-                    image_embeddings_batch, image_metadatas_batch = [], []
-                    
-            except Exception as e:
-                logger.error(f"Error ingesting chunk {i}: {e}")
-                continue
-
-        safe_progress(0.95, desc="Saving final batches...")
-
-        # adding maintaining embeddings
-        final_operations = []
-        if text_embeddings_batch:
-            final_operations.append(("text", len(text_embeddings_batch)))
-        if audio_embeddings_batch:
-            final_operations.append(("audio", len(audio_embeddings_batch)))
-        if image_embeddings_batch:
-            final_operations.append(("image", len(image_embeddings_batch)))
+        # only sources whose every chunk was saved are recorded, the others are purged and retried next time
+        failed_sources = set(stats["failed_sources"])
+        for source_id, entry in self._pending_manifest.items():
+            if source_id not in failed_sources:
+                self.manifest.set(source_id, entry)
+        for source_id in failed_sources:
+            self._purge_failed_source(source_id)
+        self.manifest.save()
         
-        # Tránh chia cho 0
-        total_operations = len(final_operations)
-        if total_operations == 0:
-            safe_progress(1.0, desc="No final batches to save")
-        else:
-            for i, (batch_type, count) in enumerate(final_operations):
-                try:
-                    current_progress = 0.95 + (i / total_operations) * 0.04  # 95% -> 99%
-                    
-                    if batch_type == "text" and text_embeddings_batch:
-                        safe_progress(current_progress, desc=f"Saving final {count} text embeddings...")
-                        self.text_db_manager.add_vectors(text_embeddings_batch, text_metadatas_batch)
-                    elif batch_type == "audio" and audio_embeddings_batch:
-                        safe_progress(current_progress, desc=f"Saving final {count} audio embeddings...")
-                        self.audio_vector_db_manager.add_vectors(audio_embeddings_batch, audio_metadatas_batch)
-                    elif batch_type == "image" and image_embeddings_batch:
-                        safe_progress(current_progress, desc=f"Saving final {count} image embeddings...")
-                        self.image_vector_db_manager.add_vectors(image_embeddings_batch, image_metadatas_batch)
-                except Exception as e:
-                    logger.error(f"Error saving final batch {batch_type}: {e}")
+        if not stats["chunks"]:
+            if stats["files_skipped"]:
+                logger.info(f"All {stats['files_skipped']} files are unchanged since the last ingestion.")
+                safe_progress(1.0, desc=f"✅ {stats['files_skipped']} files already up to date")
+            else:
+                logger.warning("No processable chunks were generated from the provided files.")
+                safe_progress(1.0, desc="No chunks to process")
+            return stats
         
-        safe_progress(1.0, desc=f"✅ Successfully ingested {len(file_paths)} files with {len(all_chunks_to_process)} chunks!")
+        safe_progress(1.0, desc=f"✅ Successfully ingested {stats['files_parsed']} files with {stats['upserted']} chunks "
+                                f"({stats['files_skipped']} unchanged files skipped)!")
         
-        logger.success(f"Successfully completed ingestion for {len(file_paths)} files.")
\ No newline at end of file
+        logger.success(f"Successfully completed ingestion for {total_sources} files "
+                       f"({stats['upserted']}/{stats['chunks']} chunks saved in {stats['wall_seconds']:.1f}s).")
+        return stats
@@ -0,0 +1,62 @@
+# ingestions/manifest.py
+import json
+import os
+import threading
+
+from typing import Dict, Any, Optional
+from utils.logger import logger
+from config.settings import settings
+
+class IngestionManifest:
+    """
+    Record of every ingested source file, keyed by source_id:
+        {"content_hash", "size", "mtime", "model_version", "type", "num_chunks"}
+    Used to skip unchanged files and to find the points of changed ones.
+    Persisted as JSON next to the processed data.
+    """
+    def __init__(self, manifest_path: Optional[str] = None):
+        self.manifest_path = manifest_path or os.path.join(settings.METADATA_DIR, "ingestion_manifest.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded ingestion manifest with {len(self._entries)} sources from {self.manifest_path}")
+        except Exception as e:
+            logger.error(f"Could not read ingestion manifest {self.manifest_path}: {e}. Starting from an empty one.")
+            self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, source_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(source_id)
+            return dict(entry) if entry else None
+
+    def set(self, source_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[source_id] = dict(entry)
+
+    def remove(self, source_id: str):
+        with self._lock:
+            self._entries.pop(source_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._entries, indent=2, ensure_ascii=False)
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        # write then rename, so a crash never leaves a truncated manifest behind
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
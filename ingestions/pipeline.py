@@ -0,0 +1,303 @@
+# ingestions/pipeline.py
+import collections
+import queue
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterable
+from utils.logger import logger
+from config.settings import settings
+from ingestions.batching import create_batchers
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+class PipelineAborted(Exception):
+    pass
+
+class UnsupportedSource(Exception):
+    """Raised by `parse_fn` for sources it cannot handle (e.g. unknown file types); counted apart from failures."""
+    pass
+
+class IngestionPipeline:
+    """
+    Streaming ingestion with three concurrent stages connected by bounded queues:
+
+        parse (worker pool) --chunks--> embed (1 thread) --embeddings--> upsert (1 thread)
+
+    Chunks flow through as soon as a file is parsed, so peak memory is bounded by the
+    queue sizes instead of the dataset size, and Qdrant upserts overlap with the next
+    batch's inference.
+    """
+    def __init__(
+        self,
+        parse_fn: Callable[[Any], Optional[Iterable[Dict[str, Any]]]],
+        embed_fn: Callable[[str, List[Dict[str, Any]]], List[List[float]]],
+        upsert_fn: Callable[[str, List[List[float]], List[Dict[str, Any]]], Optional[Future]],
+        parse_workers: Optional[int] = None,
+        chunk_queue_size: Optional[int] = None,
+        upsert_queue_size: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+    ):
+        self.parse_fn = parse_fn
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.parse_workers = parse_workers or settings.INGEST_PARSE_WORKERS
+        self.chunk_queue_size = chunk_queue_size or settings.INGEST_CHUNK_QUEUE_SIZE
+        self.upsert_queue_size = upsert_queue_size or settings.INGEST_UPSERT_QUEUE_SIZE
+        self.upsert_batch_size = upsert_batch_size or settings.UPSERT_BATCH_SIZE
+
+    def run(self, sources: Iterable[Any], total_sources: Optional[int] = None, progress_callback: Optional[Callable[[float, str], None]] = None) -> Dict[str, Any]:
+        """
+        Runs the pipeline over `sources` (anything `parse_fn` accepts, usually file paths)
+        and blocks until every chunk is saved. `parse_fn` returns the chunks of a source (a
+        list or a generator), or None when the source is intentionally skipped, and raises
+        UnsupportedSource for sources it cannot handle. `progress_callback(value, desc)`
+        is always invoked from the calling thread, with values from 0.0 to 1.0.
+        """
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "files_parsed": 0, "files_skipped": 0, "files_unsupported": 0, "files_failed": 0, "chunks": 0,
+            "embedded": 0, "embed_failed": 0, "upserted": 0,
+            "parse_seconds": 0.0, "embed_seconds": 0.0, "upsert_seconds": 0.0,
+        }
+        self._failed_sources = set()
+        self._total_sources = total_sources
+        self._sources_submitted = 0
+
+        chunk_queue: "queue.Queue" = queue.Queue(maxsize=self.chunk_queue_size)
+        upsert_queue: "queue.Queue" = queue.Queue(maxsize=self.upsert_queue_size)
+
+        start_time = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._guard, args=(self._parse_stage, sources, chunk_queue), name="ingest-parse", daemon=True),
+            threading.Thread(target=self._guard, args=(self._embed_stage, chunk_queue, upsert_queue), name="ingest-embed", daemon=True),
+            threading.Thread(target=self._guard, args=(self._upsert_stage, upsert_queue), name="ingest-upsert", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        last_progress = 0.0
+        while any(thread.is_alive() for thread in threads):
+            threads[-1].join(timeout=0.25)
+            if progress_callback is not None:
+                value, desc = self._progress()
+                last_progress = max(last_progress, value)
+                progress_callback(last_progress, desc)
+
+        self.stats["wall_seconds"] = time.perf_counter() - start_time
+        if self._errors:
+            raise self._errors[0]
+        stats = dict(self.stats)
+        stats["failed_sources"] = sorted(self._failed_sources)
+        return stats
+
+    # --- helpers ---
+    def _guard(self, stage: Callable, *args):
+        try:
+            stage(*args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            logger.error(f"Ingestion pipeline stage '{threading.current_thread().name}' failed: {e}")
+            self._errors.append(e)
+            self._abort.set()
+
+    def _put(self, q: "queue.Queue", item: Any):
+        # bounded put that gives up when another stage has failed, so no stage blocks forever
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: "queue.Queue") -> Any:
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _add_stats(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _mark_failed(self, chunks: List[Dict[str, Any]]):
+        with self._stats_lock:
+            for chunk_data in chunks:
+                source_id = chunk_data.get('metadata', {}).get('source_id')
+                if source_id:
+                    self._failed_sources.add(source_id)
+
+    def _progress(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        total = self._total_sources or max(self._sources_submitted, 1)
+        done_files = stats["files_parsed"] + stats["files_skipped"] + stats["files_unsupported"] + stats["files_failed"]
+        parsed_fraction = min(done_files / total, 1.0)
+        saved_fraction = (stats["upserted"] + stats["embed_failed"]) / stats["chunks"] if stats["chunks"] else 0.0
+        value = parsed_fraction * min(saved_fraction, 1.0)
+        desc = (f"Parsed {done_files}/{total} files | "
+                f"embedded {stats['embedded']}/{stats['chunks']} chunks | saved {stats['upserted']}")
+        return value, desc
+
+    # --- stages ---
+    def _parse_stage(self, sources: Iterable[Any], chunk_queue: "queue.Queue"):
+        # at most 2 files per worker in flight, so parsing cannot run far ahead of embedding
+        in_flight = threading.BoundedSemaphore(self.parse_workers * 2)
+
+        def parse_one(source: Any):
+            try:
+                n_chunks = 0
+                last_chunk = None
+                failed = False
+                parse_seconds = 0.0
+                start_time = time.perf_counter()
+                try:
+                    chunks = self.parse_fn(source)
+                    if chunks is None:
+                        self._add_stats(files_skipped=1, parse_seconds=time.perf_counter() - start_time)
+                        return
+                    # generators are consumed lazily: chunks are queued while the source is still being parsed
+                    for chunk_data in chunks:
+                        parse_seconds += time.perf_counter() - start_time
+                        self._put(chunk_queue, chunk_data)
+                        self._add_stats(chunks=1)
+                        n_chunks += 1
+                        last_chunk = chunk_data
+                        start_time = time.perf_counter()
+                except PipelineAborted:
+                    raise
+                except UnsupportedSource as e:
+                    logger.warning(f"{e}. Skipping.")
+                    self._add_stats(files_unsupported=1, parse_seconds=time.perf_counter() - start_time)
+                    return
+                except Exception as e:
+                    logger.error(f"Error processing file {source}: {e}")
+                    if last_chunk is not None:
+                        # chunks already queued must not get the source recorded as ingested
+                        self._mark_failed([last_chunk])
+                    failed = True
+                self._add_stats(parse_seconds=parse_seconds + time.perf_counter() - start_time)
+
+                if failed or not n_chunks:
+                    if not failed:
+                        logger.warning(f"No chunks generated from file: {source}")
+                    self._add_stats(files_failed=1)
+                    return
+                self._add_stats(files_parsed=1)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="ingest-parse-worker") as pool:
+            futures = []
+            for source in sources:
+                while not in_flight.acquire(timeout=0.1):
+                    if self._abort.is_set():
+                        raise PipelineAborted()
+                self._sources_submitted += 1
+                futures.append(pool.submit(parse_one, source))
+            for future in futures:
+                future.result()
+        self._put(chunk_queue, _DONE)
+
+    def _embed_stage(self, chunk_queue: "queue.Queue", upsert_queue: "queue.Queue"):
+        batchers = create_batchers()
+        pending = {chunk_type: ([], []) for chunk_type in batchers}
+
+        def embed(chunk_type: str, batch: List[Dict[str, Any]]):
+            start_time = time.perf_counter()
+            try:
+                embeddings = self.embed_fn(chunk_type, batch)
+            except Exception as e:
+                logger.error(f"Error embedding {chunk_type} batch of {len(batch)} chunks: {e}")
+                embeddings = [[] for _ in batch]
+            self._add_stats(embed_seconds=time.perf_counter() - start_time)
+
+            embeddings_buffer, metadatas_buffer = pending[chunk_type]
+            for chunk_data, embedding in zip(batch, embeddings):
+                if embedding:
+                    embeddings_buffer.append(embedding)
+                    metadatas_buffer.append(chunk_data)
+                    self._add_stats(embedded=1)
+                else:
+                    logger.warning(f"Failed to generate {chunk_type} embedding for chunk {chunk_data['metadata'].get('chunk_id')}")
+                    self._add_stats(embed_failed=1)
+                    self._mark_failed([chunk_data])
+
+            if len(embeddings_buffer) >= self.upsert_batch_size:
+                self._put(upsert_queue, (chunk_type, embeddings_buffer, metadatas_buffer))
+                pending[chunk_type] = ([], [])
+
+        while True:
+            chunk_data = self._get(chunk_queue)
+            if chunk_data is _DONE:
+                break
+
+            # Kiểm tra chunk_data có hợp lệ không
+            if not chunk_data or 'metadata' not in chunk_data or not chunk_data.get('content'):
+                logger.warning("Invalid or empty chunk data, skipping...")
+                self._add_stats(embed_failed=1)
+                continue
+            chunk_type = chunk_data['metadata'].get('type', 'unknown')
+            if chunk_type not in batchers:
+                logger.warning(f"Unknown chunk type '{chunk_type}' for chunk {chunk_data['metadata'].get('chunk_id')}, skipping...")
+                self._add_stats(embed_failed=1)
+                continue
+
+            for batch in batchers[chunk_type].add(chunk_data):
+                embed(chunk_type, batch)
+
+        # embed the partially filled batches, then hand over what is left
+        for chunk_type, batcher in batchers.items():
+            if len(batcher):
+                embed(chunk_type, batcher.flush())
+        for chunk_type, (embeddings_buffer, metadatas_buffer) in pending.items():
+            if embeddings_buffer:
+                self._put(upsert_queue, (chunk_type, embeddings_buffer, metadatas_buffer))
+        self._put(upsert_queue, _DONE)
+
+    def _upsert_stage(self, upsert_queue: "queue.Queue"):
+        # upsert_fn may return a Future (non-blocking upsert): results are collected as they
+        # complete, and all of them before the stage ends
+        outstanding: "collections.deque" = collections.deque()
+
+        def collect(block: bool):
+            while outstanding and (block or outstanding[0][0].done()):
+                future, chunk_type, embeddings, metadatas = outstanding.popleft()
+                error = future.exception()
+                if error is None:
+                    self._add_stats(upserted=len(embeddings))
+                else:
+                    logger.error(f"Error saving batch of {len(embeddings)} {chunk_type} embeddings: {error}")
+                    self._mark_failed(metadatas)
+
+        while True:
+            item = self._get(upsert_queue)
+            if item is _DONE:
+                break
+            chunk_type, embeddings, metadatas = item
+            start_time = time.perf_counter()
+            try:
+                result = self.upsert_fn(chunk_type, embeddings, metadatas)
+                if isinstance(result, Future):
+                    outstanding.append((result, chunk_type, embeddings, metadatas))
+                else:
+                    self._add_stats(upserted=len(embeddings))
+            except Exception as e:
+                logger.error(f"Error saving batch of {len(embeddings)} {chunk_type} embeddings: {e}")
+                self._mark_failed(metadatas)
+            collect(block=False)
+            self._add_stats(upsert_seconds=time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        collect(block=True)
+        self._add_stats(upsert_seconds=time.perf_counter() - start_time)
@@ -0,0 +1,114 @@
+# ingestions/sources.py
+import os
+import shutil
+import zipfile
+
+from datetime import datetime
+from typing import BinaryIO, Iterator, Tuple
+from utils.hashing import new_hasher, file_content_hash, stream_content_hash
+from config.settings import settings
+
+def source_id_for_path(file_path: str) -> str:
+    # path relative to the raw data folder, so same-named files in different folders stay distinct
+    abs_path = os.path.abspath(file_path)
+    raw_dir = os.path.abspath(settings.RAW_DATA_DIR)
+    if os.path.commonpath([abs_path, raw_dir]) == raw_dir:
+        return os.path.relpath(abs_path, raw_dir).replace(os.sep, "/")
+    return os.path.basename(file_path)
+
+class _HashingWriter:
+    """File wrapper that hashes everything written through it."""
+    def __init__(self, f):
+        self.f = f
+        self.hasher = new_hasher()
+
+    def write(self, data: bytes) -> int:
+        self.hasher.update(data)
+        return self.f.write(data)
+
+class FileSource:
+    """A source file already on disk."""
+    def __init__(self, file_path: str):
+        self.path = file_path
+        self.name = file_path
+        self.source_id = source_id_for_path(file_path)
+        stat = os.stat(file_path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+
+    def __str__(self) -> str:
+        return self.path
+
+    def read_bytes(self) -> Tuple[bytes, str]:
+        """Returns (content, content hash)."""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        hasher = new_hasher()
+        hasher.update(data)
+        return data, hasher.hexdigest()
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def content_hash(self) -> str:
+        return file_content_hash(self.path)
+
+    def local_path(self) -> Tuple[str, str]:
+        """Returns (path on disk, content hash)."""
+        return self.path, file_content_hash(self.path)
+
+class ZipMemberSource:
+    """
+    A file inside an uploaded ZIP archive, read straight from the archive.
+    Members are only written to disk when a local file is needed (see `local_path`).
+    """
+    def __init__(self, zip_file: zipfile.ZipFile, info: zipfile.ZipInfo, extract_dir: str):
+        self.zip_file = zip_file
+        self.info = info
+        self.extract_dir = extract_dir
+        self.name = info.filename
+        self.source_id = info.filename
+        self.size = info.file_size
+        self.mtime = datetime(*info.date_time).timestamp()
+
+    def __str__(self) -> str:
+        return f"{self.zip_file.filename}:{self.name}"
+
+    def read_bytes(self) -> Tuple[bytes, str]:
+        """Returns (content, content hash) without touching the disk."""
+        with self.zip_file.open(self.info) as member:
+            data = member.read()
+        hasher = new_hasher()
+        hasher.update(data)
+        return data, hasher.hexdigest()
+
+    def open(self) -> BinaryIO:
+        """Decompressing stream over the member; a second open reads it again from the archive."""
+        return self.zip_file.open(self.info)
+
+    def content_hash(self) -> str:
+        with self.zip_file.open(self.info) as member:
+            return stream_content_hash(member)
+
+    def local_path(self) -> Tuple[str, str]:
+        """
+        Streams the member to `extract_dir` (hashing it on the way) and returns (path, content hash).
+        Images and audio need a file on disk anyway: search results display / play them from it.
+        """
+        target_path = os.path.realpath(os.path.join(self.extract_dir, self.name))
+        extract_dir = os.path.realpath(self.extract_dir)
+        if os.path.commonpath([target_path, extract_dir]) != extract_dir:
+            raise ValueError(f"Refusing to extract ZIP member outside of {self.extract_dir}: {self.name}")
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with self.zip_file.open(self.info) as member, open(target_path, "wb") as f:
+            writer = _HashingWriter(f)
+            shutil.copyfileobj(member, writer, length=1024 * 1024)
+        return target_path, writer.hasher.hexdigest()
+
+def iter_zip_sources(zip_file: zipfile.ZipFile, extract_dir: str) -> Iterator[ZipMemberSource]:
+    """Yields the file members of an archive lazily, in archive order."""
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        yield ZipMemberSource(zip_file, info, extract_dir)
@@ -12,28 +12,28 @@ if project_root not in sys.path:
 
 from config.settings import settings
 from utils.logger import logger
-from app import create_and_run_app
-from app import shared_qdrant_client
-
-GLOBAL_QDRANT_CLIENT = shared_qdrant_client
+from core.services import services
+from core.retrieval.docstore import get_docstore
+from utils.metrics import metrics
 
 def cleanup():
     logger.info("--- Starting cleanup process ---")
 
-    # --- Step 1: Close Qdrant connection ---
+    # --- Step 1: Close Qdrant connection (or the numpy engine's files) ---
     # release file .lock
-    global GLOBAL_QDRANT_CLIENT
-    if GLOBAL_QDRANT_CLIENT:
+    if services.client:
         try:
-            logger.info("Closing Qdrant client connection...")
-            GLOBAL_QDRANT_CLIENT.close()
+            logger.info("Waiting for pending upserts and closing Qdrant client connection...")
+            services.close()
             logger.success("Qdrant client closed successfully.")
         except Exception as e:
             logger.error(f"Error closing Qdrant client: {e}")
     
-    # Step 2: Clean up "qdrant_data" folder
-    qdrant_db_path = os.path.join(settings.DATA_DIR, "qdrant_data")
-    if os.path.exists(qdrant_db_path) and os.path.isdir(qdrant_db_path):
+    # Step 2: Clean up "qdrant_data" folder, or the numpy engine's (a Qdrant server keeps its data)
+    qdrant_db_path = settings.NUMPY_ENGINE_PATH if settings.VECTOR_DB_BACKEND == "numpy" else settings.QDRANT_PATH
+    if settings.VECTOR_DB_BACKEND == "qdrant" and settings.QDRANT_URL:
+        logger.info("Using a Qdrant server, its data is left in place.")
+    elif os.path.exists(qdrant_db_path) and os.path.isdir(qdrant_db_path):
         try:
             # try many times just in case
             import time
@@ -54,6 +54,20 @@ def cleanup():
     else:
         logger.info("Qdrant data directory not found, skipping cleanup.")
 
+    # Step 2b: Remove the DocStore with the points that reference it
+    if not (settings.VECTOR_DB_BACKEND == "qdrant" and settings.QDRANT_URL):
+        docstore = get_docstore()
+        if docstore is not None:
+            docstore.close()
+        for suffix in ("", "-wal", "-shm"):
+            docstore_file = settings.DOCSTORE_PATH + suffix
+            if os.path.exists(docstore_file):
+                try:
+                    os.remove(docstore_file)
+                    logger.success(f"Successfully removed DocStore file: {docstore_file}")
+                except Exception as e:
+                    logger.error(f"Error removing DocStore file: {e}")
+
     # Step 3: Clean up "raw" folder
     raw_data_path = settings.RAW_DATA_DIR
     if os.path.exists(raw_data_path) and os.path.isdir(raw_data_path):
@@ -82,6 +96,15 @@ def cleanup():
     else:
         logger.info("processed/chunks data directory not found, skipping cleanup.")
     
+    # Step 5: Remove the ingestion manifest, its points were deleted with "qdrant_data"
+    manifest_path = os.path.join(settings.METADATA_DIR, "ingestion_manifest.json")
+    if os.path.exists(manifest_path):
+        try:
+            os.remove(manifest_path)
+            logger.success(f"Successfully removed ingestion manifest: {manifest_path}")
+        except Exception as e:
+            logger.error(f"Error removing ingestion manifest: {e}")
+    
     logger.info("--- Cleanup process finished ---")
 
 def signal_handler(sig, frame):
@@ -101,6 +124,11 @@ def main():
     
     logger.info("--- Starting Multimedia RAG Assistant ---")
     
+    # storage and models load in the background while the UI starts
+    services.start()
+    metrics.start_file_writer()
+    
+    from app import create_and_run_app
     demo = create_and_run_app()
     
     print("\n" + "="*50)
@@ -108,7 +136,19 @@ def main():
     print("     Cleanup will be performed upon exit.               ")
     print("="*50 + "\n")
     
-    demo.launch()
+    if not settings.API_ENABLED:
+        demo.launch()
+        return
+    
+    # HTTP API and UI in one process, sharing the models and the Qdrant client
+    import gradio as gr
+    import uvicorn
+    from api.server import create_api
+    
+    api = create_api(services)
+    api = gr.mount_gradio_app(api, demo, path=settings.UI_PATH)
+    logger.info(f"Serving the API on http://{settings.API_HOST}:{settings.API_PORT} (UI at {settings.UI_PATH})")
+    uvicorn.run(api, host=settings.API_HOST, port=settings.API_PORT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,24 @@
+import hashlib
+
+from typing import BinaryIO
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+def new_hasher():
+    # blake2b is noticeably faster than sha256 on CPUs without SHA extensions
+    return hashlib.blake2b(digest_size=16)
+
+def bytes_content_hash(data: bytes) -> str:
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def stream_content_hash(stream: BinaryIO) -> str:
+    hasher = new_hasher()
+    for block in iter(lambda: stream.read(_READ_BLOCK_SIZE), b""):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+def file_content_hash(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return stream_content_hash(f)
@@ -0,0 +1,230 @@
+# utils/metrics.py
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+
+# Latency buckets in seconds (1 ms .. 2 min)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_format_labels(key) or "total": value for key, value in sorted(self._values.items())}
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum", "max")
+
+    def __init__(self, n_buckets: int):
+        self.bucket_counts = [0] * n_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+            series.max = max(series.max, value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observes the duration of the block in seconds (also when it raises)."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series.count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series.sum:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                _format_labels(key) or "total": {
+                    "count": series.count,
+                    "sum": series.sum,
+                    "avg": series.sum / series.count if series.count else 0.0,
+                    "max": series.max,
+                }
+                for key, series in sorted(self._series.items())
+            }
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text format.
+    Metrics are created on first use: `metrics.histogram("name", "help").observe(...)`.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._writer_thread = None
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise TypeError(f"Metric '{name}' is already registered as a {type(metric).__name__}.")
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+    def write_prometheus_file(self, path: Optional[str] = None) -> Optional[str]:
+        """Writes the metrics atomically (for node_exporter's textfile collector or a scraper)."""
+        path = path or settings.METRICS_FILE
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def start_file_writer(self):
+        """Rewrites METRICS_FILE every METRICS_FILE_INTERVAL_SECONDS in a daemon thread."""
+        if not settings.METRICS_ENABLED or not settings.METRICS_FILE or not settings.METRICS_FILE_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if self._writer_thread is not None:
+                return
+            self._writer_thread = threading.Thread(target=self._write_periodically, name="metrics-file-writer", daemon=True)
+            self._writer_thread.start()
+        logger.info(f"Writing Prometheus metrics to {settings.METRICS_FILE} every {settings.METRICS_FILE_INTERVAL_SECONDS}s.")
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FILE_INTERVAL_SECONDS)
+            try:
+                self.write_prometheus_file()
+            except Exception as e:
+                logger.warning(f"Could not write metrics file: {e}")
+
+metrics = MetricsRegistry()
+
+def timed(name: str, help_text: str = "", **labels):
+    """Shortcut: `with timed("qdrant_search_seconds", collection=...):`."""
+    return metrics.histogram(name, help_text).time(**labels)
+
+_profiler_lock = threading.Lock()
+
+@contextmanager
+def profile_request(name: str) -> Iterator[None]:
+    """
+    Opt-in cProfile hook for individual slow requests. When PROFILE_SAMPLE_RATE > 0, a
+    sampled fraction of requests is profiled and the dump is kept in PROFILE_DIR if the
+    request took at least PROFILE_SLOW_REQUEST_SECONDS (inspect with `python -m pstats`
+    or snakeviz). Only one request is profiled at a time.
+    """
+    if settings.PROFILE_SAMPLE_RATE <= 0 or random.random() >= settings.PROFILE_SAMPLE_RATE \
+            or not _profiler_lock.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    start_time = time.perf_counter()
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is already active in this thread
+            profiler = None
+        yield
+    finally:
+        duration = time.perf_counter() - start_time
+        try:
+            if profiler is not None:
+                profiler.disable()
+                if duration >= settings.PROFILE_SLOW_REQUEST_SECONDS:
+                    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+                    dump_path = os.path.join(settings.PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}_{int(duration * 1000)}ms.prof")
+                    profiler.dump_stats(dump_path)
+                    logger.info(f"Slow request '{name}' ({duration:.2f}s) profiled to {dump_path}")
+        finally:
+            _profiler_lock.release()